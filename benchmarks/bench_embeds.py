@@ -0,0 +1,66 @@
+"""Embed rendering throughput: cold render vs. fragment-cache hits.
+
+Run with ``python -m benchmarks.bench_embeds [deals] [profiles]``.
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+from bot.discord_webhook import EmbedRenderer, build_embed
+from bot.models import Deal
+
+
+def _deals(n: int) -> list[Deal]:
+    return [
+        Deal(
+            deal_id=f"deal-{i}",
+            title=f"Co-op Game {i}",
+            sale_price=1.0 + (i % 19),
+            normal_price=29.99,
+            savings_pct=float(i % 90),
+            store_id="1",
+            store_name="Steam",
+            store_icon=None,
+            steam_app_id=str(100000 + i),
+            thumb=f"https://cdn.example/{i}.jpg",
+            coop_tags=["Co-op", "Online Co-op"],
+            review_summary="Very Positive",
+            review_percent=90,
+            review_count=12000 + i,
+            current_players=1234 + i,
+            steamspy_ccu=4321,
+            steamspy_owners="1,000,000 .. 2,000,000",
+            reason="massive discount",
+        )
+        for i in range(n)
+    ]
+
+
+def _rate(label: str, count: int, elapsed: float) -> None:
+    print(f"{label:<32} {count / elapsed:>12,.0f} embeds/s  ({elapsed * 1000:.1f} ms)")
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    profiles = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    deals = _deals(n)
+    colors = [0x57F287 + p for p in range(profiles)]
+
+    started = time.perf_counter()
+    for color in colors:
+        for d in deals:
+            build_embed(d, color)
+    _rate("build_embed (no cache)", n * profiles, time.perf_counter() - started)
+
+    renderer = EmbedRenderer()
+    started = time.perf_counter()
+    for color in colors:
+        for d in deals:
+            renderer.render(d, color, footer_text=f"Profile {color:x}")
+    _rate(f"EmbedRenderer ({profiles} profiles)", n * profiles, time.perf_counter() - started)
+    print(f"fragment cache: hits={renderer.hits} misses={renderer.misses}")
+
+
+if __name__ == "__main__":
+    main()
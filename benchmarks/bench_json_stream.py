@@ -0,0 +1,68 @@
+"""Peak memory and parse time: buffered json.loads vs. streaming iter_json_array.
+
+Run with ``python -m benchmarks.bench_json_stream [specials] [filler_items]``.
+"""
+from __future__ import annotations
+
+import json
+import sys
+import time
+import tracemalloc
+
+from bot.http_client import iter_json_array
+from bot.steam_store import STEAM_SPECIAL_FIELDS
+
+
+def _payload(specials: int, filler: int) -> bytes:
+    def item(i: int) -> dict:
+        return {
+            "id": i,
+            "name": f"Game {i}",
+            "final_price": 499,
+            "original_price": 1999,
+            "discount_percent": 75,
+            "small_capsule_image": f"https://cdn/{i}/capsule.jpg",
+            "large_capsule_image": f"https://cdn/{i}/large.jpg",
+            "header_image": f"https://cdn/{i}/header.jpg",
+            "headline": "Lorem ipsum " * 20,
+            "body": "dolor sit amet " * 40,
+        }
+
+    doc = {
+        "top_sellers": {"items": [item(i) for i in range(filler)]},
+        "new_releases": {"items": [item(i) for i in range(filler)]},
+        "specials": {"items": [item(i) for i in range(specials)]},
+    }
+    return json.dumps(doc).encode("utf-8")
+
+
+def _measure(label: str, fn) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    n = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<12} items={n:<7} time={elapsed * 1000:8.1f} ms  peak={peak / 1e6:8.2f} MB")
+
+
+def main() -> None:
+    specials = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    filler = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    raw = _payload(specials, filler)
+    chunks = [raw[i : i + 65536] for i in range(0, len(raw), 65536)]
+    print(f"payload={len(raw) / 1e6:.1f} MB")
+
+    def buffered() -> int:
+        doc = json.loads(b"".join(chunks))
+        return len([{k: it.get(k) for k in STEAM_SPECIAL_FIELDS} for it in doc["specials"]["items"]])
+
+    def streamed() -> int:
+        return sum(1 for _ in iter_json_array(chunks, path=("specials", "items"), fields=STEAM_SPECIAL_FIELDS))
+
+    _measure("buffered", buffered)
+    _measure("streamed", streamed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Filter / score / dedupe / select throughput and peak memory at growing catalog sizes.
+
+Run with ``python -m benchmarks.bench_scaling [sizes]``, e.g. ``10000,100000,1000000``.
+Each stage is timed on its own, then re-run under tracemalloc for its peak
+allocation (the catalog itself is excluded).
+"""
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import replace
+from pathlib import Path
+from typing import Callable, List
+
+from benchmarks.catalog import synthetic_catalog, synthetic_stores
+from bot.cheapshark import StoreIndex
+from bot.config import load_settings
+from bot.filters import PRE, compile_filters
+from bot.main import _filter_store_map, _franchise_key, _score_deal, _select_deals
+from bot.metrics import RunMetrics
+from bot.state import FileStateBackend
+
+
+def _measure(label: str, n: int, fn: Callable[[], object], unit: str = "deals") -> None:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<22} {n / elapsed:>12,.0f} {unit + '/s':<8}  {elapsed * 1000:>9.1f} ms  peak {peak / 1e6:>7.1f} MB")
+
+
+def main() -> None:
+    sizes = [int(x) for x in (sys.argv[1] if len(sys.argv) > 1 else "10000,100000").split(",")]
+    stores = StoreIndex(synthetic_stores(400))
+    s = replace(
+        load_settings(),
+        max_price=40.0,
+        max_posts_per_run=10,
+        excluded_store_names=[f"store {i}" for i in range(300, 400)],
+        franchise_dedupe_enabled=True,
+    )
+    chain = compile_filters(s, [{"type": "exclude_title", "pattern": "season pass"}])
+
+    for n in sizes:
+        started = time.perf_counter()
+        catalog = synthetic_catalog(n, store_count=400)
+        build_s = time.perf_counter() - started
+        apps = len({d.steam_app_id for d in catalog})
+        families = len({_franchise_key(d.title, 2) for d in catalog})
+        print(f"{n:,} deals ({apps:,} apps, {families:,} families), generated in {build_s:.1f}s")
+
+        _measure("store allow/exclude", len(stores), lambda: _filter_store_map(stores, s), unit="stores")
+        _measure("pre-filter chain", n, lambda: [d for d in catalog if chain.check(PRE, d, None, RunMetrics())])
+        _measure("score", n, lambda: [_score_deal(d, s.price_sweet_spot, False) for d in catalog])
+        _measure("franchise keys", n, lambda: [_franchise_key(d.title, s.franchise_dedupe_words) for d in catalog])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            posted = {d.deal_id for d in catalog[:: max(1, n // 100)]}
+
+            def select() -> List[object]:
+                state = FileStateBackend(Path(tmp) / "posted.json")
+                return _select_deals(s, catalog, posted, state, RunMetrics())
+
+            _measure("rank + select", n, select)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Synthetic, enriched ``Deal`` catalogs for scaling benchmarks.
+
+The shape follows what the live sources return, only bigger:
+
+* franchise families: a base title plus sequels, editions and bundles, with
+  family sizes drawn from a heavy-tailed distribution;
+* the same Steam app listed by several stores (CheapShark re-sellers) and by
+  Steam itself, so appid dedupe has real work to do;
+* review counts that are log-normal (a few huge hits, a long tail of tiny
+  games) and review scores skewed towards "Positive".
+"""
+from __future__ import annotations
+
+import random
+from typing import Dict, List, Tuple
+
+from bot.models import Deal
+
+_SYLLABLES = ("vor", "ka", "tel", "mir", "dun", "sa", "rho", "gal", "en", "thu", "bri", "os", "ze", "lun", "ar", "qui")
+_NOUNS = (
+    "Kingdom", "Frontier", "Legion", "Harbor", "Outpost", "Dungeon", "Galaxy", "Orchard", "Citadel", "Tide",
+    "Protocol", "Caravan", "Reactor", "Abyss", "Colony", "Garrison", "Mirage", "Expedition", "Foundry", "Arena",
+)
+_SUFFIXES = ("", " 2", " 3", ": Remastered", " Deluxe Edition", " - Season Pass Bundle", " Gold Edition", " Reloaded")
+_TAG_SETS = (
+    ["Co-op"],
+    ["Co-op", "Online Co-op"],
+    ["Co-op", "Online Co-op", "LAN Co-op"],
+    ["Co-op", "Split-Screen Co-op"],
+    ["Co-op", "Online Co-op", "LAN Co-op", "Split-Screen Co-op"],
+)
+_REVIEW_LABELS = (
+    (95, "Overwhelmingly Positive"),
+    (80, "Very Positive"),
+    (70, "Mostly Positive"),
+    (40, "Mixed"),
+    (0, "Mostly Negative"),
+)
+
+
+def synthetic_stores(count: int = 40) -> Dict[str, dict]:
+    """A CheapShark-shaped ``fetch_stores`` map; store ``1`` is Steam."""
+    stores = {}
+    for i in range(1, count + 1):
+        stores[str(i)] = {
+            "storeID": str(i),
+            "storeName": "Steam" if i == 1 else f"  Store   {i}  ",
+            "isActive": 1,
+            "images": {"icon": f"/img/stores/icons/{i - 1}.png"},
+        }
+    return stores
+
+
+def _review(rng: random.Random) -> Tuple[int, int, str]:
+    count = int(rng.lognormvariate(5.0, 2.0))
+    percent = int(100 * rng.betavariate(6.0, 1.8))
+    label = next(text for floor, text in _REVIEW_LABELS if percent >= floor)
+    return percent, count, label
+
+
+def synthetic_catalog(n: int, seed: int = 1, store_count: int = 40) -> List[Deal]:
+    """Return ``n`` enriched deals; the same seed always yields the same catalog."""
+    rng = random.Random(seed)
+    store_ids = [str(i) for i in range(1, store_count + 1)]
+    deals: List[Deal] = []
+    appid = 10_000
+    while len(deals) < n:
+        name = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        base = f"{name} {rng.choice(_NOUNS)}"
+        members = min(len(_SUFFIXES), max(1, int(rng.paretovariate(1.6))))
+        for suffix in _SUFFIXES[:members]:
+            appid += rng.randint(1, 40)
+            title = base + suffix
+            normal = rng.choice((9.99, 14.99, 19.99, 29.99, 39.99, 59.99))
+            percent, count, label = _review(rng)
+            tags = rng.choice(_TAG_SETS)
+            listings = 1 + min(6, int(rng.expovariate(0.8)))
+            for store_id in rng.sample(store_ids, k=min(listings, len(store_ids))):
+                savings = float(rng.choice((10, 20, 25, 33, 40, 50, 60, 66, 75, 80, 85, 90)))
+                sale = round(normal * (1 - savings / 100) + rng.uniform(-0.3, 0.3), 2)
+                deals.append(
+                    Deal(
+                        deal_id=f"syn-{len(deals)}",
+                        title=title,
+                        sale_price=max(0.49, sale),
+                        normal_price=normal,
+                        savings_pct=savings,
+                        store_id=store_id,
+                        store_name="Steam" if store_id == "1" else f"Store {store_id}",
+                        store_icon=None,
+                        steam_app_id=str(appid),
+                        thumb=None,
+                        coop_tags=list(tags),
+                        review_summary=label,
+                        review_percent=percent,
+                        review_count=count,
+                    )
+                )
+                if len(deals) >= n:
+                    return deals
+    return deals
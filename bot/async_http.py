@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
+
+import requests
+
+if TYPE_CHECKING:
+    # Imported where it is used, so the sync bot runs without aiohttp installed.
+    import aiohttp
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Statuses whose Retry-After header replaces the backoff, as in urllib3's Retry.
+RETRY_AFTER_STATUSES = (413, 429, 503)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class AsyncHttpClient:
+    """Pooled aiohttp session with the same retry policy as ``build_session``.
+
+    Failures are re-raised as ``requests`` exceptions so callers handle the
+    sync and async paths the same way.
+    """
+
+    def __init__(
+        self,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        limit: int = 100,
+        limit_per_host: int = 20,
+    ):
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "AsyncHttpClient":
+        self._ensure_session()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.close()
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        import aiohttp
+
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get_json(self, url: str, *, params: Optional[Dict[str, str]] = None, timeout: float = 20) -> Any:
+        import aiohttp
+
+        session = self._ensure_session()
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt >= self.retries
+            try:
+                async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=timeout)) as r:
+                    if r.status in RETRY_STATUSES and not last_attempt:
+                        wait = _retry_after(r.headers.get("Retry-After")) if r.status in RETRY_AFTER_STATUSES else None
+                        await asyncio.sleep(self.backoff_factor * (2**attempt) if wait is None else wait)
+                        continue
+                    if r.status >= 400:
+                        raise requests.HTTPError(f"{r.status} Error: {r.reason} for url: {r.url}")
+                    try:
+                        return await r.json(content_type=None)
+                    except ValueError as e:
+                        # Same contract as ``requests``' Response.json(): a bad body is a RequestException.
+                        raise requests.exceptions.InvalidJSONError(f"Invalid JSON from {url}: {e}") from e
+            except asyncio.TimeoutError as e:
+                if last_attempt:
+                    raise requests.Timeout(f"Timed out after {timeout}s: {url}") from e
+            except aiohttp.ClientError as e:
+                if last_attempt:
+                    raise requests.ConnectionError(str(e)) from e
+            await asyncio.sleep(self.backoff_factor * (2**attempt))
+        raise requests.RequestException(f"Retries exhausted: {url}")
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delay or HTTP date), or None if absent or unparsable."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+async def get_json_async(
+    url: str,
+    *,
+    params: Optional[Dict[str, str]] = None,
+    timeout: float = 20,
+    client: Optional[AsyncHttpClient] = None,
+) -> Any:
+    if client is not None:
+        return await client.get_json(url, params=params, timeout=timeout)
+    async with AsyncHttpClient() as c:
+        return await c.get_json(url, params=params, timeout=timeout)
+
+
+async def gather_limited(
+    func: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    limit: int = 50,
+) -> List[R | BaseException]:
+    """Run ``func`` over ``items`` with at most ``limit`` in flight, keeping order.
+
+    Exceptions are returned in place of results so one bad item does not
+    cancel the rest of the fan-out.
+    """
+    sem = asyncio.Semaphore(max(1, limit))
+
+    async def _one(item: T) -> R:
+        async with sem:
+            return await func(item)
+
+    return await asyncio.gather(*(_one(i) for i in items), return_exceptions=True)
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import time
+from typing import Callable
+
+Clock = Callable[[], float]
+
+
+class StageBudget:
+    """Wall-clock allowance for one pipeline stage, capped by the run deadline."""
+
+    def __init__(self, name: str, seconds: float, run_deadline: float, clock: Clock):
+        self.name = name
+        self.seconds = max(0.0, seconds)
+        self._clock = clock
+        self.deadline = min(clock() + self.seconds, run_deadline)
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - self._clock())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def fraction_left(self) -> float:
+        if self.seconds <= 0:
+            return 0.0
+        return min(1.0, self.remaining() / self.seconds)
+
+    def timeout(self, default: float, floor: float = 1.0) -> float:
+        """Clamp a per-request timeout so a single call cannot outlive the stage."""
+        return max(floor, min(default, self.remaining()))
+
+
+class RunBudget:
+    def __init__(self, total_seconds: float, clock: Clock = time.monotonic):
+        self._clock = clock
+        self.total_seconds = max(0.0, total_seconds)
+        self.started = clock()
+        self.deadline = self.started + self.total_seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - self._clock())
+
+    def elapsed(self) -> float:
+        return self._clock() - self.started
+
+    def stage(self, name: str, seconds: float, reserve: float = 0.0) -> StageBudget:
+        """Start a stage budget; ``reserve`` seconds of the run are kept back for later stages."""
+        return StageBudget(name, seconds, self.deadline - max(0.0, reserve), self._clock)
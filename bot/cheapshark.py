@@ -1,16 +1,36 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import json
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
 
-from .http_client import get_json
+import requests
+
+from .async_http import AsyncHttpClient, get_json_async
+from .http_client import get_json, iter_json_items
 from .models import Deal
 
 CHEAPSHARK_DEALS_URL = "https://www.cheapshark.com/api/1.0/deals"
 CHEAPSHARK_STORES_URL = "https://www.cheapshark.com/api/1.0/stores"
 
+# The only deal fields _parse_deals reads; the streaming path drops the rest on arrival.
+CHEAPSHARK_DEAL_FIELDS = ("dealID", "title", "salePrice", "normalPrice", "savings", "storeID", "steamAppID", "thumb")
+
+LOGGER = logging.getLogger("coop_deals_bot")
+
 
 def fetch_stores(timeout: int = 20) -> Dict[str, Dict[str, Any]]:
-    raw = get_json(CHEAPSHARK_STORES_URL, timeout=timeout)
+    return _parse_stores(get_json(CHEAPSHARK_STORES_URL, timeout=timeout))
+
+
+async def fetch_stores_async(timeout: int = 20, client: Optional[AsyncHttpClient] = None) -> Dict[str, Dict[str, Any]]:
+    return _parse_stores(await get_json_async(CHEAPSHARK_STORES_URL, timeout=timeout, client=client))
+
+
+def _parse_stores(raw: Any) -> Dict[str, Dict[str, Any]]:
     stores: Dict[str, Dict[str, Any]] = {}
     for s in raw:
         sid = str(s.get("storeID", "")).strip()
@@ -27,13 +47,117 @@ def _store_icon_url(store_obj: Dict[str, Any]) -> Optional[str]:
     return f"https://www.cheapshark.com{icon_rel}"
 
 
-def fetch_deals(
-    upper_price: float,
-    steamworks_only: bool,
-    allowed_store_ids: Optional[List[str]],
-    store_map: Dict[str, Dict[str, Any]],
-    timeout: int = 20,
-) -> List[Deal]:
+def normalize_store_name(name: str) -> str:
+    return " ".join(name.strip().lower().split())
+
+
+@dataclass(frozen=True)
+class StoreInfo:
+    store_id: str
+    name: str
+    normalized: str
+    icon_url: Optional[str]
+
+
+class StoreIndex:
+    """The CheapShark store catalog, normalized once and looked up by ID or name.
+
+    Built from ``fetch_stores`` output; ``select`` returns a narrower index
+    sharing the same ``StoreInfo`` records, so every allow/exclude check and
+    per-deal name/icon lookup is a dict hit.
+    """
+
+    def __init__(self, stores: Dict[str, Dict[str, Any]]):
+        self.raw = stores
+        self.by_id: Dict[str, StoreInfo] = {}
+        self.ids_by_name: Dict[str, Set[str]] = {}
+        for sid, st in stores.items():
+            name = str(st.get("storeName", "")).strip()
+            info = StoreInfo(sid, name or f"Store {sid}", normalize_store_name(name), _store_icon_url(st))
+            self.by_id[sid] = info
+            self.ids_by_name.setdefault(info.normalized, set()).add(sid)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def __contains__(self, store_id: str) -> bool:
+        return store_id in self.by_id
+
+    def ids(self) -> List[str]:
+        return list(self.by_id)
+
+    def name(self, store_id: str) -> str:
+        info = self.by_id.get(store_id)
+        return info.name if info else f"Store {store_id}"
+
+    def icon(self, store_id: str) -> Optional[str]:
+        info = self.by_id.get(store_id)
+        return info.icon_url if info else None
+
+    def resolve(self, ids: Iterable[str], names: Iterable[str]) -> Set[str]:
+        """Store IDs matching any of ``ids`` or any of the (un-normalized) ``names``."""
+        found = {sid for sid in ids if sid in self.by_id}
+        for n in names:
+            found |= self.ids_by_name.get(normalize_store_name(n), set())
+        return found
+
+    def select(
+        self,
+        allowed_ids: Iterable[str] = (),
+        allowed_names: Iterable[str] = (),
+        excluded_ids: Iterable[str] = (),
+        excluded_names: Iterable[str] = (),
+    ) -> "StoreIndex":
+        allowed_ids, allowed_names = list(allowed_ids), list(allowed_names)
+        keep = self.resolve(allowed_ids, allowed_names) if allowed_ids or allowed_names else set(self.by_id)
+        keep -= self.resolve(excluded_ids, excluded_names)
+        subset = StoreIndex({})
+        subset.raw = {sid: st for sid, st in self.raw.items() if sid in keep}
+        subset.by_id = {sid: info for sid, info in self.by_id.items() if sid in keep}
+        for sid, info in subset.by_id.items():
+            subset.ids_by_name.setdefault(info.normalized, set()).add(sid)
+        return subset
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps({"fetched_at": time.time(), "stores": self.raw}), encoding="utf-8")
+        tmp_path.replace(path)
+
+
+def _read_store_cache(path: Path) -> tuple[float, Optional[Dict[str, Dict[str, Any]]]]:
+    if not path.exists():
+        return 0.0, None
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+        return float(raw["fetched_at"]), dict(raw["stores"])
+    except Exception as e:
+        LOGGER.warning("Failed to load store catalog cache %s: %s", path, e)
+        return 0.0, None
+
+
+def load_store_index(path: Optional[Path], ttl_seconds: float, timeout: float = 20) -> StoreIndex:
+    """Store index from the on-disk copy while it is younger than ``ttl_seconds``, else from CheapShark.
+
+    A failed refresh falls back to a stale copy when there is one; otherwise the
+    request error propagates.
+    """
+    fetched_at, cached = _read_store_cache(path) if path else (0.0, None)
+    if cached is not None and time.time() - fetched_at < ttl_seconds:
+        return StoreIndex(cached)
+    try:
+        index = StoreIndex(fetch_stores(timeout=timeout))
+    except requests.RequestException as e:
+        if cached is None:
+            raise
+        LOGGER.warning("Store catalog refresh failed, reusing cached copy: %s", e)
+        return StoreIndex(cached)
+    if path:
+        index.save(path)
+    return index
+
+
+def _deals_params(upper_price: float, steamworks_only: bool, allowed_store_ids: Optional[List[str]]) -> Dict[str, str]:
     params: Dict[str, str] = {
         "upperPrice": f"{upper_price:.2f}",
         "pageSize": "60",
@@ -45,17 +169,45 @@ def fetch_deals(
         params["steamworks"] = "1"
     if allowed_store_ids:
         params["storeID"] = ",".join(allowed_store_ids)
+    return params
 
-    raw = get_json(CHEAPSHARK_DEALS_URL, params=params, timeout=timeout)
 
+def fetch_deals(
+    upper_price: float,
+    steamworks_only: bool,
+    allowed_store_ids: Optional[List[str]],
+    stores: StoreIndex,
+    timeout: int = 20,
+    stream: bool = False,
+) -> List[Deal]:
+    params = _deals_params(upper_price, steamworks_only, allowed_store_ids)
+    if stream:
+        raw: Iterable[Any] = iter_json_items(
+            CHEAPSHARK_DEALS_URL, fields=CHEAPSHARK_DEAL_FIELDS, params=params, timeout=timeout
+        )
+    else:
+        raw = get_json(CHEAPSHARK_DEALS_URL, params=params, timeout=timeout)
+    return _parse_deals(raw, stores)
+
+
+async def fetch_deals_async(
+    upper_price: float,
+    steamworks_only: bool,
+    allowed_store_ids: Optional[List[str]],
+    stores: StoreIndex,
+    timeout: int = 20,
+    client: Optional[AsyncHttpClient] = None,
+) -> List[Deal]:
+    params = _deals_params(upper_price, steamworks_only, allowed_store_ids)
+    raw = await get_json_async(CHEAPSHARK_DEALS_URL, params=params, timeout=timeout, client=client)
+    return _parse_deals(raw, stores)
+
+
+def _parse_deals(raw: Iterable[Any], stores: StoreIndex) -> List[Deal]:
     deals: List[Deal] = []
     for item in raw:
         try:
             store_id = str(item.get("storeID", "")).strip()
-            store_obj = store_map.get(store_id, {})
-            store_name = str(store_obj.get("storeName", "")).strip() or f"Store {store_id}"
-            store_icon = _store_icon_url(store_obj)
-
             deal = Deal(
                 deal_id=str(item.get("dealID", "")).strip(),
                 title=str(item.get("title", "")).strip(),
@@ -63,8 +215,8 @@ def fetch_deals(
                 normal_price=float(item.get("normalPrice", "0") or 0),
                 savings_pct=float(item.get("savings", "0") or 0),
                 store_id=store_id,
-                store_name=store_name,
-                store_icon=store_icon,
+                store_name=stores.name(store_id),
+                store_icon=stores.icon(store_id),
                 steam_app_id=(str(item.get("steamAppID")).strip() if item.get("steamAppID") else None),
                 thumb=(str(item.get("thumb")).strip() if item.get("thumb") else None),
                 buy_url=f"https://www.cheapshark.com/redirect?dealID={str(item.get('dealID', '')).strip()}",
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
+import json
 import os
 import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Set
+from typing import Dict, List, Set
 
 
 def _to_bool(v: str | None, default: bool) -> bool:
@@ -37,6 +38,27 @@ def _to_csv_set(v: str | None) -> Set[str]:
     return set(_to_csv_list(v))
 
 
+def _to_float_map(v: str | None) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for pair in _to_csv_list(v):
+        key, sep, raw = pair.partition("=")
+        if not sep:
+            continue
+        try:
+            out[key.strip().lower()] = float(raw)
+        except ValueError:
+            continue
+    return out
+
+
+def _normalize_regions(v: str | None) -> List[str]:
+    regions: List[str] = []
+    for cc in _to_csv_list((v or "us").lower()):
+        if re.fullmatch(r"[a-z]{2}", cc) and cc not in regions:
+            regions.append(cc)
+    return regions or ["us"]
+
+
 def _to_color(v: str | None, default: int) -> int:
     if v is None:
         return default
@@ -46,6 +68,40 @@ def _to_color(v: str | None, default: int) -> int:
         return default
 
 
+@dataclass(frozen=True)
+class WebhookDestination:
+    """One Discord webhook a digest is delivered to, with its own presentation overrides."""
+
+    name: str
+    url: str
+    username: str
+    embed_color: int
+    role_id: str = ""
+
+
+def _to_destinations(v: str | None, username: str, embed_color: int) -> List[WebhookDestination]:
+    """Parse a JSON list of ``{"name", "url", "username", "color", "role_id"}`` objects; bad input yields []."""
+    try:
+        raw = json.loads(v) if v and v.strip() else []
+    except ValueError:
+        return []
+    out: List[WebhookDestination] = []
+    for i, item in enumerate(raw if isinstance(raw, list) else []):
+        if not isinstance(item, dict) or not str(item.get("url") or "").strip():
+            continue
+        color = item.get("color")
+        out.append(
+            WebhookDestination(
+                name=str(item.get("name") or f"mirror-{i + 1}").strip(),
+                url=str(item["url"]).strip(),
+                username=str(item.get("username") or username).strip(),
+                embed_color=_to_color(str(color).replace("#", "0x", 1), embed_color) if color else embed_color,
+                role_id=str(item.get("role_id") or "").strip(),
+            )
+        )
+    return out
+
+
 def _normalize_digest_mode(v: str | None) -> str:
     mode = (v or "daily").strip().lower() or "daily"
     return mode if mode in {"daily", "weekend", "budget"} else "daily"
@@ -64,20 +120,44 @@ def _normalize_profile_name(v: str | None) -> str:
 class Settings:
     discord_webhook_url: str
     discord_webhook_username: str
+    webhook_destinations: List[WebhookDestination]
+    webhook_queue_file: Path
+    webhook_retry_max_age_seconds: float
 
     max_price: float
     max_posts_per_run: int
     only_steam_redeemable: bool
     include_steam_direct_specials: bool
+    stream_json: bool
 
     allowed_store_ids: List[str]
     allowed_store_names: List[str]
     excluded_store_ids: List[str]
     excluded_store_names: List[str]
     exclude_keywords: Set[str]
+    filters_file: Path | None
 
     posted_cache_file: Path
     steam_cache_file: Path
+    steam_cache_max_entries: int
+    steam_cache_max_bytes: int
+    price_cache_file: Path
+    price_cache_ttl_seconds: float
+    store_cache_file: Path
+    store_cache_ttl_seconds: float
+    digest_history_file: Path
+    digest_history_size: int
+    digest_edit_max_age_seconds: float
+    popularity_index_file: Path
+    popularity_max_age_seconds: float
+    popularity_index_pages: int
+    coop_index_file: Path
+    incremental_runs: bool
+    candidate_snapshot_file: Path
+    incremental_max_age_seconds: float
+
+    regions: List[str]
+    region_max_prices: Dict[str, float]
     embed_color: int
 
     ping_role_on_post: bool
@@ -93,6 +173,28 @@ class Settings:
     franchise_dedupe_enabled: bool
     franchise_dedupe_words: int
 
+    run_deadline_seconds: float
+    ingestion_budget_seconds: float
+    enrichment_budget_seconds: float
+    posting_reserve_seconds: float
+
+    state_backend_url: str
+    state_namespace: str
+    claim_ttl_seconds: int
+
+    trace_file: Path | None
+    otlp_endpoint: str
+    metrics_textfile: Path | None
+    metrics_port: int
+    run_interval_seconds: float
+    profile_dir: Path | None
+    profile_min_run_seconds: float
+
+    http_record_file: Path | None
+    http_replay_file: Path | None
+    replay_latency_scale: float
+    replay_scale: int
+
     log_level: str
 
 
@@ -104,6 +206,7 @@ def load_settings() -> Settings:
     max_posts = max(1, _to_int(os.getenv("MAX_POSTS_PER_RUN", "10"), 10))
     only_steam = _to_bool(os.getenv("ONLY_STEAM_REDEEMABLE", "true"), True)
     include_steam_direct_specials = _to_bool(os.getenv("INCLUDE_STEAM_DIRECT_SPECIALS", "true"), True)
+    stream_json = _to_bool(os.getenv("STREAM_JSON", "false"), False)
 
     allowed_store_ids = _to_csv_list(os.getenv("ALLOWED_STORE_IDS", ""))
     allowed_store_names = _to_csv_list(os.getenv("ALLOWED_STORE_NAMES", ""))
@@ -114,14 +217,49 @@ def load_settings() -> Settings:
     env_excludes = os.getenv("EXCLUDE_KEYWORDS")
     exclude_keywords = _to_csv_set(env_excludes) if env_excludes is not None else default_excludes
 
+    filters_file_raw = os.getenv("FILTERS_FILE", "").strip()
+    filters_file = Path(filters_file_raw) if filters_file_raw else None
+
     posted_cache_file = Path(os.getenv("POSTED_CACHE_FILE", "data/posted_deals.json"))
     steam_cache_file = Path(os.getenv("STEAM_COOP_CACHE_FILE", "data/steam_coop_cache.json"))
+    steam_cache_max_entries = max(0, _to_int(os.getenv("STEAM_CACHE_MAX_ENTRIES", "5000"), 5000))
+    steam_cache_max_bytes = max(0, _to_int(os.getenv("STEAM_CACHE_MAX_BYTES", "4000000"), 4_000_000))
+    price_cache_file = Path(os.getenv("PRICE_CACHE_FILE", "data/steam_price_cache.json"))
+    price_cache_ttl_seconds = max(0.0, _to_float(os.getenv("PRICE_CACHE_TTL_SECONDS", "21600"), 21600.0))
+    store_cache_file = Path(os.getenv("STORE_CACHE_FILE", "data/cheapshark_stores.json"))
+    store_cache_ttl_seconds = max(0.0, _to_float(os.getenv("STORE_CACHE_TTL_SECONDS", "86400"), 86400.0))
+    digest_history_file = Path(os.getenv("DIGEST_HISTORY_FILE", "data/digest_history.json"))
+    digest_history_size = max(1, _to_int(os.getenv("DIGEST_HISTORY_SIZE", "10"), 10))
+    digest_edit_max_age_seconds = max(0.0, _to_float(os.getenv("DIGEST_EDIT_MAX_AGE_SECONDS", "86400"), 86400.0))
+    popularity_index_file = Path(os.getenv("POPULARITY_INDEX_FILE", "data/steamspy_popularity.json"))
+    popularity_max_age_seconds = max(0.0, _to_float(os.getenv("POPULARITY_MAX_AGE_SECONDS", "259200"), 259200.0))
+    popularity_index_pages = max(1, _to_int(os.getenv("POPULARITY_INDEX_PAGES", "5"), 5))
+    coop_index_file = Path(os.getenv("COOP_INDEX_FILE", "data/coop_index.bin"))
+    incremental_runs = _to_bool(os.getenv("INCREMENTAL_RUNS", "true"), True)
+    candidate_snapshot_file = Path(os.getenv("CANDIDATE_SNAPSHOT_FILE", "data/candidate_snapshot.json"))
+    incremental_max_age_seconds = max(0.0, _to_float(os.getenv("INCREMENTAL_MAX_AGE_SECONDS", "604800"), 604800.0))
+
+    regions = _normalize_regions(os.getenv("REGIONS", "us"))
+    region_max_prices = {
+        cc: max(0.01, price) for cc, price in _to_float_map(os.getenv("REGION_MAX_PRICES", "")).items()
+    }
 
     embed_color = _to_color(os.getenv("EMBED_COLOR", str(0x57F287)), 0x57F287)
 
     ping_role_on_post = _to_bool(os.getenv("PING_ROLE_ON_POST", "false"), False)
     discord_role_id = os.getenv("DISCORD_ROLE_ID", "").strip()
 
+    # The primary webhook comes first; DISCORD_DESTINATIONS adds mirrors with their own overrides.
+    webhook_destinations: List[WebhookDestination] = []
+    if webhook:
+        primary_role = discord_role_id if ping_role_on_post else ""
+        webhook_destinations.append(WebhookDestination("primary", webhook, username, embed_color, primary_role))
+    for dest in _to_destinations(os.getenv("DISCORD_DESTINATIONS"), username, embed_color):
+        if all(d.name != dest.name for d in webhook_destinations):
+            webhook_destinations.append(dest)
+    webhook_queue_file = Path(os.getenv("WEBHOOK_QUEUE_FILE", "data/webhook_queue.json"))
+    webhook_retry_max_age_seconds = max(0.0, _to_float(os.getenv("WEBHOOK_RETRY_MAX_AGE_SECONDS", "86400"), 86400.0))
+
     digest_mode = _normalize_digest_mode(os.getenv("DIGEST_MODE", "daily"))
     profile_name = _normalize_profile_name(os.getenv("PROFILE_NAME", "default"))
     price_sweet_spot = max(0.0, _to_float(os.getenv("PRICE_SWEET_SPOT", "5.0"), 5.0))
@@ -132,22 +270,73 @@ def load_settings() -> Settings:
     franchise_dedupe_enabled = _to_bool(os.getenv("FRANCHISE_DEDUPE_ENABLED", "true"), True)
     franchise_dedupe_words = max(1, min(5, _to_int(os.getenv("FRANCHISE_DEDUPE_WORDS", "2"), 2)))
 
+    run_deadline_seconds = max(10.0, _to_float(os.getenv("RUN_DEADLINE_SECONDS", "600"), 600.0))
+    ingestion_budget_seconds = max(1.0, _to_float(os.getenv("INGESTION_BUDGET_SECONDS", "60"), 60.0))
+    enrichment_budget_seconds = max(0.0, _to_float(os.getenv("ENRICHMENT_BUDGET_SECONDS", "300"), 300.0))
+    posting_reserve_seconds = max(0.0, _to_float(os.getenv("POSTING_RESERVE_SECONDS", "30"), 30.0))
+
+    state_backend_url = os.getenv("STATE_BACKEND_URL", "").strip()
+    state_namespace = os.getenv("STATE_NAMESPACE", "coop-deals").strip() or "coop-deals"
+    claim_ttl_seconds = max(60, _to_int(os.getenv("CLAIM_TTL_SECONDS", "21600"), 21600))
+
+    trace_file_raw = os.getenv("TRACE_FILE", "").strip()
+    trace_file = Path(trace_file_raw) if trace_file_raw else None
+    otlp_endpoint = (os.getenv("OTLP_ENDPOINT") or os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT") or "").strip()
+
+    metrics_textfile_raw = os.getenv("METRICS_TEXTFILE", "").strip()
+    metrics_textfile = Path(metrics_textfile_raw) if metrics_textfile_raw else None
+    metrics_port = min(65535, max(0, _to_int(os.getenv("METRICS_PORT", "0"), 0)))
+    run_interval_seconds = max(0.0, _to_float(os.getenv("RUN_INTERVAL_SECONDS", "0"), 0.0))
+    profile_dir_raw = os.getenv("PROFILE_DIR", "").strip()
+    profile_dir = Path(profile_dir_raw) if profile_dir_raw else None
+    profile_min_run_seconds = max(0.0, _to_float(os.getenv("PROFILE_MIN_RUN_SECONDS", "0"), 0.0))
+
+    http_record_raw = os.getenv("HTTP_RECORD_FILE", "").strip()
+    http_record_file = Path(http_record_raw) if http_record_raw else None
+    http_replay_raw = os.getenv("HTTP_REPLAY_FILE", "").strip()
+    http_replay_file = Path(http_replay_raw) if http_replay_raw else None
+    replay_latency_scale = max(0.0, _to_float(os.getenv("REPLAY_LATENCY_SCALE", "0"), 0.0))
+    replay_scale = max(1, min(1000, _to_int(os.getenv("REPLAY_SCALE", "1"), 1)))
+
     log_level = os.getenv("LOG_LEVEL", "INFO").strip().upper() or "INFO"
 
     return Settings(
         discord_webhook_url=webhook,
         discord_webhook_username=username,
+        webhook_destinations=webhook_destinations,
+        webhook_queue_file=webhook_queue_file,
+        webhook_retry_max_age_seconds=webhook_retry_max_age_seconds,
         max_price=max_price,
         max_posts_per_run=max_posts,
         only_steam_redeemable=only_steam,
         include_steam_direct_specials=include_steam_direct_specials,
+        stream_json=stream_json,
         allowed_store_ids=allowed_store_ids,
         allowed_store_names=allowed_store_names,
         excluded_store_ids=excluded_store_ids,
         excluded_store_names=excluded_store_names,
         exclude_keywords=exclude_keywords,
+        filters_file=filters_file,
         posted_cache_file=posted_cache_file,
         steam_cache_file=steam_cache_file,
+        steam_cache_max_entries=steam_cache_max_entries,
+        steam_cache_max_bytes=steam_cache_max_bytes,
+        price_cache_file=price_cache_file,
+        price_cache_ttl_seconds=price_cache_ttl_seconds,
+        store_cache_file=store_cache_file,
+        store_cache_ttl_seconds=store_cache_ttl_seconds,
+        digest_history_file=digest_history_file,
+        digest_history_size=digest_history_size,
+        digest_edit_max_age_seconds=digest_edit_max_age_seconds,
+        popularity_index_file=popularity_index_file,
+        popularity_max_age_seconds=popularity_max_age_seconds,
+        popularity_index_pages=popularity_index_pages,
+        coop_index_file=coop_index_file,
+        incremental_runs=incremental_runs,
+        candidate_snapshot_file=candidate_snapshot_file,
+        incremental_max_age_seconds=incremental_max_age_seconds,
+        regions=regions,
+        region_max_prices=region_max_prices,
         embed_color=embed_color,
         ping_role_on_post=ping_role_on_post,
         discord_role_id=discord_role_id,
@@ -159,5 +348,23 @@ def load_settings() -> Settings:
         min_review_count=min_review_count,
         franchise_dedupe_enabled=franchise_dedupe_enabled,
         franchise_dedupe_words=franchise_dedupe_words,
+        run_deadline_seconds=run_deadline_seconds,
+        ingestion_budget_seconds=ingestion_budget_seconds,
+        enrichment_budget_seconds=enrichment_budget_seconds,
+        posting_reserve_seconds=posting_reserve_seconds,
+        state_backend_url=state_backend_url,
+        state_namespace=state_namespace,
+        claim_ttl_seconds=claim_ttl_seconds,
+        trace_file=trace_file,
+        otlp_endpoint=otlp_endpoint,
+        metrics_textfile=metrics_textfile,
+        metrics_port=metrics_port,
+        run_interval_seconds=run_interval_seconds,
+        profile_dir=profile_dir,
+        profile_min_run_seconds=profile_min_run_seconds,
+        http_record_file=http_record_file,
+        http_replay_file=http_replay_file,
+        replay_latency_scale=replay_latency_scale,
+        replay_scale=replay_scale,
         log_level=log_level,
     )
@@ -0,0 +1,235 @@
+"""Compact local index of which Steam apps are co-op, and with which tags.
+
+The posting run consults it before any cache or network lookup, so an app
+already known to be single-player costs nothing. It grows incrementally: every
+appdetails answer seen during enrichment is recorded, apps skipped for lack of
+time are queued as pending, and ``python -m bot.coop_index`` works through
+pending apps and the SteamSpy snapshot off the critical path::
+
+    python -m bot.coop_index --limit 200
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import struct
+import time
+import zlib
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from .config import load_settings
+from .popularity import PopularityIndex
+from .steam import CATEGORY_TO_TAG, SteamCoopCache, fetch_coop_metadata
+
+LOGGER = logging.getLogger("coop_deals_bot")
+
+MAGIC = b"COOPIDX1"
+TAG_LABELS = tuple(CATEGORY_TO_TAG.values())
+# Steam's appdetails endpoint tolerates roughly 200 calls per 5 minutes.
+APPDETAILS_DELAY_SECONDS = 1.5
+
+
+class Bitmap:
+    """Growable bitset over non-negative ints, one bit per appid."""
+
+    def __init__(self, data: bytes = b""):
+        self._bits = bytearray(data)
+
+    def __contains__(self, i: int) -> bool:
+        byte = i >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << (i & 7)))
+
+    def set(self, i: int, value: bool = True) -> None:
+        byte = i >> 3
+        if byte >= len(self._bits):
+            if not value:
+                return
+            self._bits.extend(bytes(byte + 1 - len(self._bits)))
+        if value:
+            self._bits[byte] |= 1 << (i & 7)
+        else:
+            self._bits[byte] &= ~(1 << (i & 7)) & 0xFF
+
+    def count(self) -> int:
+        return int.from_bytes(self._bits, "little").bit_count()
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._bits.rstrip(b"\0"))
+
+
+def _appid_int(appid: object) -> Optional[int]:
+    text = str(appid or "").strip()
+    return int(text) if text.isdigit() else None
+
+
+class CoopCatalog:
+    """``checked``/``coop`` bitmaps plus one bitmap per ``CATEGORY_TO_TAG`` label.
+
+    Stored as ``MAGIC``, a length-prefixed JSON header and zlib-compressed
+    sections; the pending queue is a sorted uint32 array. Lookups are O(1).
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.updated_at = 0.0
+        self.checked = Bitmap()
+        self.coop = Bitmap()
+        self.tags: Dict[str, Bitmap] = {label: Bitmap() for label in TAG_LABELS}
+        self._pending: set[int] = set()
+        self.dirty = False
+        if path.exists():
+            try:
+                self._load(path.read_bytes())
+            except Exception as e:
+                LOGGER.warning("Failed to load co-op index %s: %s", path, e)
+
+    def _load(self, raw: bytes) -> None:
+        if not raw.startswith(MAGIC):
+            raise ValueError("not a co-op index file")
+        (header_len,) = struct.unpack_from("<I", raw, len(MAGIC))
+        offset = len(MAGIC) + 4
+        header = json.loads(raw[offset : offset + header_len])
+        offset += header_len
+        sections: Dict[str, bytes] = {}
+        for name, size in header["sections"]:
+            sections[name] = zlib.decompress(raw[offset : offset + size])
+            offset += size
+        self.updated_at = float(header.get("updated_at", 0))
+        self.checked = Bitmap(sections.get("checked", b""))
+        self.coop = Bitmap(sections.get("coop", b""))
+        for label in TAG_LABELS:
+            self.tags[label] = Bitmap(sections.get(f"tag:{label}", b""))
+        pending = array("I")
+        pending.frombytes(sections.get("pending", b""))
+        self._pending = set(pending)
+
+    def __len__(self) -> int:
+        return self.checked.count()
+
+    def lookup(self, appid: object) -> Optional[Tuple[bool, List[str]]]:
+        """``(is_coop, tags)`` for a checked app, else None."""
+        i = _appid_int(appid)
+        if i is None or i not in self.checked:
+            return None
+        return i in self.coop, [label for label in TAG_LABELS if i in self.tags[label]]
+
+    def record(self, appid: object, is_coop: bool, tags: Iterable[str]) -> None:
+        i = _appid_int(appid)
+        if i is None:
+            return
+        tag_set = set(tags)
+        self.checked.set(i)
+        self.coop.set(i, is_coop)
+        for label in TAG_LABELS:
+            self.tags[label].set(i, label in tag_set)
+        self._pending.discard(i)
+        self.dirty = True
+
+    def mark_pending(self, appid: object) -> None:
+        i = _appid_int(appid)
+        if i is not None and i not in self.checked and i not in self._pending:
+            self._pending.add(i)
+            self.dirty = True
+
+    def pending(self) -> List[int]:
+        return sorted(self._pending)
+
+    def seed_from_cache(self, steam_cache: SteamCoopCache) -> int:
+        """Record every app the Steam metadata cache already resolved; returns apps added."""
+        added = 0
+        for appid, meta in steam_cache.items():
+            i = _appid_int(appid)
+            if i is not None and i not in self.checked and "is_coop" in meta:
+                self.record(i, bool(meta.get("is_coop")), meta.get("coop_tags") or [])
+                added += 1
+        return added
+
+    def save(self) -> None:
+        sections = [("checked", self.checked.to_bytes()), ("coop", self.coop.to_bytes())]
+        sections += [(f"tag:{label}", self.tags[label].to_bytes()) for label in TAG_LABELS]
+        sections.append(("pending", array("I", sorted(self._pending)).tobytes()))
+        blobs = [(name, zlib.compress(data, 9)) for name, data in sections]
+        self.updated_at = time.time()
+        header = json.dumps(
+            {"updated_at": self.updated_at, "sections": [[name, len(blob)] for name, blob in blobs]}
+        ).encode("utf-8")
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp_path.open("wb") as fh:
+            fh.write(MAGIC + struct.pack("<I", len(header)) + header)
+            for _, blob in blobs:
+                fh.write(blob)
+        tmp_path.replace(self.path)
+        self.dirty = False
+
+
+def update_catalog(
+    catalog: CoopCatalog,
+    appids: Iterable[int],
+    limit: int,
+    delay_seconds: float = APPDETAILS_DELAY_SECONDS,
+    timeout: int = 20,
+    save_every: int = 25,
+    sleep=time.sleep,
+) -> int:
+    """Check up to ``limit`` unknown ``appids`` against appdetails; returns apps recorded.
+
+    Stops at the first failed request (usually rate limiting) and keeps what it has.
+    """
+    done = 0
+    for appid in appids:
+        if done >= limit:
+            break
+        if catalog.lookup(appid) is not None:
+            continue
+        if done:
+            sleep(delay_seconds)
+        try:
+            is_coop, tags = fetch_coop_metadata(str(appid), timeout=timeout)
+        except requests.RequestException as e:
+            LOGGER.warning("appdetails failed for appid=%s, stopping index update: %s", appid, e)
+            break
+        catalog.record(appid, is_coop, tags)
+        done += 1
+        if done % save_every == 0:
+            catalog.save()
+    if catalog.dirty:
+        catalog.save()
+    return done
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    s = load_settings()
+    parser = argparse.ArgumentParser(description="Incrementally update the local co-op catalog index.")
+    parser.add_argument("--limit", type=int, default=200, help="max appdetails calls for this invocation")
+    parser.add_argument("--delay", type=float, default=APPDETAILS_DELAY_SECONDS, help="seconds between calls")
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=getattr(logging, s.log_level, logging.INFO),
+        format="%(asctime)s | %(levelname)s | %(message)s",
+    )
+
+    catalog = CoopCatalog(s.coop_index_file)
+    seeded = catalog.seed_from_cache(SteamCoopCache(s.steam_cache_file))
+    # Apps real runs had to skip come first, then the SteamSpy snapshot (most-owned first).
+    snapshot = PopularityIndex(s.popularity_index_file, float("inf"))
+    queue = catalog.pending() + [int(a) for a in snapshot.appids() if a.isdigit()]
+    checked = update_catalog(catalog, queue, args.limit, delay_seconds=args.delay)
+    LOGGER.info(
+        "Co-op index %s: %d apps known (%d seeded from cache, %d checked), %d pending",
+        catalog.path,
+        len(catalog),
+        seeded,
+        checked,
+        len(catalog.pending()),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""History of the last N posted digests per profile.
+
+Each record keeps what the previous message showed: deal IDs, prices, the
+rendered embeds and their content hashes, and the message ID on every webhook
+destination it reached. A run compares its selection with the latest record
+for its profile and region to tell whether anything changed, and which embeds
+to re-send when editing those messages in place.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+LOGGER = logging.getLogger("coop_deals_bot")
+
+
+def embed_hash(embed: Dict[str, Any]) -> str:
+    """Content hash of an embed, ignoring the per-run timestamp."""
+    content = {k: v for k, v in embed.items() if k != "timestamp"}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class DigestRecord:
+    region: str
+    message_ids: Dict[str, str]
+    deal_ids: List[str]
+    prices: List[float]
+    embeds: List[Dict[str, Any]]
+    embed_hashes: List[str] = field(default_factory=list)
+    posted_at: float = field(default_factory=time.time)
+
+    def __post_init__(self) -> None:
+        if not self.embed_hashes:
+            self.embed_hashes = [embed_hash(e) for e in self.embeds]
+
+    def changed_embeds(self, embeds: List[Dict[str, Any]]) -> List[int]:
+        """Positions whose embed differs from the one this digest showed."""
+        return [i for i, e in enumerate(embeds) if i >= len(self.embed_hashes) or embed_hash(e) != self.embed_hashes[i]]
+
+
+class DigestHistory:
+    """``{profile: [record, ...]}`` newest first, ``keep`` records per profile, in one JSON file."""
+
+    def __init__(self, path: Path, keep: int = 10):
+        self.path = path
+        self.keep = max(1, keep)
+        self._profiles: Dict[str, List[DigestRecord]] = {}
+        if path.exists():
+            try:
+                raw = json.loads(path.read_text(encoding="utf-8"))
+                self._profiles = {p: [DigestRecord(**r) for r in recs] for p, recs in raw.items()}
+            except Exception as e:
+                LOGGER.warning("Failed to load digest history %s: %s", path, e)
+                self._profiles = {}
+
+    def latest(self, profile: str, region: str) -> Optional[DigestRecord]:
+        return next((r for r in self._profiles.get(profile, []) if r.region == region), None)
+
+    def records(self, profile: str) -> List[DigestRecord]:
+        return list(self._profiles.get(profile, []))
+
+    def add(self, profile: str, record: DigestRecord) -> None:
+        self._profiles[profile] = [record, *self._profiles.get(profile, [])][: self.keep]
+
+    def attach(self, ref: Dict[str, Any], destination: str, message_id: str) -> bool:
+        """Record a late delivery's message ID on the digest ``ref`` (see ``ref_for``); False if it is gone."""
+        for record in self._profiles.get(str(ref.get("profile")), []):
+            if record.region == ref.get("region") and record.posted_at == ref.get("posted_at"):
+                record.message_ids[destination] = message_id
+                return True
+        return False
+
+    @staticmethod
+    def ref_for(profile: str, record: DigestRecord) -> Dict[str, Any]:
+        return {"profile": profile, "region": record.region, "posted_at": record.posted_at}
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        doc = {p: [asdict(r) for r in recs] for p, recs in self._profiles.items()}
+        tmp_path.write_text(json.dumps(doc, separators=(",", ":")), encoding="utf-8")
+        tmp_path.replace(self.path)
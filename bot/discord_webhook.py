@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from operator import attrgetter
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
 
 from .http_client import build_session
-from .models import Deal
+from .models import Deal, format_price
 
 MAX_DISCORD_CONTENT_CHARS = 2000
 
@@ -19,61 +21,141 @@ def _reason_line(deal: Deal) -> Optional[str]:
     return None
 
 
-def build_embed(deal: Deal, embed_color: int) -> Dict[str, Any]:
-    steam_url = deal.steam_url
-    main_url = steam_url or deal.deal_url
+PRICE_LINE = "**{sale}** ~~{normal}~~  (**-{pct:.0f}%**)"
+STORE_LINE = "Store: **{store}**"
+COOP_LINE = "Co-op: **{tags}**"
+REVIEWS_LINE = "Steam Reviews: **{summary}** ({pct}% of {count:,})"
+REVIEWS_SHORT_LINE = "Steam Reviews: **{summary}**"
+DEFAULT_FOOTER = "Source: {source} • Curated Co-op Deals"
 
-    price_line = f"**${deal.sale_price:.2f}** ~~${deal.normal_price:.2f}~~  (**-{deal.savings_pct:.0f}%**)"
-    store_line = f"Store: **{deal.store_name}**"
 
-    desc_lines = [price_line, store_line]
-    if deal.coop_tags:
-        desc_lines.append(f"Co-op: **{', '.join(deal.coop_tags)}**")
+# Everything ``EmbedRenderer._render_fragment`` reads. Deal ID and region are left out, so the same game at
+# the same price shares one slot across regional digests; ``deal_url`` still tells CheapShark deals apart.
+_FRAGMENT_FIELDS = attrgetter(
+    "title",
+    "deal_url",
+    "steam_app_id",
+    "sale_price",
+    "normal_price",
+    "savings_pct",
+    "currency",
+    "store_name",
+    "coop_tags",
+    "review_summary",
+    "review_percent",
+    "review_count",
+    "current_players",
+    "steamspy_ccu",
+    "steamspy_owners",
+    "reason",
+    "thumb",
+    "store_icon",
+)
 
-    if deal.review_summary:
-        if deal.review_percent is not None and deal.review_count is not None:
-            desc_lines.append(
-                f"Steam Reviews: **{deal.review_summary}** ({deal.review_percent}% of {deal.review_count:,})"
-            )
+
+def _deal_fingerprint(deal: Deal) -> Tuple[Any, ...]:
+    """Hashable key over the fields a fragment is rendered from, so equal content maps to one cache slot."""
+    return tuple(tuple(v) if isinstance(v, list) else v for v in _FRAGMENT_FIELDS(deal))
+
+
+class EmbedRenderer:
+    """Renders deal embeds from templates compiled once per run.
+
+    The deal-dependent parts (title, url, description, links, thumbnail) are
+    cached by deal content hash, so posting the same deal to several profiles
+    or channels renders them once; only color and footer are per call. The
+    timestamp is fixed when the renderer is created.
+    """
+
+    def __init__(self, footer_template: str = DEFAULT_FOOTER, timestamp: Optional[str] = None):
+        self.timestamp = timestamp or datetime.now(timezone.utc).isoformat()
+        self._footer = footer_template.format
+        self._price = PRICE_LINE.format
+        self._store = STORE_LINE.format
+        self._coop = COOP_LINE.format
+        self._reviews = REVIEWS_LINE.format
+        self._reviews_short = REVIEWS_SHORT_LINE.format
+        self._fragments: Dict[Tuple[Any, ...], Dict[str, Optional[str]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _render_fragment(self, deal: Deal) -> Dict[str, Optional[str]]:
+        steam_url = deal.steam_url
+        desc_lines = [
+            self._price(
+                sale=format_price(deal.sale_price, deal.currency),
+                normal=format_price(deal.normal_price, deal.currency),
+                pct=deal.savings_pct,
+            ),
+            self._store(store=deal.store_name),
+        ]
+        if deal.coop_tags:
+            desc_lines.append(self._coop(tags=", ".join(deal.coop_tags)))
+
+        if deal.review_summary:
+            if deal.review_percent is not None and deal.review_count is not None:
+                desc_lines.append(
+                    self._reviews(summary=deal.review_summary, pct=deal.review_percent, count=deal.review_count)
+                )
+            else:
+                desc_lines.append(self._reviews_short(summary=deal.review_summary))
+
+        steamdb_stats: List[str] = []
+        if deal.current_players is not None:
+            steamdb_stats.append(f"Players now: **{_format_number(deal.current_players)}**")
+        if deal.steamspy_ccu is not None:
+            steamdb_stats.append(f"24h peak(CCU): **{_format_number(deal.steamspy_ccu)}**")
+        if deal.steamspy_owners:
+            steamdb_stats.append(f"Owners est.: **{deal.steamspy_owners}**")
+        if steamdb_stats:
+            desc_lines.append("SteamDB-ish stats: " + " • ".join(steamdb_stats))
+
+        reason_line = _reason_line(deal)
+        if reason_line:
+            desc_lines.append(reason_line)
+
+        links_value = f"[Buy deal]({deal.deal_url})"
+        if steam_url:
+            links_value += f" • [Steam]({steam_url})"
+        if deal.steamdb_url:
+            links_value += f" • [SteamDB]({deal.steamdb_url})"
+
+        return {
+            "title": deal.title[:256],
+            "url": steam_url or deal.deal_url,
+            "description": "\n".join(desc_lines)[:4096],
+            "links": links_value,
+            "thumbnail": deal.thumb or deal.store_icon,
+        }
+
+    def fragment(self, deal: Deal) -> Dict[str, Optional[str]]:
+        key = _deal_fingerprint(deal)
+        cached = self._fragments.get(key)
+        if cached is None:
+            self.misses += 1
+            cached = self._fragments[key] = self._render_fragment(deal)
         else:
-            desc_lines.append(f"Steam Reviews: **{deal.review_summary}**")
-
-    steamdb_stats: List[str] = []
-    if deal.current_players is not None:
-        steamdb_stats.append(f"Players now: **{_format_number(deal.current_players)}**")
-    if deal.steamspy_ccu is not None:
-        steamdb_stats.append(f"24h peak(CCU): **{_format_number(deal.steamspy_ccu)}**")
-    if deal.steamspy_owners:
-        steamdb_stats.append(f"Owners est.: **{deal.steamspy_owners}**")
-    if steamdb_stats:
-        desc_lines.append("SteamDB-ish stats: " + " • ".join(steamdb_stats))
-
-    reason_line = _reason_line(deal)
-    if reason_line:
-        desc_lines.append(reason_line)
-
-    links_value = f"[Buy deal]({deal.deal_url})"
-    if steam_url:
-        links_value += f" • [Steam]({steam_url})"
-    if deal.steamdb_url:
-        links_value += f" • [SteamDB]({deal.steamdb_url})"
-
-    embed: Dict[str, Any] = {
-        "title": deal.title[:256],
-        "url": main_url,
-        "description": "\n".join(desc_lines)[:4096],
-        "color": embed_color,
-        "fields": [{"name": "Links", "value": links_value, "inline": False}],
-        "footer": {"text": f"Source: {deal.source_label} • Curated Co-op Deals"},
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-    }
+            self.hits += 1
+        return cached
+
+    def render(self, deal: Deal, embed_color: int, footer_text: Optional[str] = None) -> Dict[str, Any]:
+        frag = self.fragment(deal)
+        embed: Dict[str, Any] = {
+            "title": frag["title"],
+            "url": frag["url"],
+            "description": frag["description"],
+            "color": embed_color,
+            "fields": [{"name": "Links", "value": frag["links"], "inline": False}],
+            "footer": {"text": footer_text or self._footer(source=deal.source_label)},
+            "timestamp": self.timestamp,
+        }
+        if frag["thumbnail"]:
+            embed["thumbnail"] = {"url": frag["thumbnail"]}
+        return embed
 
-    if deal.thumb:
-        embed["thumbnail"] = {"url": deal.thumb}
-    elif deal.store_icon:
-        embed["thumbnail"] = {"url": deal.store_icon}
 
-    return embed
+def build_embed(deal: Deal, embed_color: int, renderer: Optional[EmbedRenderer] = None) -> Dict[str, Any]:
+    return (renderer or EmbedRenderer()).render(deal, embed_color)
 
 
 def _compose_content(message_title: str, metrics_summary: Optional[str]) -> str:
@@ -90,16 +172,11 @@ def _compose_content(message_title: str, metrics_summary: Optional[str]) -> str:
     return f"{title}{separator}{trimmed_metrics}"
 
 
-def post_embeds(
-    webhook_url: str,
-    username: str,
-    content: str,
-    embeds: List[Dict[str, Any]],
-    role_id_to_ping: Optional[str] = None,
-    timeout: int = 20,
-) -> None:
+def build_payload(
+    username: str, content: str, embeds: List[Dict[str, Any]], role_id_to_ping: Optional[str] = None
+) -> Dict[str, Any]:
     mention = f"<@&{role_id_to_ping}> " if role_id_to_ping else ""
-    payload = {
+    return {
         "content": f"{mention}{content}",
         "username": username,
         "embeds": embeds[:10],
@@ -109,9 +186,58 @@ def post_embeds(
         },
     }
 
+
+def send_payload(webhook_url: str, payload: Dict[str, Any], timeout: int = 20) -> Optional[str]:
+    """Send one webhook message; returns its message ID when Discord reports one."""
     session = build_session()
-    r = session.post(webhook_url, json=payload, timeout=timeout)
+    # wait=true makes Discord answer with the created message, whose ID later edits need.
+    r = session.post(webhook_url, params={"wait": "true"}, json=payload, timeout=timeout)
     r.raise_for_status()
+    return _message_id(r)
+
+
+def post_embeds(
+    webhook_url: str,
+    username: str,
+    content: str,
+    embeds: List[Dict[str, Any]],
+    role_id_to_ping: Optional[str] = None,
+    timeout: int = 20,
+) -> Optional[str]:
+    return send_payload(webhook_url, build_payload(username, content, embeds, role_id_to_ping), timeout=timeout)
+
+
+def _message_id(r: Any) -> Optional[str]:
+    try:
+        body = r.json()
+    except ValueError:
+        return None
+    message_id = body.get("id") if isinstance(body, dict) else None
+    return str(message_id) if message_id else None
+
+
+def _message_url(webhook_url: str, message_id: str) -> str:
+    parts = urlsplit(webhook_url)
+    return urlunsplit(parts._replace(path=f"{parts.path.rstrip('/')}/messages/{message_id}"))
+
+
+def edit_embeds(webhook_url: str, message_id: str, embeds: List[Dict[str, Any]], timeout: int = 20) -> None:
+    """Replace the embeds of a message this webhook posted; content and pings stay as they were."""
+    session = build_session()
+    r = session.patch(_message_url(webhook_url, message_id), json={"embeds": embeds[:10]}, timeout=timeout)
+    r.raise_for_status()
+
+
+def render_digest(
+    deals: List[Deal],
+    embed_color: int,
+    message_title: str,
+    metrics_summary: Optional[str] = None,
+    renderer: Optional[EmbedRenderer] = None,
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """Message content and embeds for one digest, ready to send to any number of webhooks."""
+    renderer = renderer or EmbedRenderer()
+    return _compose_content(message_title, metrics_summary), [renderer.render(d, embed_color) for d in deals]
 
 
 def post_deals(
@@ -122,12 +248,13 @@ def post_deals(
     message_title: str,
     role_id_to_ping: Optional[str] = None,
     metrics_summary: Optional[str] = None,
-) -> None:
-    embeds = [build_embed(d, embed_color) for d in deals]
-    post_embeds(
+    renderer: Optional[EmbedRenderer] = None,
+) -> Optional[str]:
+    content, embeds = render_digest(deals, embed_color, message_title, metrics_summary, renderer)
+    return post_embeds(
         webhook_url=webhook_url,
         username=username,
-        content=_compose_content(message_title, metrics_summary),
+        content=content,
         embeds=embeds,
         role_id_to_ping=role_id_to_ping,
     )
@@ -0,0 +1,170 @@
+"""Deliver one rendered digest to every configured webhook, queueing failures for the next run.
+
+Payloads are built once per digest; each destination only swaps in its
+username, role mention and embed color. Sends run concurrently, so a slow or
+failing webhook does not hold up the others, and a failed send is stored in
+a per-destination retry queue that the next run drains first.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from .config import WebhookDestination
+from .discord_webhook import build_payload, edit_embeds, send_payload
+from .prometheus import PREFIX, REGISTRY
+from .tracing import bind_context, span
+
+LOGGER = logging.getLogger("coop_deals_bot")
+
+MAX_QUEUED_PER_DESTINATION = 20
+
+
+def recolor(embeds: List[Dict[str, Any]], color: int) -> List[Dict[str, Any]]:
+    return [e if e.get("color") == color else {**e, "color": color} for e in embeds]
+
+
+def payload_for(dest: WebhookDestination, content: str, embeds: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return build_payload(dest.username, content, recolor(embeds[:10], dest.embed_color), dest.role_id or None)
+
+
+@dataclass
+class Delivery:
+    destination: WebhookDestination
+    payload: Dict[str, Any]
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _record(dest: WebhookDestination, result: str) -> None:
+    REGISTRY.inc(
+        f"{PREFIX}_webhook_deliveries_total", 1, "Webhook sends by outcome.", destination=dest.name, result=result
+    )
+
+
+def _send(delivery: Delivery) -> Delivery:
+    with span("discord.post", destination=delivery.destination.name) as sp:
+        try:
+            delivery.message_id = send_payload(delivery.destination.url, delivery.payload)
+        except requests.RequestException as e:
+            delivery.error = str(e)
+            sp.set_error(e)
+    _record(delivery.destination, "ok" if delivery.ok else "failed")
+    return delivery
+
+
+def fan_out(destinations: List[WebhookDestination], content: str, embeds: List[Dict[str, Any]]) -> List[Delivery]:
+    """Send one digest to every destination concurrently; never raises for a failed webhook."""
+    deliveries = [Delivery(dest, payload_for(dest, content, embeds)) for dest in destinations]
+    if len(deliveries) == 1:
+        return [_send(deliveries[0])]
+    with ThreadPoolExecutor(max_workers=len(deliveries), thread_name_prefix="webhook") as executor:
+        return list(executor.map(bind_context(_send), deliveries))
+
+
+def edit_everywhere(
+    destinations: List[WebhookDestination], message_ids: Dict[str, str], embeds: List[Dict[str, Any]]
+) -> int:
+    """Edit a digest's message on every destination it was delivered to; returns edits that succeeded."""
+    edited = 0
+    for dest in destinations:
+        message_id = message_ids.get(dest.name)
+        if not message_id:
+            continue
+        try:
+            edit_embeds(dest.url, message_id, recolor(embeds, dest.embed_color))
+            edited += 1
+        except requests.RequestException as e:
+            LOGGER.warning("Failed to edit digest on webhook %s: %s", dest.name, e)
+    return edited
+
+
+@dataclass
+class Redelivery:
+    """A queued payload that got through; ``digest`` is the reference given to ``RetryQueue.push``."""
+
+    destination: str
+    digest: Optional[Dict[str, Any]]
+    message_id: Optional[str]
+
+
+class RetryQueue:
+    """Undelivered payloads per destination name, oldest first, in one JSON file.
+
+    Entries older than ``max_age_seconds`` are dropped rather than sent late,
+    and each destination keeps at most ``MAX_QUEUED_PER_DESTINATION``.
+    """
+
+    def __init__(self, path: Path, max_age_seconds: float = 86400.0):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self._queues: Dict[str, List[Dict[str, Any]]] = {}
+        if path.exists():
+            try:
+                raw = json.loads(path.read_text(encoding="utf-8"))
+                if isinstance(raw, dict):
+                    self._queues = {str(k): list(v) for k, v in raw.items() if isinstance(v, list)}
+            except Exception as e:
+                LOGGER.warning("Failed to load webhook retry queue %s: %s", path, e)
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def pending(self, name: str) -> List[Dict[str, Any]]:
+        return list(self._queues.get(name, []))
+
+    def push(self, name: str, payload: Dict[str, Any], digest: Optional[Dict[str, Any]] = None) -> None:
+        """Queue ``payload`` for ``name``; ``digest`` identifies the history record to attach its message ID to."""
+        queue = self._queues.setdefault(name, [])
+        queue.append({"queued_at": time.time(), "payload": payload, "digest": digest})
+        del queue[:-MAX_QUEUED_PER_DESTINATION]
+
+    def drain(self, destinations: List[WebhookDestination]) -> List[Redelivery]:
+        """Resend queued payloads, each destination in its own thread; returns what got through."""
+        active = [d for d in destinations if self._queues.get(d.name)]
+        if not active:
+            return []
+        with ThreadPoolExecutor(max_workers=len(active), thread_name_prefix="webhook-retry") as executor:
+            return [r for delivered in executor.map(bind_context(self._drain_one), active) for r in delivered]
+
+    def _drain_one(self, dest: WebhookDestination) -> List[Redelivery]:
+        queue = self._queues.get(dest.name, [])
+        delivered: List[Redelivery] = []
+        while queue:
+            entry = queue[0]
+            if time.time() - float(entry.get("queued_at", 0)) > self.max_age_seconds:
+                LOGGER.warning("Dropping a digest queued for webhook %s: older than the retry window", dest.name)
+                queue.pop(0)
+                _record(dest, "expired")
+                continue
+            try:
+                with span("discord.retry", destination=dest.name):
+                    message_id = send_payload(dest.url, entry["payload"])
+            except requests.RequestException as e:
+                LOGGER.warning("Webhook %s still failing, %d digest(s) stay queued: %s", dest.name, len(queue), e)
+                _record(dest, "failed")
+                break
+            queue.pop(0)
+            delivered.append(Redelivery(dest.name, entry.get("digest"), message_id))
+            _record(dest, "retried")
+        return delivered
+
+    def save(self, destinations: Optional[List[WebhookDestination]] = None) -> None:
+        """Write the queue; with ``destinations``, entries for webhooks no longer configured are dropped."""
+        names = {d.name for d in destinations} if destinations is not None else None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        doc = {name: queue for name, queue in self._queues.items() if queue and (names is None or name in names)}
+        tmp_path.write_text(json.dumps(doc, separators=(",", ":")), encoding="utf-8")
+        tmp_path.replace(self.path)
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import Settings
+from .metrics import RunMetrics
+from .models import Deal
+
+# Stages run in this order; "post" rules need Steam metadata from enrichment.
+PRE = "pre"
+POST = "post"
+
+Predicate = Callable[[Deal, Dict[str, Any]], bool]
+
+
+class FilterConfigError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class FilterRule:
+    """One compiled predicate. ``name`` is the rejection-counter key in RunMetrics.
+
+    ``builtin`` rules count into RunMetrics' dedicated ``filtered_*`` fields;
+    declared rules are tallied by name even when the name matches one of them.
+    """
+
+    name: str
+    stage: str
+    cost: int
+    accepts: Predicate
+    builtin: bool = False
+
+
+class FilterChain:
+    def __init__(self, rules: List[FilterRule]):
+        ordered = sorted(rules, key=lambda r: (r.stage != PRE, r.cost))
+        self.pre = [r for r in ordered if r.stage == PRE]
+        self.post = [r for r in ordered if r.stage == POST]
+
+    def check(self, stage: str, deal: Deal, meta: Optional[Dict[str, Any]], metrics: RunMetrics) -> bool:
+        return self.rejection(stage, deal, meta, metrics) is None
+
+    def rejection(
+        self, stage: str, deal: Deal, meta: Optional[Dict[str, Any]], metrics: RunMetrics
+    ) -> Optional[FilterRule]:
+        """The first rule of ``stage`` that rejects ``deal`` (counted in ``metrics``), or None."""
+        for rule in self.pre if stage == PRE else self.post:
+            if not rule.accepts(deal, meta or {}):
+                metrics.record_rejection(rule.name, builtin=rule.builtin)
+                return rule
+        return None
+
+
+def _owners_lower_bound(owners: Optional[str]) -> Optional[int]:
+    # SteamSpy reports buckets like "1,000,000 .. 2,000,000".
+    if not owners:
+        return None
+    head = owners.split("..")[0].replace(",", "").strip()
+    return int(head) if head.isdigit() else None
+
+
+def _builtin_rules(s: Settings) -> List[FilterRule]:
+    keywords = [k.lower() for k in s.exclude_keywords]
+    return [
+        FilterRule("price", PRE, 1, lambda d, m: d.sale_price < s.max_price, builtin=True),
+        FilterRule("discount", PRE, 1, lambda d, m: d.savings_pct >= s.min_discount_percent, builtin=True),
+        FilterRule("keyword", PRE, 3, lambda d, m: not any(k in d.title.lower() for k in keywords), builtin=True),
+        FilterRule("missing_appid", PRE, 1, lambda d, m: bool(d.steam_app_id), builtin=True),
+        FilterRule("non_coop", POST, 10, lambda d, m: bool(m.get("is_coop")), builtin=True),
+        FilterRule(
+            "reviews",
+            POST,
+            10,
+            lambda d, m: _passes_review_threshold(
+                m.get("review_percent"), m.get("review_count"), s.min_review_percent, s.min_review_count
+            ),
+            builtin=True,
+        ),
+    ]
+
+
+def _passes_review_threshold(
+    review_percent: object,
+    review_count: object,
+    min_review_percent: int,
+    min_review_count: int,
+) -> bool:
+    if min_review_percent <= 0 and min_review_count <= 0:
+        return True
+    if not isinstance(review_percent, int) or not isinstance(review_count, int):
+        return False
+    return review_percent >= min_review_percent and review_count >= min_review_count
+
+
+def _rule_price_range(spec: Dict[str, Any]) -> FilterRule:
+    lo = float(spec.get("min", 0))
+    hi = float(spec.get("max", float("inf")))
+    return FilterRule("price_range", PRE, 1, lambda d, m: lo <= d.sale_price <= hi)
+
+
+def _rule_min_discount(spec: Dict[str, Any]) -> FilterRule:
+    value = float(spec["value"])
+    return FilterRule("min_discount", PRE, 1, lambda d, m: d.savings_pct >= value)
+
+
+def _rule_stores(spec: Dict[str, Any]) -> FilterRule:
+    include = {str(x).strip().lower() for x in spec.get("include", [])}
+    exclude = {str(x).strip().lower() for x in spec.get("exclude", [])}
+
+    def accepts(d: Deal, m: Dict[str, Any]) -> bool:
+        name = d.store_name.strip().lower()
+        return (not include or name in include) and name not in exclude
+
+    return FilterRule("stores", PRE, 2, accepts)
+
+
+def _rule_exclude_title(spec: Dict[str, Any]) -> FilterRule:
+    pattern = re.compile(str(spec["pattern"]), re.IGNORECASE)
+    return FilterRule("exclude_title", PRE, 4, lambda d, m: not pattern.search(d.title))
+
+
+def _rule_require_tags(spec: Dict[str, Any]) -> FilterRule:
+    any_of = {str(t).lower() for t in spec.get("any", [])}
+    all_of = {str(t).lower() for t in spec.get("all", [])}
+
+    def accepts(d: Deal, m: Dict[str, Any]) -> bool:
+        tags = {str(t).lower() for t in (m.get("coop_tags") or [])}
+        return (not any_of or bool(tags & any_of)) and all_of <= tags
+
+    return FilterRule("tags", POST, 11, accepts)
+
+
+def _rule_min_reviews(spec: Dict[str, Any]) -> FilterRule:
+    pct = int(spec.get("percent", 0))
+    count = int(spec.get("count", 0))
+    return FilterRule(
+        "min_reviews",
+        POST,
+        11,
+        lambda d, m: _passes_review_threshold(m.get("review_percent"), m.get("review_count"), pct, count),
+    )
+
+
+def _rule_min_ccu(spec: Dict[str, Any]) -> FilterRule:
+    value = int(spec["value"])
+
+    def accepts(d: Deal, m: Dict[str, Any]) -> bool:
+        known = [v for v in (m.get("steamspy_ccu"), m.get("current_players")) if v is not None]
+        if m.get("popularity_pending") or not known:
+            # Unknown (or deferred by the popularity budget) is not evidence of a small player base.
+            return True
+        return max(known) >= value
+
+    return FilterRule("min_ccu", POST, 12, accepts)
+
+
+def _rule_owners(spec: Dict[str, Any]) -> FilterRule:
+    lo = int(spec.get("min", 0))
+    hi = spec.get("max")
+
+    def accepts(d: Deal, m: Dict[str, Any]) -> bool:
+        owners = _owners_lower_bound(m.get("steamspy_owners"))
+        if m.get("popularity_pending") or owners is None:
+            return True
+        return owners >= lo and (hi is None or owners <= int(hi))
+
+    return FilterRule("owners", POST, 12, accepts)
+
+
+RULE_TYPES: Dict[str, Callable[[Dict[str, Any]], FilterRule]] = {
+    "price_range": _rule_price_range,
+    "min_discount": _rule_min_discount,
+    "stores": _rule_stores,
+    "exclude_title": _rule_exclude_title,
+    "require_tags": _rule_require_tags,
+    "min_reviews": _rule_min_reviews,
+    "min_ccu": _rule_min_ccu,
+    "owners": _rule_owners,
+}
+
+
+def compile_filters(s: Settings, specs: List[Dict[str, Any]]) -> FilterChain:
+    """Compile the settings-driven checks plus declared rules into one ordered chain."""
+    rules = _builtin_rules(s)
+    for i, spec in enumerate(specs):
+        kind = spec.get("type") if isinstance(spec, dict) else None
+        factory = RULE_TYPES.get(str(kind))
+        if factory is None:
+            raise FilterConfigError(f"rule #{i + 1}: unknown filter type {kind!r}")
+        try:
+            rule = factory(spec)
+        except (KeyError, TypeError, ValueError, re.error) as e:
+            raise FilterConfigError(f"rule #{i + 1} ({kind}): {e}") from e
+        if spec.get("name"):
+            rule = FilterRule(str(spec["name"]), rule.stage, rule.cost, rule.accepts)
+        rules.append(rule)
+    return FilterChain(rules)
+
+
+def load_filter_rules(path: Optional[Path], profile_name: str) -> List[Dict[str, Any]]:
+    """Read rules from a JSON or TOML file.
+
+    ``profiles.<name>.rules`` wins over the top-level ``rules`` list.
+    """
+    if path is None:
+        return []
+    try:
+        text = path.read_text(encoding="utf-8")
+        if path.suffix == ".toml":
+            import tomllib
+
+            doc = tomllib.loads(text)
+        else:
+            doc = json.loads(text)
+    except Exception as e:
+        raise FilterConfigError(f"cannot read filters file {path}: {e}") from e
+
+    if not isinstance(doc, dict):
+        raise FilterConfigError(f"filters file {path} must contain an object")
+    profiles = doc.get("profiles") or {}
+    if not isinstance(profiles, dict):
+        raise FilterConfigError(f"filters file {path}: 'profiles' must be an object")
+    profile = profiles.get(profile_name)
+    rules = profile.get("rules") if isinstance(profile, dict) else doc.get("rules")
+    if rules is None:
+        return []
+    if not isinstance(rules, list):
+        raise FilterConfigError(f"filters file {path}: 'rules' must be a list")
+    return rules
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import codecs
+import json
+import re
+from typing import Any, Collection, Dict, Iterable, Iterator, Optional, Sequence
+from urllib.parse import urlsplit
 
 import requests
-from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from .prometheus import observe_http, record_http_error
+from .tracing import detached_span, span
+from .transport import transport_adapter
+
 
 def build_session(retries: int = 3, backoff_factor: float = 0.5) -> requests.Session:
     retry = Retry(
@@ -18,7 +25,7 @@ def build_session(retries: int = 3, backoff_factor: float = 0.5) -> requests.Ses
         allowed_methods=frozenset({"GET", "POST"}),
         raise_on_status=False,
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = transport_adapter(max_retries=retry)
     session = requests.Session()
     session.mount("http://", adapter)
     session.mount("https://", adapter)
@@ -33,6 +40,191 @@ def get_json(
     session: Optional[requests.Session] = None,
 ) -> Any:
     s = session or build_session()
-    r = s.get(url, params=params, timeout=timeout)
-    r.raise_for_status()
-    return r.json()
+    with span("HTTP GET", **_http_attributes(url)) as sp:
+        r = _send(s, url, params=params, timeout=timeout)
+        _record_response(sp, r)
+        r.raise_for_status()
+        return r.json()
+
+
+def _http_attributes(url: str) -> Dict[str, Any]:
+    parts = urlsplit(url)
+    return {"http.request.method": "GET", "server.address": parts.hostname or "", "url.path": parts.path}
+
+
+def _send(s: requests.Session, url: str, **kwargs: Any) -> requests.Response:
+    try:
+        r = s.get(url, **kwargs)
+    except requests.RequestException as e:
+        record_http_error(urlsplit(url).hostname or "", type(e).__name__)
+        raise
+    # ``elapsed`` runs from sending to parsed headers, across any urllib3 retries.
+    observe_http(urlsplit(url).hostname or "", str(r.status_code), r.elapsed.total_seconds())
+    return r
+
+
+def _record_response(sp: Any, r: requests.Response) -> None:
+    sp.set_attribute("http.response.status_code", r.status_code)
+    # urllib3 keeps the Retry object that produced this response; its history is one entry per retry.
+    retries = getattr(r.raw, "retries", None)
+    sp.set_attribute("http.retry_count", len(retries.history) if retries is not None else 0)
+
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+# Characters a number can continue with; only scanned from where raw_decode stopped.
+_NUMBER_TAIL = re.compile(r"[0-9+\-.eE]*")
+# Everything up to the next bracket, with complete strings swallowed whole so
+# brackets inside them are ignored. Stops at a bracket or an unterminated string.
+_SKIP_RUN = re.compile(r'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*')
+
+
+class _JsonFeed:
+    """Incrementally decoded text buffer over a stream of byte chunks."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def more(self, min_size: int = 0) -> bool:
+        if self.eof:
+            return False
+        self.buf = self.buf[self.pos :]
+        self.pos = 0
+        target = max(min_size, len(self.buf) + 1)
+        while len(self.buf) < target:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self.buf += self._decoder.decode(b"", final=True)
+                self.eof = True
+                break
+            self.buf += self._decoder.decode(chunk)
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                return ""
+
+    def expect(self, ch: str) -> None:
+        if self.peek() != ch:
+            raise json.JSONDecodeError(f"Expecting {ch!r}", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Incomplete value: grow the buffer geometrically so large values
+                # are re-scanned O(log n) times rather than once per chunk.
+                if not self.more(min_size=2 * (len(self.buf) - self.pos)):
+                    raise
+                continue
+            at_edge = _NUMBER_TAIL.match(self.buf, end).end() == len(self.buf)
+            if at_edge and not self.eof and not isinstance(obj, (dict, list, str)):
+                # A number or literal touching the buffer edge may continue in the next chunk; so may one
+                # cut off after "." or "e", which raw_decode stops short of.
+                self.more()
+                continue
+            self.pos = end
+            return obj
+
+    def skip(self) -> None:
+        """Step over one value without building Python objects for it."""
+        if self.peek() not in ("{", "["):
+            self.value()
+            return
+        depth = 0
+        while True:
+            self.pos = _SKIP_RUN.match(self.buf, self.pos).end()
+            grow = 0
+            if self.pos < len(self.buf):
+                ch = self.buf[self.pos]
+                if ch != '"':
+                    self.pos += 1
+                    depth += 1 if ch in "[{" else -1
+                    if depth == 0:
+                        return
+                    continue
+                # A string cut off at the buffer edge: keep it and read further.
+                grow = 2 * (len(self.buf) - self.pos)
+            if not self.more(min_size=grow):
+                raise json.JSONDecodeError("Unterminated value", self.buf, self.pos)
+
+
+def iter_json_array(
+    chunks: Iterable[bytes],
+    path: Sequence[str] = (),
+    fields: Optional[Collection[str]] = None,
+) -> Iterator[Any]:
+    """Yield the elements of the JSON array at ``path`` without loading the whole document.
+
+    Values outside ``path`` are scanned over without being decoded, and each
+    array element is trimmed to ``fields`` as soon as it is decoded. A missing
+    key yields nothing, like ``payload.get(...)`` chains would.
+    """
+    feed = _JsonFeed(chunks)
+    for key in path:
+        if feed.peek() != "{":
+            return
+        feed.pos += 1
+        while True:
+            c = feed.peek()
+            if c in ("}", ""):
+                return
+            if c == ",":
+                feed.pos += 1
+                continue
+            k = feed.value()
+            feed.expect(":")
+            if k == key:
+                break
+            feed.skip()
+
+    if feed.peek() != "[":
+        return
+    feed.pos += 1
+    while True:
+        c = feed.peek()
+        if c == "]":
+            return
+        if c == "":
+            raise json.JSONDecodeError("Unterminated array", feed.buf, feed.pos)
+        if c == ",":
+            feed.pos += 1
+            continue
+        item = feed.value()
+        if fields is not None and isinstance(item, dict):
+            item = {k: item[k] for k in fields if k in item}
+        yield item
+
+
+def iter_json_items(
+    url: str,
+    *,
+    path: Sequence[str] = (),
+    fields: Optional[Collection[str]] = None,
+    params: Optional[Dict[str, str]] = None,
+    timeout: int = 20,
+    session: Optional[requests.Session] = None,
+    chunk_size: int = 64 * 1024,
+) -> Iterator[Any]:
+    """Streaming counterpart of ``get_json`` for responses that wrap one big array."""
+    s = session or build_session()
+    with detached_span("HTTP GET", stream=True, **_http_attributes(url)) as sp:
+        with _send(s, url, params=params, timeout=timeout, stream=True) as r:
+            _record_response(sp, r)
+            r.raise_for_status()
+            try:
+                yield from iter_json_array(r.iter_content(chunk_size=chunk_size), path=path, fields=fields)
+            except ValueError as e:
+                raise requests.exceptions.InvalidJSONError(f"Invalid JSON from {url}: {e}") from e
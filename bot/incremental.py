@@ -0,0 +1,151 @@
+"""Snapshot of the last run's candidates, so unchanged deals skip filtering and enrichment.
+
+Entries are keyed by deal ID (regional deals carry the region in their ID) and
+hold the price and savings the deal was evaluated at, whether it was kept,
+and for kept deals the enrichment fields attached to it. A run diffs its
+candidates against the snapshot: new deals, deals whose price or savings moved,
+and entries past ``max_age_seconds`` are evaluated again; the rest reuse their
+stored outcome, and reused rejections are counted under the rule that made
+them. Deals without a final verdict (budget skips, pruned by the top-K bound,
+metadata errors, popularity still pending) have no entry and count as new.
+
+The snapshot is tied to a fingerprint of the filter configuration: changing a
+price limit or a rule discards it, since old verdicts no longer apply.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import Settings
+from .models import Deal
+
+LOGGER = logging.getLogger("coop_deals_bot")
+
+ENRICHED_FIELDS = (
+    "coop_tags",
+    "review_summary",
+    "review_percent",
+    "review_count",
+    "current_players",
+    "steamspy_ccu",
+    "steamspy_owners",
+    "reason",
+)
+
+
+def config_fingerprint(s: Settings, rules: List[Dict[str, Any]]) -> str:
+    """Hash of everything that decides a deal's verdict or its reason line."""
+    doc = {
+        "rules": rules,
+        "max_price": s.max_price,
+        "region_max_prices": s.region_max_prices,
+        "min_discount_percent": s.min_discount_percent,
+        # A set's iteration order follows the per-process hash seed; sort it so the hash is stable across runs.
+        "exclude_keywords": sorted(s.exclude_keywords),
+        "min_review_percent": s.min_review_percent,
+        "min_review_count": s.min_review_count,
+        "price_sweet_spot": s.price_sweet_spot,
+    }
+    return hashlib.sha1(json.dumps(doc, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Verdict:
+    accepted: bool
+    rule: Optional[str] = None
+    builtin: bool = False
+
+
+@dataclass
+class SnapshotDiff:
+    new: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    stale: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return (
+            f"new={len(self.new)} changed={len(self.changed)} stale={len(self.stale)} "
+            f"unchanged={len(self.unchanged)} removed={len(self.removed)}"
+        )
+
+
+class CandidateSnapshot:
+    """Last run's verdicts by deal ID; only what this run evaluated or reused is saved back."""
+
+    def __init__(self, path: Path, fingerprint: str, max_age_seconds: float = 604800.0):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.max_age_seconds = max_age_seconds
+        self._previous: Dict[str, Dict[str, Any]] = {}
+        self._current: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            try:
+                raw = json.loads(path.read_text(encoding="utf-8"))
+                if raw.get("fingerprint") == fingerprint:
+                    self._previous = dict(raw.get("deals") or {})
+                else:
+                    LOGGER.info("Filter configuration changed since the last run; evaluating every candidate")
+            except Exception as e:
+                LOGGER.warning("Failed to load candidate snapshot %s: %s", path, e)
+
+    def __len__(self) -> int:
+        return len(self._current)
+
+    def _status(self, d: Deal, now: float) -> str:
+        entry = self._previous.get(d.deal_id)
+        if entry is None:
+            return "new"
+        if entry["sale_price"] != d.sale_price or entry["savings_pct"] != d.savings_pct:
+            return "changed"
+        if now - entry["evaluated_at"] > self.max_age_seconds:
+            return "stale"
+        return "unchanged"
+
+    def diff(self, candidates: List[Deal]) -> SnapshotDiff:
+        """Compare one region's candidates with the snapshot entries for that region."""
+        now = time.time()
+        out = SnapshotDiff()
+        for d in candidates:
+            getattr(out, self._status(d, now)).append(d.deal_id)
+        regions = {d.region for d in candidates}
+        seen = {d.deal_id for d in candidates}
+        out.removed = [k for k, e in self._previous.items() if e.get("region") in regions and k not in seen]
+        return out
+
+    def reuse(self, d: Deal) -> Optional[Verdict]:
+        """The stored verdict for an unchanged deal (restoring its enrichment if kept), or None to evaluate it."""
+        if self._status(d, time.time()) != "unchanged":
+            return None
+        entry = self._previous[d.deal_id]
+        for name, value in (entry.get("fields") or {}).items():
+            setattr(d, name, value)
+        self._current[d.deal_id] = entry
+        return Verdict(bool(entry["accepted"]), entry.get("rule"), bool(entry.get("builtin")))
+
+    def record(self, d: Deal, accepted: bool, rule: Optional[str] = None, builtin: bool = False) -> None:
+        """Store a final verdict; ``rule`` names the filter that rejected the deal."""
+        self._current[d.deal_id] = {
+            "region": d.region,
+            "sale_price": d.sale_price,
+            "savings_pct": d.savings_pct,
+            "accepted": accepted,
+            "rule": rule,
+            "builtin": builtin,
+            "fields": {name: getattr(d, name) for name in ENRICHED_FIELDS} if accepted else {},
+            "evaluated_at": time.time(),
+        }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        doc = {"fingerprint": self.fingerprint, "deals": self._current}
+        tmp_path.write_text(json.dumps(doc, separators=(",", ":")), encoding="utf-8")
+        tmp_path.replace(self.path)
@@ -1,29 +1,51 @@
 from __future__ import annotations
 
-import json
+import argparse
+import bisect
 import logging
 import re
-from dataclasses import dataclass, field
+import time
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import requests
 
-from .cheapshark import fetch_deals, fetch_stores
-from .config import load_settings
-from .discord_webhook import post_deals
-from .models import Deal
+from . import filters as _filters
+from .budget import RunBudget, StageBudget
+from .cheapshark import StoreIndex, load_store_index
+from .config import Settings, load_settings
+from .coop_index import CoopCatalog
+from .digests import DigestHistory, DigestRecord, embed_hash
+from .discord_webhook import EmbedRenderer, render_digest
+from .fanout import RetryQueue, edit_everywhere, fan_out
+from .filters import POST, PRE, FilterChain, FilterConfigError, compile_filters, load_filter_rules
+from .incremental import CandidateSnapshot, config_fingerprint
+from .metrics import RunMetrics
+from .models import Deal, format_price
+from .popularity import PopularityIndex
+from .profiling import profiled_run, stage_snapshot
+from .prometheus import PREFIX, REGISTRY, record_run, start_metrics_server, write_textfile
+from .regions import RegionPriceCache, fetch_regional_candidates, region_settings
+from .sources import enabled_sources, fetch_all_sources, source_label
+from .state import StateBackend, StateBackendError, build_state_backend
 from .steam import (
+    CATEGORY_TO_TAG,
+    LruTier,
     SteamCoopCache,
-    fetch_coop_metadata,
+    SteamSpyBulk,
+    fetch_app_metadata,
     fetch_current_players,
-    fetch_review_summary,
     fetch_steamspy_stats,
 )
-from .steam_store import fetch_steam_specials
+from .tracing import configure_tracing, span
+from .transport import close_transport, configure_transport
 
 LOGGER = logging.getLogger("coop_deals_bot")
 
+# The review threshold check moved to filters.py; keep the old import path working.
+_passes_review_threshold = _filters._passes_review_threshold
+
 
 def configure_logging(level: str) -> None:
     resolved = getattr(logging, level.upper(), logging.INFO)
@@ -33,65 +55,26 @@ def configure_logging(level: str) -> None:
     )
 
 
-def load_posted_ids(path: Path) -> Set[str]:
-    if not path.exists():
-        return set()
-    try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-        if isinstance(data, dict) and isinstance(data.get("dealIDs"), list):
-            return set(str(x) for x in data["dealIDs"])
-        if isinstance(data, list):
-            return set(str(x) for x in data)
-    except Exception as e:
-        LOGGER.warning("Failed to load posted cache file %s: %s", path, e)
-    return set()
-
-
-def save_posted_ids(path: Path, posted: Set[str]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp_path = path.with_suffix(path.suffix + ".tmp")
-    tmp_path.write_text(json.dumps({"dealIDs": sorted(posted)}, indent=2), encoding="utf-8")
-    tmp_path.replace(path)
-
-
-def _normalize_store_name(name: str) -> str:
-    return " ".join(name.strip().lower().split())
-
-
-def _filter_store_map(stores: Dict[str, dict], s) -> Dict[str, dict]:
-    allowed_ids = set(s.allowed_store_ids)
-    excluded_ids = set(s.excluded_store_ids)
-
-    allowed_names = {_normalize_store_name(n) for n in s.allowed_store_names}
-    excluded_names = {_normalize_store_name(n) for n in s.excluded_store_names}
-
-    selected = stores
-    if allowed_ids or allowed_names:
-        selected = {
-            sid: st
-            for sid, st in selected.items()
-            if sid in allowed_ids
-            or _normalize_store_name(str(st.get("storeName", ""))) in allowed_names
-        }
-
-    if excluded_ids or excluded_names:
-        selected = {
-            sid: st
-            for sid, st in selected.items()
-            if sid not in excluded_ids
-            and _normalize_store_name(str(st.get("storeName", ""))) not in excluded_names
-        }
-
-    return selected
+def _filter_store_map(stores: StoreIndex, s) -> StoreIndex:
+    return stores.select(s.allowed_store_ids, s.allowed_store_names, s.excluded_store_ids, s.excluded_store_names)
 
 
-def _digest_title(mode: str, max_price: float, profile_name: str) -> str:
+def _digest_title(
+    mode: str,
+    max_price: float,
+    profile_name: str,
+    currency: str = "USD",
+    region: str | None = None,
+) -> str:
     prefix = f"[{profile_name}] " if profile_name != "default" else ""
+    if region:
+        prefix += f"[{region.upper()}] "
+    limit = format_price(max_price, currency, decimals=0)
     if mode == "weekend":
-        return f"{prefix}🎉 **Weekend Co-op Picks (Under ${max_price:.0f})**"
+        return f"{prefix}🎉 **Weekend Co-op Picks (Under {limit})**"
     if mode == "budget":
-        return f"{prefix}💸 **Ultra-Budget Co-op Picks (Under ${max_price:.0f})**"
-    return f"{prefix}🎮 **Tonight's Co-op Deals (Under ${max_price:.0f})**"
+        return f"{prefix}💸 **Ultra-Budget Co-op Picks (Under {limit})**"
+    return f"{prefix}🎮 **Tonight's Co-op Deals (Under {limit})**"
 
 
 def _score_deal(d: Deal, sweet_spot: float, was_posted: bool) -> float:
@@ -108,7 +91,7 @@ def _reason_for_deal(d: Deal, sweet_spot: float) -> str:
     if d.savings_pct >= 75:
         reasons.append(f"massive -{d.savings_pct:.0f}% discount")
     if d.sale_price <= sweet_spot:
-        reasons.append(f"in the sweet spot under ${sweet_spot:.2f}")
+        reasons.append(f"in the sweet spot under {format_price(sweet_spot, d.currency)}")
     if d.coop_tags and len(d.coop_tags) > 1:
         reasons.append("supports multiple co-op modes")
     if d.review_summary and d.review_percent and d.review_percent >= 80:
@@ -128,49 +111,75 @@ def _franchise_key(title: str, words: int) -> str | None:
     return " ".join(tokens[:words])
 
 
-def _passes_review_threshold(
-    review_percent: object,
-    review_count: object,
-    min_review_percent: int,
-    min_review_count: int,
-) -> bool:
-    if min_review_percent <= 0 and min_review_count <= 0:
-        return True
-    if not isinstance(review_percent, int) or not isinstance(review_count, int):
-        return False
-    return review_percent >= min_review_percent and review_count >= min_review_count
-
+def _fetch_optional_popularity_stats(
+    appid: str,
+    timeout: float = 20,
+    index: PopularityIndex | None = None,
+    bulk: SteamSpyBulk | None = None,
+    allow_network: bool = True,
+) -> tuple[int | None, int | None, str | None] | None:
+    """Popularity from the local SteamSpy snapshot, then the run's bulk listing, then per-app calls.
+
+    The live player count always takes a per-app call, made only while ``allow_network`` is on.
+    Returns None when only per-app calls could answer and ``allow_network`` is off; the bulk
+    listing is not downloaded then either.
+    """
+    hit = index.get(appid) if index is not None else None
+    if hit is None and bulk is not None and (bulk.loaded or allow_network):
+        hit = bulk.get(appid)
+    if hit is None and not allow_network:
+        return None
 
-def _fetch_optional_popularity_stats(appid: str) -> tuple[int | None, int | None, str | None]:
     current_players = None
+    if allow_network:
+        try:
+            current_players = fetch_current_players(appid, timeout=timeout)
+        except requests.RequestException as e:
+            LOGGER.warning("Steam current players check failed for appid=%s: %s", appid, e)
+    if hit is not None:
+        return current_players, hit[0], hit[1]
+
     steamspy_ccu = None
     steamspy_owners = None
-
-    try:
-        current_players = fetch_current_players(appid)
-    except requests.RequestException as e:
-        LOGGER.warning("Steam current players check failed for appid=%s: %s", appid, e)
-
     try:
-        steamspy_ccu, steamspy_owners = fetch_steamspy_stats(appid)
+        steamspy_ccu, steamspy_owners = fetch_steamspy_stats(appid, timeout=timeout)
     except requests.RequestException as e:
         LOGGER.warning("SteamSpy stats check failed for appid=%s: %s", appid, e)
 
     return current_players, steamspy_ccu, steamspy_owners
 
 
-def _build_metrics_summary(metrics: "RunMetrics") -> str:
-    cheapshark_count = metrics.source_counts.get("cheapshark", 0)
-    steam_direct_count = metrics.source_counts.get("steam_direct", 0)
+def _with_popularity(
+    cached: Dict[str, Any], current_players: int | None, steamspy_ccu: int | None, steamspy_owners: str | None
+) -> Dict[str, Any]:
+    record = dict(cached)
+    record.pop("popularity_pending", None)
+    record.update(current_players=current_players, steamspy_ccu=steamspy_ccu, steamspy_owners=steamspy_owners)
+    return record
+
+
+def _try_claim(state: StateBackend, deal_id: str) -> bool:
+    try:
+        return state.claim_deal(deal_id)
+    except StateBackendError as e:
+        # Without a confirmed claim another runner may post the same deal, so skip it.
+        LOGGER.warning("Failed to claim deal %s: %s", deal_id, e)
+        return False
+
+
+def _popularity_budget_available(enrichment: StageBudget) -> bool:
+    # Popularity stats are optional garnish: drop them once half the enrichment
+    # budget is gone so the remaining time goes to co-op/review checks.
+    return enrichment.fraction_left() > 0.5
+
+
+def _build_metrics_summary(metrics: RunMetrics) -> str:
+    per_source = ", ".join(f"{source_label(name)}: {count}" for name, count in metrics.source_counts.items())
 
     return "\n".join(
         [
             "📊 Deal run summary",
-            (
-                "• Fetched: "
-                f"{metrics.fetched_total} "
-                f"(CheapShark: {cheapshark_count}, Steam Direct: {steam_direct_count})"
-            ),
+            f"• Fetched: {metrics.fetched_total} ({per_source})",
             f"• Posted: {metrics.posted_count}",
             (
                 "• Filtered: "
@@ -182,36 +191,87 @@ def _build_metrics_summary(metrics: "RunMetrics") -> str:
                 f"reviews={metrics.filtered_reviews}, "
                 f"already_posted={metrics.filtered_already_posted}, "
                 f"dup_appid={metrics.filtered_duplicate_appid}, "
-                f"dup_franchise={metrics.filtered_duplicate_franchise}"
+                f"dup_franchise={metrics.filtered_duplicate_franchise}, "
+                f"claimed_elsewhere={metrics.filtered_claimed_elsewhere}"
+                + "".join(f", {name}={count}" for name, count in metrics.filter_rejections.items())
             ),
             f"• Metadata errors: {metrics.metadata_errors}",
+            (
+                "• Budget skips: "
+                f"enrichment={metrics.skipped_enrichment}, "
+                f"popularity={metrics.skipped_popularity}, "
+                f"pruned={metrics.skipped_bound}"
+                + (f" (exhausted: {', '.join(metrics.exhausted_stages)})" if metrics.exhausted_stages else "")
+            ),
+            (
+                "• Since last run: "
+                f"new={metrics.candidates_new}, "
+                f"changed={metrics.candidates_changed}, "
+                f"removed={metrics.candidates_removed}, "
+                f"reused={metrics.candidates_reused}"
+            ),
         ]
     )
 
 
-@dataclass
-class RunMetrics:
-    fetched_total: int = 0
-    filtered_price: int = 0
-    filtered_discount: int = 0
-    filtered_keyword: int = 0
-    filtered_missing_appid: int = 0
-    filtered_non_coop: int = 0
-    filtered_reviews: int = 0
-    filtered_already_posted: int = 0
-    filtered_duplicate_appid: int = 0
-    filtered_duplicate_franchise: int = 0
-    metadata_errors: int = 0
-    posted_count: int = 0
-    source_counts: Dict[str, int] = field(default_factory=dict)
-
-
-def main() -> None:
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Find co-op game deals and post them to Discord.")
+    parser.add_argument(
+        "--profile", metavar="DIR", type=Path, help="write cProfile and per-stage tracemalloc artifacts to DIR"
+    )
+    args = parser.parse_args(argv)
     s = load_settings()
+    if args.profile is not None:
+        s = replace(s, profile_dir=args.profile)
     configure_logging(s.log_level)
+    tracer = configure_tracing(s.trace_file, s.otlp_endpoint)
+    configure_transport(s.http_record_file, s.http_replay_file, s.replay_latency_scale, s.replay_scale)
+    server = start_metrics_server(s.metrics_port) if s.metrics_port else None
+    try:
+        while True:
+            try:
+                with profiled_run(s.profile_dir, s.profile_min_run_seconds):
+                    with span("run", profile=s.profile_name, digest_mode=s.digest_mode):
+                        _run(s)
+            except Exception:
+                if s.run_interval_seconds <= 0:
+                    raise
+                LOGGER.exception("Run failed; next attempt in %.0fs", s.run_interval_seconds)
+            finally:
+                _export_metrics(s)
+            if s.run_interval_seconds <= 0:
+                break
+            tracer.flush()
+            time.sleep(s.run_interval_seconds)
+    finally:
+        if server is not None:
+            server.shutdown()
+        close_transport()
+        tracer.shutdown()
+
+
+def _export_metrics(s: Settings) -> None:
+    if s.metrics_textfile is None:
+        return
+    try:
+        write_textfile(s.metrics_textfile)
+    except OSError as e:
+        LOGGER.warning("Failed to write metrics textfile %s: %s", s.metrics_textfile, e)
+
 
-    if not s.discord_webhook_url:
-        LOGGER.warning("Missing DISCORD_WEBHOOK_URL. Set it as a GitHub Secret. Skipping run.")
+def _run(s: Settings) -> None:
+    metrics = RunMetrics()
+    budget = RunBudget(s.run_deadline_seconds)
+    # Runs that stop early (no webhook, store fetch failed, ...) still count in the exported totals.
+    try:
+        _run_once(s, metrics, budget)
+    finally:
+        record_run(metrics, budget.elapsed())
+
+
+def _run_once(s: Settings, metrics: RunMetrics, budget: RunBudget) -> None:
+    if not s.webhook_destinations:
+        LOGGER.warning("Missing DISCORD_WEBHOOK_URL or DISCORD_DESTINATIONS. Set it as a GitHub Secret. Skipping run.")
         return
 
     LOGGER.info("=== Co-op Deals Bot ===")
@@ -226,10 +286,19 @@ def main() -> None:
         s.min_review_count,
     )
 
-    metrics = RunMetrics()
+    try:
+        rules = load_filter_rules(s.filters_file, s.profile_name)
+        # One chain per region: built-in price rules depend on the regional limits.
+        chains = {cc: compile_filters(region_settings(s, cc), rules) for cc in dict.fromkeys(["us", *s.regions])}
+    except FilterConfigError as e:
+        LOGGER.error("Invalid filter configuration: %s. Skipping run.", e)
+        return
+
+    ingestion = budget.stage("ingestion", s.ingestion_budget_seconds, reserve=s.posting_reserve_seconds)
 
     try:
-        stores = fetch_stores()
+        with span("ingestion.stores"):
+            stores = load_store_index(s.store_cache_file, s.store_cache_ttl_seconds, timeout=ingestion.timeout(20))
     except requests.RequestException as e:
         LOGGER.warning("Failed to fetch store catalog from CheapShark: %s", e)
         return
@@ -239,96 +308,236 @@ def main() -> None:
         LOGGER.info("No stores matched current allow/exclude filters. Nothing posted.")
         return
 
-    posted = load_posted_ids(s.posted_cache_file)
-    steam_cache = SteamCoopCache(s.steam_cache_file)
+    snapshot = None
+    if s.incremental_runs:
+        fingerprint = config_fingerprint(s, rules)
+        snapshot = CandidateSnapshot(s.candidate_snapshot_file, fingerprint, s.incremental_max_age_seconds)
 
     try:
-        cheapshark_candidates = fetch_deals(
-            upper_price=s.max_price,
-            steamworks_only=s.only_steam_redeemable,
-            allowed_store_ids=list(filtered_stores.keys()),
-            store_map=filtered_stores,
-        )
-    except requests.RequestException as e:
-        LOGGER.warning("Failed to fetch deals from CheapShark: %s", e)
-        cheapshark_candidates = []
+        state = build_state_backend(s)
+    except StateBackendError as e:
+        LOGGER.error("Shared state backend unavailable: %s. Skipping run to avoid double-posting.", e)
+        return
+    # One RunMetrics per region, so each digest's summary covers only its own region; the run total is their sum.
+    by_region = {cc: RunMetrics() for cc in dict.fromkeys(["us", *s.regions])}
+    try:
+        _run_pipeline(s, by_region, budget, ingestion, filtered_stores, state, chains, snapshot)
+    finally:
+        state.close()
+        for region_metrics in by_region.values():
+            metrics.merge(region_metrics)
+    LOGGER.info("Run metrics: %s", metrics)
 
-    if s.include_steam_direct_specials:
-        try:
-            steam_direct_candidates = fetch_steam_specials(s.max_price)
-        except requests.RequestException as e:
-            LOGGER.warning("Failed to fetch specials from Steam Store API: %s", e)
-            steam_direct_candidates = []
-    else:
-        steam_direct_candidates = []
 
-    metrics.source_counts["cheapshark"] = len(cheapshark_candidates)
-    metrics.source_counts["steam_direct"] = len(steam_direct_candidates)
+@dataclass
+class EnrichmentContext:
+    """Caches, budget and counters shared by every enrichment pass of one run."""
 
-    candidates = cheapshark_candidates + steam_direct_candidates
-    metrics.fetched_total = len(candidates)
-    enriched: List[Deal] = []
+    steam_cache: SteamCoopCache
+    budget: StageBudget
+    metrics: RunMetrics
+    popularity: Optional[SteamSpyBulk]
+    popularity_index: PopularityIndex
+    coop_index: CoopCatalog
+    posted: Set[str] = field(default_factory=set)
+    snapshot: Optional[CandidateSnapshot] = None
 
-    for d in candidates:
-        if d.sale_price >= s.max_price:
-            metrics.filtered_price += 1
-            continue
 
-        if d.savings_pct < s.min_discount_percent:
-            metrics.filtered_discount += 1
-            continue
+def _score_upper_bound(d: Deal, sweet_spot: float, was_posted: bool, known_tags: Optional[List[str]] = None) -> float:
+    """``_score_deal`` before enrichment, with co-op tags and reviews at their best possible values.
+
+    ``known_tags`` (from the co-op index) pins the tag bonus to the real one.
+    """
+    tags = known_tags if known_tags is not None else list(CATEGORY_TO_TAG.values())
+    return _score_deal(replace(d, coop_tags=tags, review_percent=100), sweet_spot, was_posted)
 
-        if any(k in d.title.lower() for k in s.exclude_keywords):
-            metrics.filtered_keyword += 1
-            continue
 
-        if not d.steam_app_id:
-            metrics.filtered_missing_appid += 1
+def _kth_selectable_score(
+    ranked: List[Tuple[float, int, Deal]], s: Settings, posted: Set[str], k: int
+) -> Optional[float]:
+    """Score of the ``k``-th deal ``_select_deals`` would pick from ``ranked`` (claims aside), or None."""
+    seen_appids: Set[str] = set()
+    seen_franchises: Set[str] = set()
+    picked = 0
+    for score, _, d in ranked:
+        if d.deal_id in posted or (d.steam_app_id and d.steam_app_id in seen_appids):
+            continue
+        fk = _franchise_key(d.title, s.franchise_dedupe_words) if s.franchise_dedupe_enabled else None
+        if fk and fk in seen_franchises:
+            continue
+        picked += 1
+        if picked >= k:
+            return score
+        if d.steam_app_id:
+            seen_appids.add(d.steam_app_id)
+        if fk:
+            seen_franchises.add(fk)
+    return None
+
+
+def _enrich_candidates(
+    candidates: List[Deal],
+    s: Settings,
+    chain: FilterChain,
+    ctx: EnrichmentContext,
+    select_limit: Optional[int] = None,
+) -> List[Deal]:
+    """Enrich pre-filtered candidates in order of their upper-bound score.
+
+    With ``select_limit`` (K), this is branch-and-bound over ``_score_deal``:
+    once the K-th deal selection would pick scores higher than the best bound
+    still queued, no remaining deal can make the cut and the rest are skipped.
+    Deals unchanged since the last run's snapshot keep their verdict and
+    enrichment without being filtered or enriched again.
+    Returns the enriched deals in arrival order.
+    """
+    metrics = ctx.metrics
+    queue: List[Tuple[float, int, Deal, Optional[Tuple[bool, List[str]]]]] = []
+    ranked: List[Tuple[float, int, Deal]] = []
+    for pos, d in enumerate(candidates):
+        verdict = ctx.snapshot.reuse(d) if ctx.snapshot is not None else None
+        if verdict is not None:
+            metrics.candidates_reused += 1
+            if verdict.accepted:
+                ranked.append((_score_deal(d, s.price_sweet_spot, d.deal_id in ctx.posted), pos, d))
+            elif verdict.rule:
+                # Keep rejection counts comparable with full runs.
+                metrics.record_rejection(verdict.rule, builtin=verdict.builtin)
             continue
+        rule = chain.rejection(PRE, d, None, metrics)
+        if rule is not None:
+            _remember(ctx, d, False, rule.name, rule.builtin)
+            continue
+        known = ctx.coop_index.lookup(d.steam_app_id)
+        if known is not None and not known[0]:
+            # Known single-player: rejected from the local index, no cache or network lookup.
+            metrics.record_rejection("non_coop", builtin=True)
+            _remember(ctx, d, False, "non_coop", True)
+            continue
+        bound = _score_upper_bound(d, s.price_sweet_spot, d.deal_id in ctx.posted, known[1] if known else None)
+        queue.append((bound, pos, d, known))
+    # Stable: equal bounds keep arrival order, like the final ranking does.
+    queue.sort(key=lambda e: e[0], reverse=True)
+
+    # Reused deals already have their final score, so they can settle the top K before any lookup.
+    ranked.sort(key=lambda e: (-e[0], e[1]))
+    kth = _kth_selectable_score(ranked, s, ctx.posted, select_limit) if select_limit else None
+    for i, (bound, pos, d, known) in enumerate(queue):
+        if kth is not None and kth > bound:
+            metrics.skipped_bound += len(queue) - i
+            LOGGER.info("Enrichment stopped after %d of %d candidates: top %d settled", i, len(queue), select_limit)
+            break
+        started = time.perf_counter()
+        with span("enrichment.deal", appid=d.steam_app_id) as sp:
+            try:
+                if _enrich_one(d, s, chain, ctx, known, sp):
+                    score = _score_deal(d, s.price_sweet_spot, d.deal_id in ctx.posted)
+                    bisect.insort(ranked, (score, pos, d), key=lambda e: (-e[0], e[1]))
+                    if select_limit:
+                        kth = _kth_selectable_score(ranked, s, ctx.posted, select_limit)
+            except requests.RequestException as e:
+                metrics.metadata_errors += 1
+                sp.set_error(e)
+                LOGGER.warning("Steam metadata check failed for %s (appid=%s): %s", d.title, d.steam_app_id, e)
+        REGISTRY.observe(
+            f"{PREFIX}_enrichment_duration_seconds", time.perf_counter() - started, "Per-deal enrichment latency."
+        )
 
-        cached = steam_cache.get(d.steam_app_id)
-        try:
-            if cached is None:
-                is_coop, tags = fetch_coop_metadata(d.steam_app_id)
-                review_summary, review_pct, review_count = fetch_review_summary(d.steam_app_id)
-                current_players, steamspy_ccu, steamspy_owners = _fetch_optional_popularity_stats(d.steam_app_id)
-                cached = {
-                    "is_coop": is_coop,
-                    "coop_tags": tags,
-                    "review_summary": review_summary,
-                    "review_percent": review_pct,
-                    "review_count": review_count,
-                    "current_players": current_players,
-                    "steamspy_ccu": steamspy_ccu,
-                    "steamspy_owners": steamspy_owners,
-                }
-                steam_cache.set(d.steam_app_id, cached)
-
-            if not bool(cached.get("is_coop")):
-                metrics.filtered_non_coop += 1
-                continue
+    return [d for _, _, d in sorted(ranked, key=lambda e: e[1])]
 
-            review_pct = cached.get("review_percent")
-            review_count = cached.get("review_count")
-            if not _passes_review_threshold(review_pct, review_count, s.min_review_percent, s.min_review_count):
-                metrics.filtered_reviews += 1
-                continue
 
-            d.coop_tags = list(cached.get("coop_tags") or [])
-            d.review_summary = cached.get("review_summary")
-            d.review_percent = review_pct
-            d.review_count = review_count
-            d.current_players = cached.get("current_players")
-            d.steamspy_ccu = cached.get("steamspy_ccu")
-            d.steamspy_owners = cached.get("steamspy_owners")
-            d.reason = _reason_for_deal(d, s.price_sweet_spot)
-            enriched.append(d)
-        except requests.RequestException as e:
-            metrics.metadata_errors += 1
-            LOGGER.warning("Steam metadata check failed for %s (appid=%s): %s", d.title, d.steam_app_id, e)
+def _remember(
+    ctx: EnrichmentContext, d: Deal, accepted: bool, rule: Optional[str] = None, builtin: bool = False
+) -> None:
+    if ctx.snapshot is not None:
+        ctx.snapshot.record(d, accepted, rule, builtin)
 
-    steam_cache.save()
 
+def _diff_candidates(ctx: EnrichmentContext, candidates: List[Deal], region: str) -> None:
+    if ctx.snapshot is None or not candidates:
+        return
+    diff = ctx.snapshot.diff(candidates)
+    ctx.metrics.candidates_new += len(diff.new)
+    ctx.metrics.candidates_changed += len(diff.changed) + len(diff.stale)
+    ctx.metrics.candidates_removed += len(diff.removed)
+    LOGGER.info("Candidates since last run (%s): %s", region.upper(), diff)
+
+
+def _enrich_one(
+    d: Deal,
+    s: Settings,
+    chain: FilterChain,
+    ctx: EnrichmentContext,
+    known: Optional[Tuple[bool, List[str]]],
+    sp: Any,
+) -> bool:
+    """Attach Steam metadata to ``d``; False when it is skipped or rejected."""
+    enrichment, metrics, steam_cache = ctx.budget, ctx.metrics, ctx.steam_cache
+    cached = steam_cache.get(d.steam_app_id)
+    sp.set_attribute("cache.hit", cached is not None)
+    REGISTRY.inc(
+        f"{PREFIX}_steam_cache_lookups_total",
+        1,
+        "Steam metadata cache lookups.",
+        result="hit" if cached is not None else "miss",
+    )
+    if cached is None:
+        if enrichment.expired():
+            metrics.skipped_enrichment += 1
+            metrics.mark_exhausted(enrichment.name)
+            ctx.coop_index.mark_pending(d.steam_app_id)
+            return False
+
+        cached = fetch_app_metadata(d.steam_app_id, timeout=enrichment.timeout(20), known=known)
+        steam_cache.set(d.steam_app_id, cached)
+    if known is None:
+        ctx.coop_index.record(d.steam_app_id, bool(cached.get("is_coop")), cached.get("coop_tags") or [])
+
+    if cached.get("popularity_pending") and cached.get("is_coop"):
+        stats = _fetch_optional_popularity_stats(
+            d.steam_app_id,
+            timeout=enrichment.timeout(20),
+            index=ctx.popularity_index,
+            bulk=ctx.popularity,
+            allow_network=_popularity_budget_available(enrichment),
+        )
+        if stats is not None:
+            cached = _with_popularity(cached, *stats)
+            steam_cache.set(d.steam_app_id, cached)
+        else:
+            metrics.skipped_popularity += 1
+            metrics.mark_exhausted("popularity")
+
+    # A verdict reached while popularity is still pending depends on the budget, not the deal; don't reuse it.
+    settled = not cached.get("popularity_pending")
+    rule = chain.rejection(POST, d, cached, metrics)
+    if rule is not None:
+        sp.set_attribute("rejected", True)
+        if settled:
+            _remember(ctx, d, False, rule.name, rule.builtin)
+        return False
+
+    d.coop_tags = list(cached.get("coop_tags") or [])
+    d.review_summary = cached.get("review_summary")
+    d.review_percent = cached.get("review_percent")
+    d.review_count = cached.get("review_count")
+    d.current_players = cached.get("current_players")
+    d.steamspy_ccu = cached.get("steamspy_ccu")
+    d.steamspy_owners = cached.get("steamspy_owners")
+    d.reason = _reason_for_deal(d, s.price_sweet_spot)
+    if settled:
+        _remember(ctx, d, True)
+    return True
+
+
+def _select_deals(
+    s: Settings,
+    enriched: List[Deal],
+    posted: Set[str],
+    state: StateBackend,
+    metrics: RunMetrics,
+) -> List[Deal]:
+    """Rank ``enriched`` and pick up to ``max_posts_per_run`` deals, claiming each one picked."""
     ranked = sorted(
         enriched,
         key=lambda d: _score_deal(d, s.price_sweet_spot, d.deal_id in posted),
@@ -352,6 +561,9 @@ def main() -> None:
                 continue
         else:
             fk = None
+        if not _try_claim(state, d.deal_id):
+            metrics.filtered_claimed_elsewhere += 1
+            continue
 
         selected.append(d)
         if d.steam_app_id:
@@ -361,37 +573,249 @@ def main() -> None:
 
         if len(selected) >= s.max_posts_per_run:
             break
+    return selected
+
+
+def _update_previous_digest(
+    s: Settings, prev: DigestRecord, current: Dict[str, Deal], renderer: EmbedRenderer
+) -> Optional[str]:
+    """Bring ``prev`` up to date with ``current`` deals; "unchanged", "edited", or None if it cannot be edited.
+
+    Only embeds whose content hash changed are re-rendered into the message;
+    deals no longer listed keep the embed they were posted with.
+    """
+    embeds = [
+        renderer.render(current[deal_id], s.embed_color) if deal_id in current else prev.embeds[i]
+        for i, deal_id in enumerate(prev.deal_ids)
+    ]
+    changed = prev.changed_embeds(embeds)
+    if not changed:
+        return "unchanged"
+    too_old = time.time() - prev.posted_at > s.digest_edit_max_age_seconds
+    if not prev.message_ids or too_old:
+        return None
 
+    edited = list(prev.embeds)
+    for i in changed:
+        edited[i] = embeds[i]
+    with span("discord.edit", embeds=len(changed)):
+        if not edit_everywhere(s.webhook_destinations, prev.message_ids, edited):
+            return None
+    prev.embeds = edited
+    prev.embed_hashes = [embed_hash(e) for e in edited]
+    prev.prices = [current[d].sale_price if d in current else p for d, p in zip(prev.deal_ids, prev.prices)]
+    LOGGER.info("Updated %d of %d embed(s) in the previous digest in place", len(changed), len(edited))
+    return "edited"
+
+
+def _select_and_post(
+    s: Settings,
+    region: str,
+    enriched: List[Deal],
+    posted: Set[str],
+    state: StateBackend,
+    metrics: RunMetrics,
+    history: DigestHistory,
+    queue: RetryQueue,
+    renderer: Optional[EmbedRenderer] = None,
+) -> None:
+    """Select, render and deliver one region's digest; pass the run's ``renderer`` to share its fragment cache."""
+    selected = _select_deals(s, enriched, posted, state, metrics)
+    stage_snapshot(f"ranking-{region}")
+    renderer = renderer or EmbedRenderer()
+    # A Discord message holds at most 10 embeds; history records only the deals actually shown.
+    shown = selected[:10]
+
+    # Same deals as the last digest (or nothing new at all): refresh that message instead of posting.
+    prev = history.latest(s.profile_name, region)
+    if prev is not None and (not selected or [d.deal_id for d in shown] == prev.deal_ids):
+        current = {d.deal_id: d for d in (selected or enriched) if d.deal_id in prev.deal_ids}
+        try:
+            outcome = _update_previous_digest(s, prev, current, renderer)
+        except requests.RequestException as e:
+            LOGGER.warning("Failed to edit the previous digest: %s", e)
+            outcome = None
+        if outcome and selected:
+            LOGGER.info("Selection matches the previous digest (%s); not posting it again", outcome)
+            _mark_posted(state, selected)
+            return
+
+    region_tag = region if s.regions != ["us"] else None
     if not selected:
-        LOGGER.info("No new co-op deals found. Nothing posted.")
-        LOGGER.info("Run metrics: %s", metrics)
+        LOGGER.info("No new co-op deals found%s. Nothing posted.", f" for {region.upper()}" if region_tag else "")
         return
 
-    role_id = s.discord_role_id if (s.ping_role_on_post and s.discord_role_id) else None
-    metrics.posted_count = len(selected)
+    metrics.posted_count += len(selected)
+    content, embeds = render_digest(
+        shown,
+        s.embed_color,
+        _digest_title(s.digest_mode, s.max_price, s.profile_name, currency=selected[0].currency, region=region_tag),
+        _build_metrics_summary(metrics),
+        renderer,
+    )
+    with span("discord.fan_out", deals=len(selected), destinations=len(s.webhook_destinations)):
+        deliveries = fan_out(s.webhook_destinations, content, embeds)
 
-    try:
-        post_deals(
-            webhook_url=s.discord_webhook_url,
-            username=s.discord_webhook_username,
-            deals=selected,
-            embed_color=s.embed_color,
-            message_title=_digest_title(s.digest_mode, s.max_price, s.profile_name),
-            role_id_to_ping=role_id,
-            metrics_summary=_build_metrics_summary(metrics),
-        )
-    except requests.RequestException as e:
-        LOGGER.warning("Failed to post deals to Discord webhook: %s", e)
+    if not any(d.ok for d in deliveries):
+        LOGGER.warning("Failed to post deals to any Discord webhook: %s", deliveries[0].error if deliveries else "none")
+        metrics.posted_count -= len(selected)
+        try:
+            for d in selected:
+                state.release_deal(d.deal_id)
+        except StateBackendError as release_error:
+            LOGGER.warning("Failed to release deal claims (they will expire): %s", release_error)
         return
 
-    LOGGER.info("Posted %d deal(s) to Discord", len(selected))
+    record = DigestRecord(
+        region=region,
+        message_ids={d.destination.name: d.message_id for d in deliveries if d.ok and d.message_id},
+        deal_ids=[d.deal_id for d in shown],
+        prices=[d.sale_price for d in shown],
+        embeds=embeds,
+    )
+    history.add(s.profile_name, record)
+    # At least one destination has the digest, so the deals count as posted; the rest retry next run.
+    for d in deliveries:
+        if not d.ok:
+            LOGGER.warning("Failed to post deals to webhook %s, queued for retry: %s", d.destination.name, d.error)
+            queue.push(d.destination.name, d.payload, DigestHistory.ref_for(s.profile_name, record))
+    LOGGER.info(
+        "Posted %d deal(s) to %d of %d Discord webhook(s)",
+        len(selected),
+        sum(d.ok for d in deliveries),
+        len(deliveries),
+    )
+    _mark_posted(state, selected)
 
-    for d in selected:
-        posted.add(d.deal_id)
 
-    save_posted_ids(s.posted_cache_file, posted)
+def _mark_posted(state: StateBackend, selected: List[Deal]) -> None:
+    try:
+        state.mark_posted(d.deal_id for d in selected)
+    except StateBackendError as e:
+        LOGGER.warning("Failed to record posted deals (claims still block reposts until they expire): %s", e)
+        return
     LOGGER.info("Cache updated")
-    LOGGER.info("Run metrics: %s", metrics)
+
+
+def _report_hot_tier(hot: LruTier) -> None:
+    LOGGER.info(
+        "Steam metadata hot tier: %d entries, %.1f KB, hit ratio %.2f, %d eviction(s)",
+        len(hot),
+        hot.bytes / 1024,
+        hot.hit_ratio(),
+        hot.evictions,
+    )
+    REGISTRY.set(f"{PREFIX}_steam_cache_hot_entries", len(hot), "Decoded records in the Steam metadata LRU tier.")
+    REGISTRY.set(f"{PREFIX}_steam_cache_hot_bytes", hot.bytes, "Serialized size of the Steam metadata LRU tier.")
+    REGISTRY.set(f"{PREFIX}_steam_cache_hot_hit_ratio", hot.hit_ratio(), "LRU tier hits over lookups, last run.")
+    REGISTRY.inc(f"{PREFIX}_steam_cache_evictions_total", hot.evictions, "Records evicted from the LRU tier.")
+
+
+def _run_pipeline(
+    s: Settings,
+    by_region: Dict[str, RunMetrics],
+    budget: RunBudget,
+    ingestion: StageBudget,
+    filtered_stores: StoreIndex,
+    state: StateBackend,
+    chains: Dict[str, FilterChain],
+    snapshot: Optional[CandidateSnapshot] = None,
+) -> None:
+    try:
+        posted = state.posted_ids()
+    except StateBackendError as e:
+        LOGGER.error("Shared state backend unavailable: %s. Skipping run to avoid double-posting.", e)
+        return
+    steam_cache = SteamCoopCache(
+        s.steam_cache_file, shared=state, max_entries=s.steam_cache_max_entries, max_bytes=s.steam_cache_max_bytes
+    )
+
+    with span("ingestion.sources") as sp:
+        candidates = fetch_all_sources(
+            enabled_sources(s), s, filtered_stores, by_region["us"], budget_s=ingestion.remaining()
+        )
+        sp.set_attribute("deals", len(candidates))
+    by_region["us"].fetched_total = len(candidates)
+    stage_snapshot("ingestion")
+    enrichment = budget.stage("enrichment", s.enrichment_budget_seconds, reserve=s.posting_reserve_seconds)
+    ctx = EnrichmentContext(
+        steam_cache=steam_cache,
+        budget=enrichment,
+        metrics=by_region["us"],
+        popularity=SteamSpyBulk(budget=enrichment),
+        popularity_index=PopularityIndex(s.popularity_index_file, s.popularity_max_age_seconds),
+        coop_index=CoopCatalog(s.coop_index_file),
+        posted=posted,
+        snapshot=snapshot,
+    )
+    extra_regions = [cc for cc in s.regions if cc != "us"]
+    _diff_candidates(ctx, candidates, "us")
+    with span("enrichment", region="us", candidates=len(candidates)) as sp:
+        # Other regions are seeded from every enriched US deal, so only prune when there are none.
+        us_limit = None if extra_regions else s.max_posts_per_run
+        enriched_by_region = {"us": _enrich_candidates(candidates, s, chains["us"], ctx, select_limit=us_limit)}
+        sp.set_attribute("enriched", len(enriched_by_region["us"]))
+
+    # Other regions reuse the region-independent metadata already in steam_cache;
+    # they only add a specials call and batched price lookups each.
+    if extra_regions:
+        price_cache = RegionPriceCache(s.price_cache_file, s.price_cache_ttl_seconds)
+        with span("ingestion.regions", regions=",".join(extra_regions)):
+            regional = fetch_regional_candidates(
+                extra_regions,
+                s,
+                enriched_by_region["us"],
+                price_cache,
+                by_region,
+                timeout=enrichment.timeout(20),
+            )
+        price_cache.save()
+        REGISTRY.set(f"{PREFIX}_cache_entries", len(price_cache), "Entries per local cache.", cache="region_price")
+        for cc, deals in regional.items():
+            by_region[cc].fetched_total = len(deals)
+            ctx.metrics = by_region[cc]
+            rs = region_settings(s, cc)
+            _diff_candidates(ctx, deals, cc)
+            with span("enrichment", region=cc, candidates=len(deals)) as sp:
+                limit = rs.max_posts_per_run
+                enriched_by_region[cc] = _enrich_candidates(deals, rs, chains[cc], ctx, select_limit=limit)
+                sp.set_attribute("enriched", len(enriched_by_region[cc]))
+
+    steam_cache.save()
+    if ctx.coop_index.dirty:
+        ctx.coop_index.save()
+    if snapshot is not None:
+        snapshot.save()
+    REGISTRY.set(f"{PREFIX}_cache_entries", len(steam_cache), "Entries per local cache.", cache="steam_coop")
+    _report_hot_tier(steam_cache.hot)
+    REGISTRY.set(f"{PREFIX}_cache_entries", len(ctx.coop_index), "Entries per local cache.", cache="coop_index")
+    REGISTRY.set(f"{PREFIX}_cache_entries", len(posted), "Entries per local cache.", cache="posted_ids")
+    REGISTRY.set(
+        f"{PREFIX}_cache_entries", len(ctx.popularity_index), "Entries per local cache.", cache="steamspy_snapshot"
+    )
+    stage_snapshot("enrichment")
+
+    history = DigestHistory(s.digest_history_file, s.digest_history_size)
+    queue = RetryQueue(s.webhook_queue_file, s.webhook_retry_max_age_seconds)
+    queued = len(queue)
+    if queued:
+        with span("discord.retry_queue", queued=queued):
+            redelivered = queue.drain(s.webhook_destinations)
+        LOGGER.info("Resent %d of %d queued digest(s)", len(redelivered), queued)
+        # Late deliveries join their digest's message IDs so in-place edits reach those webhooks too.
+        for r in redelivered:
+            if r.digest and r.message_id:
+                history.attach(r.digest, r.destination, r.message_id)
+    # One renderer per run: a deal shown in several regional digests (or refreshed in place) renders once.
+    renderer = EmbedRenderer()
+    for cc in s.regions:
+        with span("select_and_post", region=cc):
+            rs = region_settings(s, cc)
+            enriched = enriched_by_region.get(cc, [])
+            _select_and_post(rs, cc, enriched, posted, state, by_region[cc], history, queue, renderer)
+        stage_snapshot(f"post-{cc}")
+    history.save()
+    queue.save(s.webhook_destinations)
 
 
 if __name__ == "__main__":
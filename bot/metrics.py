@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field, fields
+from typing import Dict, List
+
+BUILTIN_REJECTION_COUNTERS = {
+    "price": "filtered_price",
+    "discount": "filtered_discount",
+    "keyword": "filtered_keyword",
+    "missing_appid": "filtered_missing_appid",
+    "non_coop": "filtered_non_coop",
+    "reviews": "filtered_reviews",
+}
+
+
+@dataclass
+class RunMetrics:
+    fetched_total: int = 0
+    filtered_price: int = 0
+    filtered_discount: int = 0
+    filtered_keyword: int = 0
+    filtered_missing_appid: int = 0
+    filtered_non_coop: int = 0
+    filtered_reviews: int = 0
+    filtered_already_posted: int = 0
+    filtered_duplicate_appid: int = 0
+    filtered_duplicate_franchise: int = 0
+    filtered_claimed_elsewhere: int = 0
+    metadata_errors: int = 0
+    posted_count: int = 0
+    source_counts: Dict[str, int] = field(default_factory=dict)
+    source_latency_ms: Dict[str, float] = field(default_factory=dict)
+    source_errors: Dict[str, str] = field(default_factory=dict)
+    filter_rejections: Dict[str, int] = field(default_factory=dict)
+    skipped_enrichment: int = 0
+    skipped_popularity: int = 0
+    skipped_bound: int = 0
+    candidates_new: int = 0
+    candidates_changed: int = 0
+    candidates_removed: int = 0
+    candidates_reused: int = 0
+    exhausted_stages: List[str] = field(default_factory=list)
+
+    def record_source(self, label: str, count: int, elapsed_s: float, error: str | None = None) -> None:
+        self.source_counts[label] = count
+        self.source_latency_ms[label] = round(elapsed_s * 1000.0, 1)
+        if error:
+            self.source_errors[label] = error
+
+    def mark_exhausted(self, stage: str) -> None:
+        if stage not in self.exhausted_stages:
+            self.exhausted_stages.append(stage)
+
+    def record_rejection(self, rule: str, builtin: bool = False) -> None:
+        # Built-in rules keep their dedicated counters; declared rules are tallied by name.
+        attr = BUILTIN_REJECTION_COUNTERS.get(rule) if builtin else None
+        if attr is not None:
+            setattr(self, attr, getattr(self, attr) + 1)
+        else:
+            self.filter_rejections[rule] = self.filter_rejections.get(rule, 0) + 1
+
+    def merge(self, other: RunMetrics) -> None:
+        """Add ``other``'s counters to these, e.g. one region's metrics into the run total."""
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if isinstance(value, int) and not isinstance(value, bool):
+                setattr(self, f.name, value + getattr(other, f.name))
+        self.source_counts.update(other.source_counts)
+        self.source_latency_ms.update(other.source_latency_ms)
+        self.source_errors.update(other.source_errors)
+        for rule, count in other.filter_rejections.items():
+            self.filter_rejections[rule] = self.filter_rejections.get(rule, 0) + count
+        for stage in other.exhausted_stages:
+            self.mark_exhausted(stage)
@@ -3,6 +3,19 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import List, Optional
 
+CURRENCY_SYMBOLS = {
+    "USD": "$",
+    "EUR": "€",
+    "GBP": "£",
+    "CAD": "CA$",
+    "AUD": "A$",
+}
+
+
+def format_price(amount: float, currency: str = "USD", decimals: int = 2) -> str:
+    symbol = CURRENCY_SYMBOLS.get(currency)
+    return f"{symbol}{amount:.{decimals}f}" if symbol else f"{amount:.{decimals}f} {currency}"
+
 
 @dataclass
 class Deal:
@@ -26,6 +39,8 @@ class Deal:
     steamspy_ccu: Optional[int] = None
     steamspy_owners: Optional[str] = None
     reason: Optional[str] = None
+    currency: str = "USD"
+    region: str = "us"
 
     @property
     def cheapshark_url(self) -> str:
@@ -0,0 +1,151 @@
+"""Local SteamSpy popularity index, refreshed from the bulk ``request=all`` listing.
+
+Refresh it out of band (cron / a workflow step) with::
+
+    python -m bot.popularity --pages 5
+
+The posting run then answers popularity from this file and only calls
+SteamSpy per app for apps the snapshot does not cover or has gone stale on.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from .config import load_settings
+from .steam import fetch_steamspy_all_page
+
+LOGGER = logging.getLogger("coop_deals_bot")
+
+# SteamSpy allows one ``request=all`` call per minute.
+STEAMSPY_ALL_PAGE_DELAY_SECONDS = 60.0
+
+Stats = Tuple[Optional[int], Optional[str]]
+
+
+class PopularityIndex:
+    """``appid -> (ccu, owners)`` from SteamSpy ``all`` pages, with per-page fetch times.
+
+    On disk: ``{"pages": {"<page>": fetched_at}, "apps": {"<appid>": [ccu, owners, page]}}``.
+    An entry is fresh while its page is younger than ``max_age_seconds``.
+    """
+
+    def __init__(self, path: Path, max_age_seconds: float):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self._pages: Dict[str, float] = {}
+        self._apps: Dict[str, List[Any]] = {}
+        if path.exists():
+            try:
+                raw = json.loads(path.read_text(encoding="utf-8"))
+                if isinstance(raw, dict):
+                    self._pages = dict(raw.get("pages") or {})
+                    self._apps = dict(raw.get("apps") or {})
+            except Exception as e:
+                LOGGER.warning("Failed to load popularity index %s: %s", path, e)
+
+    def __len__(self) -> int:
+        return len(self._apps)
+
+    def appids(self) -> List[str]:
+        """Every app in the index, most-owned pages first."""
+        return sorted(self._apps, key=lambda a: self._apps[a][2])
+
+    def get(self, appid: str) -> Optional[Stats]:
+        entry = self._apps.get(str(appid))
+        if not entry:
+            return None
+        fetched_at = self._pages.get(str(entry[2]), 0.0)
+        if time.time() - fetched_at > self.max_age_seconds:
+            return None
+        return entry[0], entry[1]
+
+    def age_seconds(self, pages: Optional[int] = None) -> float:
+        """Age of the oldest page, or infinity for an empty index.
+
+        With ``pages``, any of the first ``pages`` pages that was never stored
+        (a refresh that failed part-way) also makes the index infinitely old.
+        """
+        if pages is not None and any(str(page) not in self._pages for page in range(pages)):
+            return float("inf")
+        return time.time() - min(self._pages.values()) if self._pages else float("inf")
+
+    def update_page(self, page: int, stats: Dict[str, Stats]) -> None:
+        key = str(page)
+        # Apps move between pages as owner counts change; drop the page's old rows first.
+        self._apps = {a: e for a, e in self._apps.items() if str(e[2]) != key}
+        for appid, (ccu, owners) in stats.items():
+            self._apps[appid] = [ccu, owners, page]
+        self._pages[key] = time.time()
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        doc = {"pages": self._pages, "apps": self._apps}
+        tmp_path.write_text(json.dumps(doc, separators=(",", ":")), encoding="utf-8")
+        tmp_path.replace(self.path)
+
+
+def refresh_index(
+    index: PopularityIndex,
+    pages: int,
+    delay_seconds: float = STEAMSPY_ALL_PAGE_DELAY_SECONDS,
+    timeout: int = 60,
+    sleep: Callable[[float], None] = time.sleep,
+) -> int:
+    """Download up to ``pages`` SteamSpy ``all`` pages into ``index``; returns pages stored.
+
+    Stops early at an empty page (past the end of the catalog) or a failed
+    request. Pages already stored are kept, so a partial refresh still helps.
+    """
+    stored = 0
+    for page in range(pages):
+        if page:
+            sleep(delay_seconds)
+        try:
+            stats = fetch_steamspy_all_page(page, timeout=timeout)
+        except requests.RequestException as e:
+            LOGGER.warning("SteamSpy all page %d failed, stopping refresh: %s", page, e)
+            break
+        if not stats:
+            break
+        index.update_page(page, stats)
+        index.save()
+        stored += 1
+        LOGGER.info("Stored SteamSpy all page %d (%d apps)", page, len(stats))
+    return stored
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    s = load_settings()
+    parser = argparse.ArgumentParser(description="Refresh the local SteamSpy popularity index.")
+    parser.add_argument("--pages", type=int, default=s.popularity_index_pages, help="pages of 1000 apps to fetch")
+    parser.add_argument("--delay", type=float, default=STEAMSPY_ALL_PAGE_DELAY_SECONDS, help="seconds between pages")
+    parser.add_argument(
+        "--if-older-than",
+        type=float,
+        default=0.0,
+        help="skip the refresh while the index is younger than this many seconds",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=getattr(logging, s.log_level, logging.INFO),
+        format="%(asctime)s | %(levelname)s | %(message)s",
+    )
+
+    index = PopularityIndex(s.popularity_index_file, s.popularity_max_age_seconds)
+    if index.age_seconds(args.pages) < args.if_older_than:
+        LOGGER.info("Popularity index %s is fresh (%d apps); skipping refresh", index.path, len(index))
+        return
+    stored = refresh_index(index, args.pages, delay_seconds=args.delay)
+    LOGGER.info("Popularity index %s now holds %d apps (%d page(s) refreshed)", index.path, len(index), stored)
+
+
+if __name__ == "__main__":
+    main()
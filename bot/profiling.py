@@ -0,0 +1,165 @@
+"""On-demand run profiling: cProfile for the whole run, tracemalloc snapshots at stage boundaries.
+
+Enabled with ``PROFILE_DIR`` (or ``python -m bot.main --profile DIR``). The
+directory receives:
+
+- ``profile.pstats``: the raw cProfile dump (``python -m pstats`` / snakeviz);
+- ``memory-NN-<stage>.tracemalloc``: one ``tracemalloc.Snapshot`` per stage
+  boundary, loadable with ``tracemalloc.Snapshot.load``;
+- ``summary.txt``: top functions by cumulative and own time, and per stage
+  the traced memory, its peak and the allocation sites that grew most.
+
+cProfile only sees the thread that started it, so time spent inside worker
+pools shows up as the main thread waiting on them; tracemalloc covers every
+thread. With ``PROFILE_MIN_RUN_SECONDS`` the artifacts are only written for
+runs at least that long. Profiling still slows every run it is enabled for.
+"""
+from __future__ import annotations
+
+import cProfile
+import io
+import logging
+import pstats
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+LOGGER = logging.getLogger("coop_deals_bot")
+
+TRACE_FRAMES = 5
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+@dataclass
+class StageSnapshot:
+    stage: str
+    elapsed: float
+    current_bytes: int
+    peak_bytes: int
+    snapshot: tracemalloc.Snapshot
+
+
+class RunProfiler:
+    def __init__(self, out_dir: Path, top: int = 25):
+        self.out_dir = out_dir
+        self.top = max(1, top)
+        self.stages: List[StageSnapshot] = []
+        self._profile = cProfile.Profile()
+        self._started = 0.0
+        self.wall_seconds = 0.0
+        self._owns_tracemalloc = False
+
+    def start(self) -> None:
+        self._started = time.monotonic()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+            self._owns_tracemalloc = True
+        self._profile.enable()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    def snapshot(self, stage: str) -> None:
+        """Record memory at the end of ``stage``; the peak covers this stage only."""
+        # Taking a snapshot walks every live trace; keep that cost out of the CPU profile.
+        self._profile.disable()
+        try:
+            current, peak = tracemalloc.get_traced_memory()
+            snap = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+            tracemalloc.reset_peak()
+            self.stages.append(StageSnapshot(stage, self.elapsed(), current, peak, snap))
+        finally:
+            self._profile.enable()
+
+    def stop(self) -> None:
+        self._profile.disable()
+        self.wall_seconds = self.elapsed()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    def write(self) -> List[Path]:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        paths = [self.out_dir / "profile.pstats"]
+        self._profile.dump_stats(str(paths[0]))
+        for i, st in enumerate(self.stages, start=1):
+            path = self.out_dir / f"memory-{i:02d}-{re.sub(r'[^a-z0-9_-]+', '-', st.stage.lower())}.tracemalloc"
+            st.snapshot.dump(str(path))
+            paths.append(path)
+        summary = self.out_dir / "summary.txt"
+        summary.write_text(self.summary(), encoding="utf-8")
+        paths.append(summary)
+        return paths
+
+    def summary(self) -> str:
+        out = io.StringIO()
+        out.write(f"Run profile: {self.wall_seconds:.1f}s wall clock\n")
+        for sort, label in (("cumulative", "cumulative"), ("tottime", "own")):
+            out.write(f"\n== Top {self.top} functions by {label} time ==\n")
+            pstats.Stats(self._profile, stream=out).strip_dirs().sort_stats(sort).print_stats(self.top)
+
+        out.write("\n== Memory by stage ==\n")
+        prev: Optional[tracemalloc.Snapshot] = None
+        for st in self.stages:
+            out.write(
+                f"\n-- {st.stage} (at {st.elapsed:.1f}s): traced {_mib(st.current_bytes)}, "
+                f"stage peak {_mib(st.peak_bytes)}\n"
+            )
+            if prev is None:
+                for stat in st.snapshot.statistics("lineno")[: self.top]:
+                    out.write(f"{stat}\n")
+            else:
+                # Sites that grew while this stage ran; what earlier stages left behind is in their section.
+                for diff in st.snapshot.compare_to(prev, "lineno")[: self.top]:
+                    if diff.size_diff > 0:
+                        out.write(f"{diff}\n")
+            prev = st.snapshot
+        return out.getvalue()
+
+
+def _mib(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MiB"
+
+
+_PROFILER: Optional[RunProfiler] = None
+
+
+def stage_snapshot(stage: str) -> None:
+    """Mark the end of a pipeline stage; a no-op unless a profiled run is active."""
+    if _PROFILER is not None:
+        _PROFILER.snapshot(stage)
+
+
+@contextmanager
+def profiled_run(out_dir: Optional[Path], min_run_seconds: float = 0.0, top: int = 25) -> Iterator[None]:
+    """Profile the enclosed run into ``out_dir``; does nothing when ``out_dir`` is None."""
+    global _PROFILER
+    if out_dir is None:
+        yield
+        return
+    profiler = RunProfiler(out_dir, top)
+    _PROFILER = profiler
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        _PROFILER = None
+        if profiler.wall_seconds < min_run_seconds:
+            LOGGER.info("Run took %.1fs (< %.0fs); profile not written", profiler.wall_seconds, min_run_seconds)
+        else:
+            try:
+                paths = profiler.write()
+                LOGGER.info("Wrote %d profile artifact(s) to %s", len(paths), out_dir)
+            except OSError as e:
+                LOGGER.warning("Failed to write profile to %s: %s", out_dir, e)
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from dataclasses import fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .metrics import RunMetrics
+
+LOGGER = logging.getLogger("coop_deals_bot")
+
+PREFIX = "coop_deals"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+
+
+class _Family:
+    def __init__(self, kind: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.kind = kind
+        self.help = help_text
+        self.buckets = buckets
+        self.samples: Dict[LabelKey, Any] = {}
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms rendered in the Prometheus text format.
+
+    Families are declared on first use. The registry lives for the whole
+    process, so counters keep accumulating across runs in daemon mode.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families: Dict[str, _Family] = {}
+
+    def _family(self, name: str, kind: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> _Family:
+        fam = self._families.get(name)
+        if fam is None:
+            fam = self._families[name] = _Family(kind, help_text, buckets)
+        elif fam.kind != kind:
+            raise ValueError(f"metric {name} already registered as a {fam.kind}")
+        return fam
+
+    def inc(self, name: str, value: float = 1, help_text: str = "", **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            fam = self._family(name, "counter", help_text)
+            fam.samples[key] = fam.samples.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, help_text: str = "", **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._family(name, "gauge", help_text).samples[key] = float(value)
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        help_text: str = "",
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        **labels: str,
+    ) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            fam = self._family(name, "histogram", help_text, buckets)
+            hist = fam.samples.get(key)
+            if hist is None:
+                hist = fam.samples[key] = _Histogram(fam.buckets)
+            hist.observe(value)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._families):
+                fam = self._families[name]
+                if fam.help:
+                    lines.append(f"# HELP {name} {fam.help}")
+                lines.append(f"# TYPE {name} {fam.kind}")
+                for key in sorted(fam.samples):
+                    sample = fam.samples[key]
+                    if isinstance(sample, _Histogram):
+                        cumulative = 0
+                        for upper, count in zip(sample.buckets, sample.counts):
+                            cumulative += count
+                            le = ("le", _format_value(upper))
+                            lines.append(f"{name}_bucket{_format_labels(key, le)} {cumulative}")
+                        lines.append(f"{name}_sum{_format_labels(key)} {_format_value(sample.sum)}")
+                        lines.append(f"{name}_count{_format_labels(key)} {cumulative}")
+                    else:
+                        lines.append(f"{name}{_format_labels(key)} {_format_value(sample)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def observe_http(host: str, status: str, seconds: float) -> None:
+    REGISTRY.observe(
+        f"{PREFIX}_http_request_duration_seconds",
+        seconds,
+        "Upstream HTTP latency until response headers, including retries.",
+        host=host,
+        status=status,
+    )
+
+
+def record_http_error(host: str, kind: str) -> None:
+    REGISTRY.inc(f"{PREFIX}_http_errors_total", 1, "Upstream HTTP calls that raised.", host=host, kind=kind)
+
+
+def record_run(metrics: RunMetrics, duration_s: float) -> None:
+    """Fold one run's ``RunMetrics`` into the process-wide registry."""
+    for f in fields(metrics):
+        value = getattr(metrics, f.name)
+        if isinstance(value, int) and not isinstance(value, bool):
+            name = f.name[: -len("_total")] if f.name.endswith("_total") else f.name
+            REGISTRY.inc(f"{PREFIX}_{name}_total", value, f"Sum of RunMetrics.{f.name} over runs.")
+    for label, count in metrics.source_counts.items():
+        REGISTRY.set(f"{PREFIX}_source_deals", count, "Deals returned by each source in the last run.", source=label)
+    for label, ms in metrics.source_latency_ms.items():
+        REGISTRY.observe(f"{PREFIX}_source_duration_seconds", ms / 1000.0, "Deal source fetch latency.", source=label)
+    for label in metrics.source_errors:
+        REGISTRY.inc(f"{PREFIX}_source_errors_total", 1, "Deal source fetch failures.", source=label)
+    for rule, count in metrics.filter_rejections.items():
+        REGISTRY.inc(f"{PREFIX}_filter_rejections_total", count, "Rejections by declared filter rules.", rule=rule)
+    for stage in metrics.exhausted_stages:
+        REGISTRY.inc(f"{PREFIX}_budget_exhausted_total", 1, "Runs in which a stage ran out of time.", stage=stage)
+    REGISTRY.inc(f"{PREFIX}_runs_total", 1, "Pipeline runs, including ones that stopped early.")
+    REGISTRY.set(f"{PREFIX}_last_run_duration_seconds", duration_s, "Wall time of the last run.")
+    REGISTRY.set(f"{PREFIX}_last_run_timestamp_seconds", time.time(), "Unix time the last run finished.")
+
+
+def write_textfile(path: Path, registry: MetricsRegistry = REGISTRY) -> None:
+    """Write for node-exporter's textfile collector; rename keeps scrapes from seeing partial files."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(registry.render(), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class MetricsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr: str, port: int, registry: MetricsRegistry):
+        super().__init__((addr, port), _MetricsHandler)
+        self.registry = registry
+
+
+def start_metrics_server(port: int, addr: str = "0.0.0.0", registry: MetricsRegistry = REGISTRY) -> MetricsServer:
+    server = MetricsServer(addr, port, registry)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    LOGGER.info("Serving Prometheus metrics on http://%s:%d/metrics", addr, server.server_address[1])
+    return server
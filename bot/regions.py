@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from .config import Settings
+from .metrics import RunMetrics
+from .models import Deal
+from .steam_store import STEAM_STORE_ICON, fetch_price_overview, fetch_steam_specials, regional_deal_id
+from .tracing import bind_context, span
+
+LOGGER = logging.getLogger("coop_deals_bot")
+
+
+class RegionPriceCache:
+    """Per-region Steam prices, keyed ``<cc>:<appid>`` and expired after ``ttl_seconds``.
+
+    Co-op/review metadata is region-independent and lives in ``SteamCoopCache``;
+    only prices are stored per region here.
+    """
+
+    def __init__(self, path: Path, ttl_seconds: float):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._data: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            try:
+                raw = json.loads(path.read_text(encoding="utf-8"))
+                if isinstance(raw, dict):
+                    self._data = raw
+            except Exception as e:
+                LOGGER.warning("Failed to load price cache file %s: %s", path, e)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, cc: str, appid: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Return ``(fresh, price)``; ``price`` is None for apps with no regional price."""
+        entry = self._data.get(f"{cc}:{appid}")
+        if time.time() - _fetched_at(entry) > self.ttl_seconds:
+            return False, None
+        return True, entry.get("price") if isinstance(entry, dict) else None
+
+    def set(self, cc: str, appid: str, price: Optional[Dict[str, Any]]) -> None:
+        self._data[f"{cc}:{appid}"] = {"price": price, "fetched_at": time.time()}
+
+    def save(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        self._data = {k: v for k, v in self._data.items() if _fetched_at(v) >= cutoff}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(self._data), encoding="utf-8")
+        tmp_path.replace(self.path)
+
+
+def _fetched_at(entry: Any) -> float:
+    # A malformed entry (hand-edited or from an older format) reads as expired instead of failing the run.
+    try:
+        return float(entry["fetched_at"])
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+def region_settings(s: Settings, cc: str) -> Settings:
+    """Settings with price limits scaled to the region's currency."""
+    if cc == "us":
+        return s
+    max_price = s.region_max_prices.get(cc, s.max_price)
+    sweet_spot = s.price_sweet_spot * (max_price / s.max_price)
+    return replace(s, max_price=max_price, price_sweet_spot=sweet_spot)
+
+
+def _repriced(d: Deal, cc: str, price: Dict[str, Any]) -> Deal:
+    final = price["final"] / 100
+    initial = price["initial"] / 100 if price["initial"] > 0 else final
+    return replace(
+        d,
+        deal_id=regional_deal_id("price", str(d.steam_app_id), cc),
+        sale_price=final,
+        normal_price=initial,
+        savings_pct=float(price["discount_percent"]),
+        store_id="steam-direct",
+        store_name="Steam",
+        store_icon=STEAM_STORE_ICON,
+        buy_url=f"https://store.steampowered.com/app/{d.steam_app_id}/",
+        source_label="Steam",
+        currency=price["currency"],
+        region=cc,
+    )
+
+
+def regional_candidates(
+    cc: str,
+    s: Settings,
+    base: List[Deal],
+    price_cache: RegionPriceCache,
+    timeout: float = 20,
+) -> List[Deal]:
+    """One region's candidates: its Steam specials plus ``base`` deals re-priced on its Steam store.
+
+    Only appids without a fresh cached price are looked up, in batched
+    ``price_overview`` calls.
+    """
+    rs = region_settings(s, cc)
+    deals = fetch_steam_specials(rs.max_price, timeout=timeout, stream=s.stream_json, cc=cc)
+    seen = {d.steam_app_id for d in deals}
+
+    todo = sorted({d.steam_app_id for d in base if d.steam_app_id and d.steam_app_id not in seen})
+    missing = [a for a in todo if not price_cache.get(cc, a)[0]]
+    if missing:
+        for appid, price in fetch_price_overview(missing, cc, timeout=timeout).items():
+            price_cache.set(cc, appid, price)
+
+    for d in base:
+        if not d.steam_app_id or d.steam_app_id in seen:
+            continue
+        _, price = price_cache.get(cc, d.steam_app_id)
+        if price and price["final"] > 0:
+            deals.append(_repriced(d, cc, price))
+            seen.add(d.steam_app_id)
+    return deals
+
+
+def fetch_regional_candidates(
+    regions: List[str],
+    s: Settings,
+    base: List[Deal],
+    price_cache: RegionPriceCache,
+    metrics: Dict[str, RunMetrics],
+    timeout: float = 20,
+) -> Dict[str, List[Deal]]:
+    """Fetch every extra region in parallel; a failing region just yields no candidates.
+
+    Each region's fetch is recorded in ``metrics[cc]``.
+    """
+    if not regions:
+        return {}
+
+    def _one(cc: str) -> Tuple[str, List[Deal], float, Optional[str]]:
+        started = time.monotonic()
+        with span("region.fetch", region=cc) as sp:
+            try:
+                deals = regional_candidates(cc, s, base, price_cache, timeout)
+            except requests.RequestException as e:
+                sp.set_error(e)
+                return cc, [], time.monotonic() - started, str(e)
+            sp.set_attribute("deals", len(deals))
+            return cc, deals, time.monotonic() - started, None
+
+    results: Dict[str, List[Deal]] = {}
+    with ThreadPoolExecutor(max_workers=len(regions), thread_name_prefix="region") as executor:
+        for cc, deals, elapsed, error in executor.map(bind_context(_one), regions):
+            if error:
+                LOGGER.warning("Failed to fetch regional prices for %s: %s", cc.upper(), error)
+            metrics[cc].record_source(f"steam_direct:{cc}", len(deals), elapsed, error)
+            results[cc] = deals
+    return results
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from .cheapshark import StoreIndex, fetch_deals
+from .config import Settings
+from .metrics import RunMetrics
+from .models import Deal
+from .steam_store import fetch_steam_specials
+from .tracing import bind_context, span
+
+LOGGER = logging.getLogger("coop_deals_bot")
+
+SourceFetch = Callable[[Settings, StoreIndex, float], List[Deal]]
+
+
+@dataclass(frozen=True)
+class DealSource:
+    """A deal provider: how to fetch it, how long it may take and how it is reported."""
+
+    name: str
+    label: str
+    fetch: SourceFetch
+    timeout: float = 20
+    enabled: Callable[[Settings], bool] = lambda s: True
+
+
+@dataclass
+class SourceResult:
+    source: DealSource
+    deals: List[Deal]
+    elapsed_s: float
+    error: Optional[str] = None
+
+
+SOURCE_REGISTRY: Dict[str, DealSource] = {}
+
+
+def register_source(source: DealSource) -> DealSource:
+    SOURCE_REGISTRY[source.name] = source
+    return source
+
+
+def source_label(name: str) -> str:
+    base, _, region = name.partition(":")
+    source = SOURCE_REGISTRY.get(base)
+    label = source.label if source else base
+    return f"{label} ({region.upper()})" if region else label
+
+
+def enabled_sources(s: Settings) -> List[DealSource]:
+    return [src for src in SOURCE_REGISTRY.values() if src.enabled(s)]
+
+
+def _fetch_cheapshark(s: Settings, stores: StoreIndex, timeout: float) -> List[Deal]:
+    return fetch_deals(
+        upper_price=s.max_price,
+        steamworks_only=s.only_steam_redeemable,
+        allowed_store_ids=stores.ids(),
+        stores=stores,
+        timeout=timeout,
+        stream=s.stream_json,
+    )
+
+
+def _fetch_steam_direct(s: Settings, stores: StoreIndex, timeout: float) -> List[Deal]:
+    return fetch_steam_specials(s.max_price, timeout=timeout, stream=s.stream_json)
+
+
+register_source(DealSource(name="cheapshark", label="CheapShark", fetch=_fetch_cheapshark, timeout=20))
+register_source(
+    DealSource(
+        name="steam_direct",
+        label="Steam Direct",
+        fetch=_fetch_steam_direct,
+        timeout=20,
+        enabled=lambda s: s.include_steam_direct_specials,
+    )
+)
+
+
+def _run_source(source: DealSource, s: Settings, stores: StoreIndex) -> SourceResult:
+    started = time.monotonic()
+    with span("source.fetch", source=source.name) as sp:
+        try:
+            deals = source.fetch(s, stores, source.timeout)
+        except requests.RequestException as e:
+            sp.set_error(e)
+            return SourceResult(source, [], time.monotonic() - started, error=str(e))
+        sp.set_attribute("deals", len(deals))
+        return SourceResult(source, deals, time.monotonic() - started)
+
+
+def _start_daemon(fn: Callable[[], SourceResult], name: str) -> Future[SourceResult]:
+    """Run ``fn`` on a daemon thread.
+
+    Pool workers are joined at interpreter exit, so a source stuck past its
+    deadline would keep the process alive; a daemon thread is abandoned.
+    """
+    future: Future[SourceResult] = Future()
+
+    def _target() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=_target, name=name, daemon=True).start()
+    return future
+
+
+def fetch_all_sources(
+    sources: List[DealSource],
+    s: Settings,
+    stores: StoreIndex,
+    metrics: RunMetrics,
+    budget_s: Optional[float] = None,
+) -> List[Deal]:
+    """Fetch every source in parallel, giving each one its own deadline.
+
+    A source that raises or overruns its deadline contributes no deals; its
+    latency and error still land in ``metrics``. Results keep registry order
+    so downstream ranking ties stay stable. ``budget_s`` caps every source
+    deadline at the ingestion stage budget. A source that overruns keeps
+    running on its daemon thread until its own HTTP timeout, but does not
+    delay the run or interpreter exit.
+    """
+    if not sources:
+        return []
+    if budget_s is not None:
+        sources = [replace(src, timeout=max(1.0, min(src.timeout, budget_s))) for src in sources]
+
+    started = time.monotonic()
+    run = bind_context(_run_source)
+    futures = {
+        src.name: _start_daemon(lambda src=src: run(src, s, stores), f"deal-source-{src.name}") for src in sources
+    }
+
+    candidates: List[Deal] = []
+    for src in sources:
+        future = futures[src.name]
+        deadline = started + src.timeout
+        try:
+            result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except TimeoutError:
+            result = SourceResult(src, [], time.monotonic() - started, error=f"deadline of {src.timeout}s exceeded")
+
+        if result.error:
+            LOGGER.warning("Failed to fetch deals from %s: %s", src.label, result.error)
+        metrics.record_source(src.name, len(result.deals), result.elapsed_s, result.error)
+        candidates.extend(result.deals)
+    return candidates
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import json
+import logging
+import socket
+import ssl
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+from urllib.parse import unquote, urlparse
+
+LOGGER = logging.getLogger("coop_deals_bot")
+
+
+class StateBackendError(RuntimeError):
+    pass
+
+
+def load_posted_ids(path: Path) -> Set[str]:
+    if not path.exists():
+        return set()
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if isinstance(data, dict) and isinstance(data.get("dealIDs"), list):
+            return set(str(x) for x in data["dealIDs"])
+        if isinstance(data, list):
+            return set(str(x) for x in data)
+    except Exception as e:
+        LOGGER.warning("Failed to load posted cache file %s: %s", path, e)
+    return set()
+
+
+def save_posted_ids(path: Path, posted: Set[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(json.dumps({"dealIDs": sorted(posted)}, indent=2), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+class StateBackend(ABC):
+    """Where posted deal IDs and shared Steam metadata live.
+
+    ``claim_deal`` must be atomic across runners: only one caller may get True
+    for a given deal until the claim is released or expires.
+    """
+
+    def get_meta(self, appid: str) -> Optional[Dict[str, Any]]:
+        return None
+
+    def set_meta(self, appid: str, value: Dict[str, Any]) -> None:
+        return None
+
+    @abstractmethod
+    def posted_ids(self) -> Set[str]:
+        ...
+
+    @abstractmethod
+    def claim_deal(self, deal_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def release_deal(self, deal_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def mark_posted(self, deal_ids: Iterable[str]) -> None:
+        ...
+
+    def close(self) -> None:
+        return None
+
+
+class FileStateBackend(StateBackend):
+    """Single-runner backend: the posted-ID JSON file, claims held in memory.
+
+    Steam metadata stays in ``SteamCoopCache``'s own file, so there is no
+    shared metadata tier here.
+    """
+
+    def __init__(self, posted_path: Path):
+        self.posted_path = posted_path
+        self._posted = load_posted_ids(posted_path)
+        self._claims: Set[str] = set()
+
+    def posted_ids(self) -> Set[str]:
+        return set(self._posted)
+
+    def claim_deal(self, deal_id: str) -> bool:
+        if deal_id in self._posted or deal_id in self._claims:
+            return False
+        self._claims.add(deal_id)
+        return True
+
+    def release_deal(self, deal_id: str) -> None:
+        self._claims.discard(deal_id)
+
+    def mark_posted(self, deal_ids: Iterable[str]) -> None:
+        ids = set(deal_ids)
+        self._posted |= ids
+        self._claims -= ids
+        save_posted_ids(self.posted_path, self._posted)
+
+
+class RespClient:
+    """Minimal blocking client for the Redis serialization protocol (RESP2)."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 6379,
+        db: int = 0,
+        password: Optional[str] = None,
+        username: Optional[str] = None,
+        use_ssl: bool = False,
+        timeout: float = 5.0,
+    ):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.username = username
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._buf = b""
+
+    def _connect(self) -> None:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        if self.use_ssl:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=self.host)
+        self._sock = sock
+        self._buf = b""
+        if self.password:
+            auth = [self.username, self.password] if self.username else [self.password]
+            self._roundtrip(["AUTH", *auth])
+        if self.db:
+            self._roundtrip(["SELECT", str(self.db)])
+
+    def execute(self, *args: Any) -> Any:
+        try:
+            if self._sock is None:
+                self._connect()
+            return self._roundtrip([str(a) for a in args])
+        except OSError as e:
+            self.close()
+            raise StateBackendError(f"Redis connection to {self.host}:{self.port} failed: {e}") from e
+
+    def _roundtrip(self, args: List[str]) -> Any:
+        assert self._sock is not None
+        out = [f"*{len(args)}\r\n".encode()]
+        for a in args:
+            data = a.encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._sock.sendall(b"".join(out))
+        return self._read_reply()
+
+    def _read_line(self) -> bytes:
+        while b"\r\n" not in self._buf:
+            self._fill()
+        line, self._buf = self._buf.split(b"\r\n", 1)
+        return line
+
+    def _read_exact(self, n: int) -> bytes:
+        while len(self._buf) < n + 2:
+            self._fill()
+        data, self._buf = self._buf[:n], self._buf[n + 2 :]
+        return data
+
+    def _fill(self) -> None:
+        assert self._sock is not None
+        chunk = self._sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("connection closed by server")
+        self._buf += chunk
+
+    def _read_reply(self) -> Any:
+        line = self._read_line()
+        kind, rest = line[:1], line[1:]
+        if kind == b"+":
+            return rest.decode("utf-8")
+        if kind == b"-":
+            raise StateBackendError(rest.decode("utf-8"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            n = int(rest)
+            return None if n < 0 else self._read_exact(n).decode("utf-8")
+        if kind == b"*":
+            n = int(rest)
+            return None if n < 0 else [self._read_reply() for _ in range(n)]
+        raise StateBackendError(f"Unexpected RESP reply: {line!r}")
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 5.0) -> "RespClient":
+        parsed = urlparse(url)
+        if parsed.scheme not in {"redis", "rediss"}:
+            raise StateBackendError(f"Unsupported state backend URL scheme: {parsed.scheme!r}")
+        db_path = (parsed.path or "/").lstrip("/")
+        return cls(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=int(db_path) if db_path.isdigit() else 0,
+            password=unquote(parsed.password) if parsed.password else None,
+            username=unquote(parsed.username) if parsed.username else None,
+            use_ssl=parsed.scheme == "rediss",
+            timeout=timeout,
+        )
+
+
+class RedisStateBackend(StateBackend):
+    """Shared backend for concurrent runners, speaking the Redis protocol.
+
+    Keys: ``<ns>:posted`` (set of deal IDs), ``<ns>:claim:<dealID>`` (claim
+    token with TTL), ``<ns>:meta:<appid>`` (JSON Steam metadata).
+    """
+
+    def __init__(self, client: RespClient, namespace: str = "coop-deals", claim_ttl_seconds: int = 21600, runner_id: str = ""):
+        self.client = client
+        self.namespace = namespace
+        self.claim_ttl_seconds = max(1, claim_ttl_seconds)
+        self.runner_id = runner_id or socket.gethostname()
+
+    def _key(self, *parts: str) -> str:
+        return ":".join([self.namespace, *parts])
+
+    def get_meta(self, appid: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.execute("GET", self._key("meta", str(appid)))
+        if raw is None:
+            return None
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return None
+        return value if isinstance(value, dict) else None
+
+    def set_meta(self, appid: str, value: Dict[str, Any]) -> None:
+        self.client.execute("SET", self._key("meta", str(appid)), json.dumps(value, separators=(",", ":")))
+
+    def posted_ids(self) -> Set[str]:
+        return set(self.client.execute("SMEMBERS", self._key("posted")) or [])
+
+    def claim_deal(self, deal_id: str) -> bool:
+        if self.client.execute("SISMEMBER", self._key("posted"), deal_id):
+            return False
+        reply = self.client.execute(
+            "SET", self._key("claim", deal_id), self.runner_id, "NX", "EX", str(self.claim_ttl_seconds)
+        )
+        return reply == "OK"
+
+    def release_deal(self, deal_id: str) -> None:
+        self.client.execute("DEL", self._key("claim", deal_id))
+
+    def mark_posted(self, deal_ids: Iterable[str]) -> None:
+        ids = list(deal_ids)
+        if not ids:
+            return
+        # Claims are left to expire rather than deleted: a runner that checked
+        # SISMEMBER just before this SADD still trips over the live claim.
+        self.client.execute("SADD", self._key("posted"), *ids)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def build_state_backend(s) -> StateBackend:
+    """The configured backend; raises StateBackendError when a configured shared backend is unreachable.
+
+    There is deliberately no fallback to local files: a runner without the
+    shared claims could post deals another runner is posting at the same time.
+    """
+    if not s.state_backend_url:
+        return FileStateBackend(s.posted_cache_file)
+    client = RespClient.from_url(s.state_backend_url)
+    try:
+        client.execute("PING")
+    except StateBackendError:
+        client.close()
+        raise
+    return RedisStateBackend(client, namespace=s.state_namespace, claim_ttl_seconds=s.claim_ttl_seconds)
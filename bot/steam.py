@@ -1,17 +1,29 @@
 from __future__ import annotations
 
 import json
+import logging
+import os
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import IO, Any, Dict, List, Optional, Sequence, Tuple
 
+import requests
 
-from .http_client import get_json
+from .async_http import AsyncHttpClient, get_json_async
+from .budget import StageBudget
+from .http_client import build_session, get_json
+from .state import StateBackend, StateBackendError
+
+LOGGER = logging.getLogger("coop_deals_bot")
 
 STEAM_APPDETAILS_URL = "https://store.steampowered.com/api/appdetails"
 STEAM_APPREVIEWS_URL = "https://store.steampowered.com/appreviews/{appid}"
 STEAM_CURRENT_PLAYERS_URL = "https://api.steampowered.com/ISteamUserStats/GetNumberOfCurrentPlayers/v1/"
 STEAMSPY_APPDETAILS_URL = "https://steamspy.com/api.php"
 
+# SteamSpy tag listings that cover nearly every co-op app; each one is a single request.
+STEAMSPY_BULK_TAGS = ("Co-op", "Online Co-Op")
+
 COOP_CATEGORY_KEYWORDS = {
     "co-op",
     "online co-op",
@@ -27,32 +39,213 @@ CATEGORY_TO_TAG = {
 }
 
 
+class LruTier:
+    """Decoded records, bounded by entry count and by (serialized) byte size, least recently used out first."""
+
+    def __init__(self, max_entries: int = 0, max_bytes: int = 0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._items.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: str, value: Dict[str, Any], size: int) -> None:
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        self._items[key] = (value, size)
+        self.bytes += size
+        while self._items and (
+            (self.max_entries and len(self._items) > self.max_entries)
+            or (self.max_bytes and self.bytes > self.max_bytes)
+        ):
+            _, (_, evicted_size) = self._items.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
 class SteamCoopCache:
-    def __init__(self, path: Path):
+    """Steam metadata cache backed by a JSON store plus an append-only journal.
+
+    Every ``set()`` is appended to ``<path>.wal`` and flushed immediately, so a
+    crash mid-run keeps the lookups already paid for. The journal is folded
+    into the main store (temp file + rename) every ``compact_every`` writes and
+    on ``save()``; on startup any journal left behind is replayed.
+
+    In memory, records are kept in their serialized form; only the ``hot``
+    LRU tier (``max_entries`` / ``max_bytes``, 0 = unbounded) holds decoded
+    dicts, so memory stays close to the store's on-disk size while frequently
+    seen appids skip decoding. The tier bounds decoded records only: the
+    serialized store is always fully resident and grows with the catalog.
+
+    With a ``shared`` state backend, local misses read through to it and every
+    ``set()`` is written to it as well, so concurrent runners share lookups.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        compact_every: int = 50,
+        shared: Optional[StateBackend] = None,
+        max_entries: int = 0,
+        max_bytes: int = 0,
+    ):
         self.path = path
-        self._data: Dict[str, Dict[str, Any]] = {}
+        self.shared = shared
+        self.journal_path = path.with_suffix(path.suffix + ".wal")
+        self.compact_every = max(1, compact_every)
+        self.hot = LruTier(max_entries, max_bytes)
+        self._data: Dict[str, str] = {}
+        self._journal: Optional[IO[str]] = None
+        self._pending = 0
         if path.exists():
             try:
                 raw = json.loads(path.read_text(encoding="utf-8"))
                 if isinstance(raw, dict):
-                    self._data = raw
-            except Exception:
+                    self._data = {str(k): _dump(v) for k, v in raw.items() if isinstance(v, dict)}
+            except Exception as e:
+                LOGGER.warning("Failed to load Steam cache file %s: %s", path, e)
                 self._data = {}
+        self._pending, torn = self._replay_journal()
+        if torn:
+            # Appending after a partial line would merge it with the next record and a second
+            # crash would lose everything after it; fold the good prefix into the store now.
+            self.compact()
+
+    def _replay_journal(self) -> Tuple[int, bool]:
+        """Apply journaled writes; returns (entries replayed, whether a torn line was hit)."""
+        if not self.journal_path.exists():
+            return 0, False
+        replayed = 0
+        torn = False
+        with self.journal_path.open("r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-append; everything before it is intact.
+                    torn = True
+                    break
+                if isinstance(entry, dict) and isinstance(entry.get("v"), dict):
+                    self._data[str(entry.get("k"))] = _dump(entry["v"])
+                    replayed += 1
+        if replayed:
+            LOGGER.info("Recovered %d Steam cache entries from journal %s", replayed, self.journal_path)
+        return replayed, torn
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        return [(k, json.loads(v)) for k, v in self._data.items()]
 
     def get(self, appid: str) -> Optional[Dict[str, Any]]:
-        v = self._data.get(str(appid))
-        return v if isinstance(v, dict) else None
+        key = str(appid)
+        v = self.hot.get(key)
+        if v is not None:
+            return v
+        raw = self._data.get(key)
+        if raw is not None:
+            v = json.loads(raw)
+            self.hot.put(key, v, len(raw))
+            return v
+        if self.shared is None:
+            return None
+        try:
+            v = self.shared.get_meta(key)
+        except StateBackendError as e:
+            LOGGER.warning("Shared Steam cache read failed for appid=%s: %s", appid, e)
+            return None
+        if v is not None:
+            self._store_local(key, v)
+        return v
 
     def set(self, appid: str, value: Dict[str, Any]) -> None:
-        self._data[str(appid)] = value
+        self._store_local(str(appid), value)
+        if self.shared is not None:
+            try:
+                self.shared.set_meta(str(appid), value)
+            except StateBackendError as e:
+                LOGGER.warning("Shared Steam cache write failed for appid=%s: %s", appid, e)
 
-    def save(self) -> None:
+    def _store_local(self, appid: str, value: Dict[str, Any]) -> None:
+        raw = _dump(value)
+        self._data[appid] = raw
+        self.hot.put(appid, value, len(raw))
+        self._append_journal(appid, raw)
+        self._pending += 1
+        if self._pending >= self.compact_every:
+            self.compact()
+
+    def _append_journal(self, appid: str, raw: str) -> None:
+        if self._journal is None:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            self._journal = self.journal_path.open("a", encoding="utf-8")
+        self._journal.write(f'{{"k":{json.dumps(appid)},"v":{raw}}}\n')
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def compact(self) -> None:
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.path.write_text(json.dumps(self._data, indent=2), encoding="utf-8")
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        # Records are already serialized; splice them instead of re-encoding the whole store.
+        body = ",\n".join(f"{json.dumps(k)}:{v}" for k, v in self._data.items())
+        with tmp_path.open("w", encoding="utf-8") as f:
+            f.write("{\n" + body + "\n}")
+            f.flush()
+            os.fsync(f.fileno())
+        tmp_path.replace(self.path)
+        # Only drop the journal once the compacted store, and its rename, are durable.
+        _fsync_dir(self.path.parent)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        self.journal_path.unlink(missing_ok=True)
+        self._pending = 0
+
+    def save(self) -> None:
+        self.compact()
 
 
-def fetch_coop_metadata(appid: str, timeout: int = 20) -> Tuple[bool, List[str]]:
-    payload = get_json(STEAM_APPDETAILS_URL, params={"appids": str(appid), "l": "en", "cc": "us"}, timeout=timeout)
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        # Directories cannot be opened for fsync on Windows; the rename is all we can do there.
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _dump(value: Dict[str, Any]) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _coop_metadata_params(appid: str) -> Dict[str, str]:
+    return {"appids": str(appid), "l": "en", "cc": "us"}
+
+
+def _parse_coop_metadata(appid: str, payload: Any) -> Tuple[bool, List[str]]:
     app_key = str(appid)
     if app_key not in payload or not payload[app_key].get("success"):
         return False, []
@@ -71,13 +264,24 @@ def fetch_coop_metadata(appid: str, timeout: int = 20) -> Tuple[bool, List[str]]
     return is_coop, tags
 
 
-def fetch_review_summary(appid: str, timeout: int = 20) -> Tuple[Optional[str], Optional[int], Optional[int]]:
-    url = STEAM_APPREVIEWS_URL.format(appid=appid)
-    payload = get_json(
-        url,
-        params={"json": "1", "language": "all", "num_per_page": "0", "purchase_type": "all"},
-        timeout=timeout,
+def fetch_coop_metadata(appid: str, timeout: int = 20) -> Tuple[bool, List[str]]:
+    payload = get_json(STEAM_APPDETAILS_URL, params=_coop_metadata_params(appid), timeout=timeout)
+    return _parse_coop_metadata(appid, payload)
+
+
+async def fetch_coop_metadata_async(
+    appid: str, timeout: int = 20, client: Optional[AsyncHttpClient] = None
+) -> Tuple[bool, List[str]]:
+    payload = await get_json_async(
+        STEAM_APPDETAILS_URL, params=_coop_metadata_params(appid), timeout=timeout, client=client
     )
+    return _parse_coop_metadata(appid, payload)
+
+
+REVIEW_SUMMARY_PARAMS = {"json": "1", "language": "all", "num_per_page": "0", "purchase_type": "all"}
+
+
+def _parse_review_summary(payload: Any) -> Tuple[Optional[str], Optional[int], Optional[int]]:
     q = payload.get("query_summary") or {}
     text = q.get("review_score_desc")
     pct = q.get("review_score")
@@ -89,24 +293,43 @@ def fetch_review_summary(appid: str, timeout: int = 20) -> Tuple[Optional[str],
     )
 
 
-def fetch_current_players(appid: str, timeout: int = 20) -> Optional[int]:
-    payload = get_json(
-        STEAM_CURRENT_PLAYERS_URL,
-        params={"appid": str(appid)},
-        timeout=timeout,
-    )
+def fetch_review_summary(appid: str, timeout: int = 20) -> Tuple[Optional[str], Optional[int], Optional[int]]:
+    url = STEAM_APPREVIEWS_URL.format(appid=appid)
+    return _parse_review_summary(get_json(url, params=REVIEW_SUMMARY_PARAMS, timeout=timeout))
+
+
+async def fetch_review_summary_async(
+    appid: str, timeout: int = 20, client: Optional[AsyncHttpClient] = None
+) -> Tuple[Optional[str], Optional[int], Optional[int]]:
+    url = STEAM_APPREVIEWS_URL.format(appid=appid)
+    return _parse_review_summary(await get_json_async(url, params=REVIEW_SUMMARY_PARAMS, timeout=timeout, client=client))
+
+
+def _parse_current_players(payload: Any) -> Optional[int]:
     response = payload.get("response") if isinstance(payload, dict) else None
     count = response.get("player_count") if isinstance(response, dict) else None
     return int(count) if isinstance(count, int) else None
 
 
-def fetch_steamspy_stats(appid: str, timeout: int = 20) -> Tuple[Optional[int], Optional[str]]:
-    payload = get_json(
-        STEAMSPY_APPDETAILS_URL,
-        params={"request": "appdetails", "appid": str(appid)},
-        timeout=timeout,
+def fetch_current_players(appid: str, timeout: int = 20) -> Optional[int]:
+    payload = get_json(STEAM_CURRENT_PLAYERS_URL, params={"appid": str(appid)}, timeout=timeout)
+    return _parse_current_players(payload)
+
+
+async def fetch_current_players_async(
+    appid: str, timeout: int = 20, client: Optional[AsyncHttpClient] = None
+) -> Optional[int]:
+    payload = await get_json_async(
+        STEAM_CURRENT_PLAYERS_URL, params={"appid": str(appid)}, timeout=timeout, client=client
     )
+    return _parse_current_players(payload)
+
+
+def _steamspy_params(appid: str) -> Dict[str, str]:
+    return {"request": "appdetails", "appid": str(appid)}
 
+
+def _parse_steamspy_stats(payload: Any) -> Tuple[Optional[int], Optional[str]]:
     if not isinstance(payload, dict):
         return None, None
 
@@ -116,3 +339,142 @@ def fetch_steamspy_stats(appid: str, timeout: int = 20) -> Tuple[Optional[int],
         int(ccu) if isinstance(ccu, int) else None,
         str(owners).strip() if owners else None,
     )
+
+
+def fetch_steamspy_stats(appid: str, timeout: int = 20) -> Tuple[Optional[int], Optional[str]]:
+    return _parse_steamspy_stats(get_json(STEAMSPY_APPDETAILS_URL, params=_steamspy_params(appid), timeout=timeout))
+
+
+async def fetch_steamspy_stats_async(
+    appid: str, timeout: int = 20, client: Optional[AsyncHttpClient] = None
+) -> Tuple[Optional[int], Optional[str]]:
+    payload = await get_json_async(STEAMSPY_APPDETAILS_URL, params=_steamspy_params(appid), timeout=timeout, client=client)
+    return _parse_steamspy_stats(payload)
+
+
+def _parse_steamspy_bulk(payload: Any) -> Dict[str, Tuple[Optional[int], Optional[str]]]:
+    if not isinstance(payload, dict):
+        return {}
+    return {str(appid): _parse_steamspy_stats(entry) for appid, entry in payload.items() if isinstance(entry, dict)}
+
+
+def fetch_steamspy_tag(
+    tag: str, timeout: float = 60, session: Optional[requests.Session] = None
+) -> Dict[str, Tuple[Optional[int], Optional[str]]]:
+    """``(ccu, owners)`` for every app SteamSpy lists under ``tag``, in one request."""
+    payload = get_json(
+        STEAMSPY_APPDETAILS_URL, params={"request": "tag", "tag": tag}, timeout=timeout, session=session
+    )
+    return _parse_steamspy_bulk(payload)
+
+
+async def fetch_steamspy_tag_async(
+    tag: str, timeout: int = 60, client: Optional[AsyncHttpClient] = None
+) -> Dict[str, Tuple[Optional[int], Optional[str]]]:
+    payload = await get_json_async(
+        STEAMSPY_APPDETAILS_URL, params={"request": "tag", "tag": tag}, timeout=timeout, client=client
+    )
+    return _parse_steamspy_bulk(payload)
+
+
+def fetch_steamspy_all_page(page: int, timeout: int = 60) -> Dict[str, Tuple[Optional[int], Optional[str]]]:
+    """One page (1000 apps, by owners) of SteamSpy's full catalog; empty past the last page."""
+    payload = get_json(STEAMSPY_APPDETAILS_URL, params={"request": "all", "page": str(page)}, timeout=timeout)
+    return _parse_steamspy_bulk(payload)
+
+
+async def fetch_steamspy_all_page_async(
+    page: int, timeout: int = 60, client: Optional[AsyncHttpClient] = None
+) -> Dict[str, Tuple[Optional[int], Optional[str]]]:
+    payload = await get_json_async(
+        STEAMSPY_APPDETAILS_URL, params={"request": "all", "page": str(page)}, timeout=timeout, client=client
+    )
+    return _parse_steamspy_bulk(payload)
+
+
+class SteamSpyBulk:
+    """Popularity for many apps from SteamSpy tag listings, downloaded on first use.
+
+    A listing that fails to download is logged and skipped; apps it would have
+    covered fall back to per-app lookups. With a ``budget``, each download's
+    timeout is clamped to the time the stage has left, listings are not
+    retried, and the rest are skipped once the stage has run out.
+    """
+
+    def __init__(
+        self, tags: Sequence[str] = STEAMSPY_BULK_TAGS, timeout: float = 60, budget: Optional[StageBudget] = None
+    ):
+        self.tags = tuple(tags)
+        self.timeout = timeout
+        self.budget = budget
+        self._stats: Optional[Dict[str, Tuple[Optional[int], Optional[str]]]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._stats is not None
+
+    def get(self, appid: str) -> Optional[Tuple[Optional[int], Optional[str]]]:
+        if self._stats is None:
+            self._stats = self._load()
+        return self._stats.get(str(appid))
+
+    def _load(self) -> Dict[str, Tuple[Optional[int], Optional[str]]]:
+        stats: Dict[str, Tuple[Optional[int], Optional[str]]] = {}
+        # A failed listing only costs per-app lookups later, so it is not worth retrying on the run's clock.
+        session = build_session(retries=0) if self.budget is not None else None
+        for tag in self.tags:
+            if self.budget is not None and self.budget.expired():
+                LOGGER.warning("Skipping SteamSpy bulk listing for tag %r: %s budget exhausted", tag, self.budget.name)
+                continue
+            timeout = self.budget.timeout(self.timeout) if self.budget is not None else self.timeout
+            try:
+                stats.update(fetch_steamspy_tag(tag, timeout=timeout, session=session))
+            except requests.RequestException as e:
+                LOGGER.warning("SteamSpy bulk listing for tag %r failed: %s", tag, e)
+        LOGGER.info("Loaded SteamSpy popularity for %d apps from %d tag listing(s)", len(stats), len(self.tags))
+        return stats
+
+
+def _app_record(
+    is_coop: bool, tags: List[str], reviews: Tuple[Optional[str], Optional[int], Optional[int]]
+) -> Dict[str, Any]:
+    review_summary, review_pct, review_count = reviews
+    return {
+        "is_coop": is_coop,
+        "coop_tags": tags,
+        "review_summary": review_summary,
+        "review_percent": review_pct,
+        "review_count": review_count,
+        "current_players": None,
+        "steamspy_ccu": None,
+        "steamspy_owners": None,
+        "popularity_pending": bool(is_coop),
+    }
+
+
+def fetch_app_metadata(
+    appid: str, timeout: int = 20, known: Optional[Tuple[bool, List[str]]] = None
+) -> Dict[str, Any]:
+    """Categories and review summary for one app as a single cache record.
+
+    Non-co-op apps are rejected on categories alone, so their review call is
+    skipped; ``known`` categories (from the co-op index) skip the appdetails
+    call too. Popularity is left ``popularity_pending`` for a bulk or per-app fill.
+    """
+    is_coop, tags = known if known is not None else fetch_coop_metadata(appid, timeout=timeout)
+    reviews = fetch_review_summary(appid, timeout=timeout) if is_coop else (None, None, None)
+    return _app_record(is_coop, tags, reviews)
+
+
+async def fetch_app_metadata_async(
+    appid: str,
+    timeout: int = 20,
+    client: Optional[AsyncHttpClient] = None,
+    known: Optional[Tuple[bool, List[str]]] = None,
+) -> Dict[str, Any]:
+    if known is not None:
+        is_coop, tags = known
+    else:
+        is_coop, tags = await fetch_coop_metadata_async(appid, timeout=timeout, client=client)
+    reviews = await fetch_review_summary_async(appid, timeout=timeout, client=client) if is_coop else (None, None, None)
+    return _app_record(is_coop, tags, reviews)
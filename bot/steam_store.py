@@ -1,18 +1,123 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional
 
-from .http_client import get_json
+from .async_http import AsyncHttpClient, get_json_async
+from .http_client import get_json, iter_json_items
 from .models import Deal
 
 STEAM_FEATURED_URL = "https://store.steampowered.com/api/featuredcategories"
+STEAM_APPDETAILS_URL = "https://store.steampowered.com/api/appdetails"
 STEAM_STORE_ICON = "https://store.cloudflare.steamstatic.com/public/shared/images/header/logo_steam.svg"
 
+# featuredcategories is mostly other carousels and image URLs; these are the
+# specials fields _parse_special_items reads.
+STEAM_SPECIAL_FIELDS = (
+    "id",
+    "name",
+    "final_price",
+    "original_price",
+    "discount_percent",
+    "currency",
+    "small_capsule_image",
+)
 
-def fetch_steam_specials(upper_price: float, timeout: int = 20) -> List[Deal]:
-    payload: Dict[str, Any] = get_json(STEAM_FEATURED_URL, params={"cc": "us", "l": "en"}, timeout=timeout)
-    specials = payload.get("specials", {}).get("items", [])
+# appdetails only accepts several appids per call when filtered to price_overview.
+PRICE_OVERVIEW_BATCH = 100
 
+
+def _featured_params(cc: str) -> Dict[str, str]:
+    return {"cc": cc, "l": "en"}
+
+
+def regional_deal_id(kind: str, appid: str, cc: str) -> str:
+    # US keeps the original IDs so existing posted caches stay valid.
+    return f"steam-{kind}-{appid}" if cc == "us" else f"steam-{kind}-{cc}-{appid}"
+
+
+def fetch_steam_specials(upper_price: float, timeout: int = 20, stream: bool = False, cc: str = "us") -> List[Deal]:
+    if stream:
+        items = iter_json_items(
+            STEAM_FEATURED_URL,
+            path=("specials", "items"),
+            fields=STEAM_SPECIAL_FIELDS,
+            params=_featured_params(cc),
+            timeout=timeout,
+        )
+        return _parse_special_items(items, upper_price, cc)
+    payload: Dict[str, Any] = get_json(STEAM_FEATURED_URL, params=_featured_params(cc), timeout=timeout)
+    return _parse_steam_specials(payload, upper_price, cc)
+
+
+async def fetch_steam_specials_async(
+    upper_price: float, timeout: int = 20, client: Optional[AsyncHttpClient] = None, cc: str = "us"
+) -> List[Deal]:
+    payload = await get_json_async(STEAM_FEATURED_URL, params=_featured_params(cc), timeout=timeout, client=client)
+    return _parse_steam_specials(payload, upper_price, cc)
+
+
+def _parse_steam_specials(payload: Dict[str, Any], upper_price: float, cc: str = "us") -> List[Deal]:
+    return _parse_special_items(payload.get("specials", {}).get("items", []), upper_price, cc)
+
+
+def _parse_price_overview(payload: Any, appids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    prices: Dict[str, Optional[Dict[str, Any]]] = {}
+    for appid in appids:
+        entry = payload.get(appid) if isinstance(payload, dict) else None
+        data = entry.get("data") if isinstance(entry, dict) and entry.get("success") else None
+        overview = data.get("price_overview") if isinstance(data, dict) else None
+        if not isinstance(overview, dict):
+            # Free, delisted or region-locked: remember the miss so it is not re-fetched.
+            prices[appid] = None
+            continue
+        prices[appid] = {
+            "currency": str(overview.get("currency") or "USD"),
+            "final": int(overview.get("final", 0) or 0),
+            "initial": int(overview.get("initial", 0) or 0),
+            "discount_percent": int(overview.get("discount_percent", 0) or 0),
+        }
+    return prices
+
+
+def _price_batches(appids: List[str]) -> List[List[str]]:
+    return [[str(a) for a in appids[i : i + PRICE_OVERVIEW_BATCH]] for i in range(0, len(appids), PRICE_OVERVIEW_BATCH)]
+
+
+def _price_params(batch: List[str], cc: str) -> Dict[str, str]:
+    return {"appids": ",".join(batch), "cc": cc, "filters": "price_overview"}
+
+
+def fetch_price_overview(appids: List[str], cc: str, timeout: int = 20) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Regional Steam prices for many apps, ``PRICE_OVERVIEW_BATCH`` appids per request."""
+    prices: Dict[str, Optional[Dict[str, Any]]] = {}
+    for batch in _price_batches(appids):
+        payload = get_json(STEAM_APPDETAILS_URL, params=_price_params(batch, cc), timeout=timeout)
+        prices.update(_parse_price_overview(payload, batch))
+    return prices
+
+
+async def fetch_price_overview_async(
+    appids: List[str], cc: str, timeout: int = 20, client: Optional[AsyncHttpClient] = None
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Like ``fetch_price_overview``, with the batches requested concurrently on one client."""
+    if client is None:
+        async with AsyncHttpClient() as c:
+            return await fetch_price_overview_async(appids, cc, timeout=timeout, client=c)
+    batches = _price_batches(appids)
+    payloads = await asyncio.gather(
+        *(
+            get_json_async(STEAM_APPDETAILS_URL, params=_price_params(batch, cc), timeout=timeout, client=client)
+            for batch in batches
+        )
+    )
+    prices: Dict[str, Optional[Dict[str, Any]]] = {}
+    for batch, payload in zip(batches, payloads):
+        prices.update(_parse_price_overview(payload, batch))
+    return prices
+
+
+def _parse_special_items(specials: Iterable[Dict[str, Any]], upper_price: float, cc: str = "us") -> List[Deal]:
     deals: List[Deal] = []
     for item in specials:
         try:
@@ -35,7 +140,7 @@ def fetch_steam_specials(upper_price: float, timeout: int = 20) -> List[Deal]:
 
             deals.append(
                 Deal(
-                    deal_id=f"steam-special-{appid}",
+                    deal_id=regional_deal_id("special", appid, cc),
                     title=title,
                     sale_price=sale_price,
                     normal_price=normal_price,
@@ -47,6 +152,8 @@ def fetch_steam_specials(upper_price: float, timeout: int = 20) -> List[Deal]:
                     thumb=(str(item.get("small_capsule_image", "")).strip() or None),
                     buy_url=f"https://store.steampowered.com/app/{appid}/",
                     source_label="Steam",
+                    currency=str(item.get("currency") or "USD"),
+                    region=cc,
                 )
             )
         except Exception:
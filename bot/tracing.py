@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+import requests
+
+LOGGER = logging.getLogger("coop_deals_bot")
+
+SERVICE_NAME = "coop-deals-bot"
+STATUS_UNSET, STATUS_OK, STATUS_ERROR = 0, 1, 2
+
+T = TypeVar("T")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("coop_deals_span", default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """A finished-or-running span, serializable as an OTLP/JSON span."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = STATUS_UNSET
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_error(self, exc: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(exc).__name__}: {exc}"
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span: Dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": self.status, "message": self.status_message} if self.status_message else {"code": self.status},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any) -> None:
+        return None
+
+    def set_error(self, exc: BaseException) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter(ABC):
+    @abstractmethod
+    def export(self, spans: List[Span]) -> None:
+        ...
+
+    def shutdown(self) -> None:
+        return None
+
+
+class JsonLinesExporter(SpanExporter):
+    """Appends one OTLP/JSON span per line, flushed per batch."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, spans: List[Span]) -> None:
+        with self.path.open("a", encoding="utf-8") as fh:
+            for sp in spans:
+                fh.write(json.dumps(sp.to_otlp(), separators=(",", ":")) + "\n")
+
+
+class OtlpHttpExporter(SpanExporter):
+    """Posts spans to an OTLP/HTTP collector using the JSON encoding."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.endpoint = endpoint.rstrip("/")
+        if not self.endpoint.endswith("/v1/traces"):
+            self.endpoint += "/v1/traces"
+        self.timeout = timeout
+
+    def export(self, spans: List[Span]) -> None:
+        body = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                    "scopeSpans": [{"scope": {"name": "bot"}, "spans": [sp.to_otlp() for sp in spans]}],
+                }
+            ]
+        }
+        try:
+            # A bare session: tracing must not recurse into the traced HTTP client.
+            requests.post(self.endpoint, json=body, timeout=self.timeout).raise_for_status()
+        except requests.RequestException as e:
+            LOGGER.warning("Failed to export %d span(s) to %s: %s", len(spans), self.endpoint, e)
+
+
+class Tracer:
+    def __init__(self, exporters: List[SpanExporter], batch_size: int = 256):
+        self.exporters = exporters
+        self.batch_size = batch_size
+        self._pending: List[Span] = []
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def _finish(self, sp: Span) -> None:
+        sp.end_ns = time.time_ns()
+        with self._lock:
+            self._pending.append(sp)
+            if len(self._pending) < self.batch_size:
+                return
+            batch, self._pending = self._pending, []
+        self._export(batch)
+
+    def _export(self, batch: List[Span]) -> None:
+        for exporter in self.exporters:
+            exporter.export(batch)
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._export(batch)
+
+    def shutdown(self) -> None:
+        self.flush()
+        for exporter in self.exporters:
+            exporter.shutdown()
+
+
+_TRACER = Tracer([])
+
+
+def configure_tracing(trace_file: Optional[Path] = None, otlp_endpoint: str = "") -> Tracer:
+    global _TRACER
+    exporters: List[SpanExporter] = []
+    if trace_file is not None:
+        exporters.append(JsonLinesExporter(trace_file))
+    if otlp_endpoint:
+        exporters.append(OtlpHttpExporter(otlp_endpoint))
+    _TRACER = Tracer(exporters)
+    return _TRACER
+
+
+def get_tracer() -> Tracer:
+    return _TRACER
+
+
+def _new_span(name: str, attributes: Dict[str, Any]) -> Span:
+    parent = _current_span.get()
+    if parent is None:
+        return Span(name, secrets.token_hex(16), None, attributes)
+    return Span(name, parent.trace_id, parent.span_id, attributes)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """Open a child of the current span (or a new trace); a no-op when tracing is off."""
+    tracer = _TRACER
+    if not tracer.enabled:
+        yield _NOOP_SPAN
+        return
+    sp = _new_span(name, attributes)
+    token = _current_span.set(sp)
+    try:
+        yield sp
+    except BaseException as e:
+        sp.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        tracer._finish(sp)
+
+
+@contextmanager
+def detached_span(name: str, **attributes: Any) -> Iterator[Any]:
+    """Like ``span`` but never becomes the current span.
+
+    For generators: a span made current inside one would leak into the
+    consumer's context between ``yield``s.
+    """
+    tracer = _TRACER
+    if not tracer.enabled:
+        yield _NOOP_SPAN
+        return
+    sp = _new_span(name, attributes)
+    try:
+        yield sp
+    except GeneratorExit:
+        raise
+    except BaseException as e:
+        sp.set_error(e)
+        raise
+    finally:
+        tracer._finish(sp)
+
+
+def bind_context(fn: Callable[..., T]) -> Callable[..., T]:
+    """Wrap ``fn`` so it runs under the caller's current span when executed on a worker thread."""
+    ctx = contextvars.copy_context()
+
+    def _run(*args: Any, **kwargs: Any) -> T:
+        return ctx.copy().run(fn, *args, **kwargs)
+
+    return _run
@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import base64
+import copy
+import gzip
+import io
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+LOGGER = logging.getLogger("coop_deals_bot")
+
+# Synthetic copies made by REPLAY_SCALE get appid + k * stride; real Steam appids stay far below it.
+SYNTHETIC_APPID_STRIDE = 100_000_000
+
+APPID_QUERY_KEYS = ("appid", "appids")
+APPDETAILS_PATH = "/api/appdetails"
+APPREVIEWS_PREFIX = "/appreviews/"
+
+
+def canonical_url(url: str) -> str:
+    """URL with its query sorted, so equivalent requests share one archive key."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+
+
+def _base_appid(appid: str) -> str:
+    return str(int(appid) % SYNTHETIC_APPID_STRIDE) if appid.isdigit() else appid
+
+
+def _synthetic_appid(appid: Any, k: int) -> Any:
+    text = str(appid or "").strip()
+    return str(int(text) + k * SYNTHETIC_APPID_STRIDE) if text.isdigit() else appid
+
+
+class _Recorded:
+    __slots__ = ("status", "content_type", "body", "elapsed")
+
+    def __init__(self, status: int, content_type: str, body: bytes, elapsed: float):
+        self.status = status
+        self.content_type = content_type
+        self.body = body
+        self.elapsed = elapsed
+
+
+def _encode_entry(method: str, url: str, rec: _Recorded) -> str:
+    entry: Dict[str, Any] = {"m": method, "u": canonical_url(url), "s": rec.status, "ct": rec.content_type}
+    try:
+        entry["b"] = rec.body.decode("utf-8")
+    except UnicodeDecodeError:
+        entry["b64"] = base64.b64encode(rec.body).decode("ascii")
+    entry["t"] = round(rec.elapsed, 4)
+    return json.dumps(entry, separators=(",", ":"))
+
+
+def _decode_entry(line: str) -> Tuple[str, str, _Recorded]:
+    entry = json.loads(line)
+    body = base64.b64decode(entry["b64"]) if "b64" in entry else str(entry.get("b", "")).encode("utf-8")
+    rec = _Recorded(int(entry["s"]), str(entry.get("ct") or "application/json"), body, float(entry.get("t", 0)))
+    return str(entry["m"]), str(entry["u"]), rec
+
+
+def _build_response(request: requests.PreparedRequest, rec: _Recorded) -> requests.Response:
+    r = requests.Response()
+    r.status_code = rec.status
+    r.reason = "Replayed"
+    r.headers = CaseInsensitiveDict({"Content-Type": rec.content_type, "Content-Length": str(len(rec.body))})
+    r.raw = io.BytesIO(rec.body)
+    r.url = request.url or ""
+    r.request = request
+    r.encoding = "utf-8"
+    return r
+
+
+class ArchiveWriter:
+    """Gzip JSON-lines archive: one ``{m, u, s, ct, b|b64, t}`` entry per upstream GET."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._fh = gzip.open(path, "wt", encoding="utf-8")
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def write(self, method: str, url: str, rec: _Recorded) -> None:
+        line = _encode_entry(method, url, rec)
+        with self._lock:
+            self._fh.write(line + "\n")
+            self.count += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._fh.close()
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Live transport that also archives every GET response.
+
+    Bodies are read eagerly so they can be archived; streamed consumers then
+    iterate the buffered content. Webhook POSTs and PATCHes (whose URL holds
+    the token) are never recorded.
+    """
+
+    def __init__(self, writer: ArchiveWriter, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.writer = writer
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        started = time.perf_counter()
+        r = super().send(request, **kwargs)
+        if request.method == "GET":
+            body = r.content
+            rec = _Recorded(r.status_code, r.headers.get("Content-Type", ""), body, time.perf_counter() - started)
+            self.writer.write("GET", request.url or "", rec)
+        return r
+
+
+Scaler = Callable[[Any, int], Any]
+
+
+def _scale_cheapshark_deals(payload: Any, factor: int) -> Any:
+    if not isinstance(payload, list):
+        return payload
+    scaled = list(payload)
+    for k in range(1, factor):
+        for item in payload:
+            clone = dict(item)
+            clone["dealID"] = f"{item.get('dealID', '')}~{k}"
+            clone["steamAppID"] = _synthetic_appid(item.get("steamAppID"), k)
+            clone["title"] = f"{item.get('title', '')} {k + 1}"
+            scaled.append(clone)
+    return scaled
+
+
+def _scale_featured(payload: Any, factor: int) -> Any:
+    items = payload.get("specials", {}).get("items") if isinstance(payload, dict) else None
+    if not isinstance(items, list):
+        return payload
+    payload = copy.deepcopy(payload)
+    scaled = list(items)
+    for k in range(1, factor):
+        for item in items:
+            clone = dict(item)
+            clone["id"] = _synthetic_appid(item.get("id"), k)
+            clone["name"] = f"{item.get('name', '')} {k + 1}"
+            scaled.append(clone)
+    payload["specials"]["items"] = scaled
+    return payload
+
+
+# Candidate-list endpoints that REPLAY_SCALE multiplies, keyed by (host, path).
+SCALERS: Dict[Tuple[str, str], Scaler] = {
+    ("www.cheapshark.com", "/api/1.0/deals"): _scale_cheapshark_deals,
+    ("store.steampowered.com", "/api/featuredcategories"): _scale_featured,
+}
+
+
+class ReplayAdapter(BaseAdapter):
+    """Offline transport answering GETs from an archive written by ``RecordingAdapter``.
+
+    Repeated requests for one URL cycle through its recorded responses.
+    ``latency_scale`` sleeps for the recorded latency times the factor, and
+    ``scale`` multiplies the candidate lists in ``SCALERS``. Lookups for the
+    synthetic appids those copies carry are answered from the original app's
+    recording. Non-GET requests are acknowledged with 204 and never leave the machine.
+    """
+
+    def __init__(self, path: Path, latency_scale: float = 0.0, scale: int = 1):
+        super().__init__()
+        self.latency_scale = max(0.0, latency_scale)
+        self.scale = max(1, scale)
+        self._entries: Dict[str, List[_Recorded]] = {}
+        self._cursor: Dict[str, int] = {}
+        # (canonical URL without appids, appid) -> that app's appdetails entry, for re-batching.
+        self._appdetails: Dict[Tuple[str, str], Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+        self.misses = 0
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    method, url, rec = _decode_entry(line)
+                    if method == "GET":
+                        self._entries.setdefault(url, []).append(rec)
+                        self._index_appdetails(url, rec)
+        LOGGER.info("Replaying %d recorded URL(s) from %s (scale=%dx)", len(self._entries), path, self.scale)
+
+    def _index_appdetails(self, url: str, rec: _Recorded) -> None:
+        parts = urlsplit(url)
+        if parts.path != APPDETAILS_PATH or rec.status != 200:
+            return
+        try:
+            payload = json.loads(rec.body)
+        except ValueError:
+            return
+        if isinstance(payload, dict):
+            variant = self._appdetails_variant(url)
+            for appid, entry in payload.items():
+                self._appdetails[(variant, appid)] = (entry, rec.elapsed)
+
+    @staticmethod
+    def _appdetails_variant(url: str) -> str:
+        parts = urlsplit(url)
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != "appids"]
+        return canonical_url(urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), "")))
+
+    def _next(self, key: str) -> Optional[_Recorded]:
+        recs = self._entries.get(key)
+        if not recs:
+            return None
+        with self._lock:
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = i + 1
+        return recs[min(i, len(recs) - 1)]
+
+    def _unscaled_url(self, url: str) -> str:
+        parts = urlsplit(url)
+        path = parts.path
+        if path.startswith(APPREVIEWS_PREFIX):
+            path = APPREVIEWS_PREFIX + _base_appid(path[len(APPREVIEWS_PREFIX) :])
+        query = [
+            (k, ",".join(_base_appid(a) for a in v.split(",")) if k in APPID_QUERY_KEYS else v)
+            for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        ]
+        return canonical_url(urlunsplit((parts.scheme, parts.netloc, path, urlencode(query), "")))
+
+    def _rebatched_appdetails(self, url: str) -> Optional[_Recorded]:
+        appids = dict(parse_qsl(urlsplit(url).query)).get("appids", "")
+        if not appids:
+            return None
+        variant = self._appdetails_variant(url)
+        payload: Dict[str, Any] = {}
+        elapsed = 0.0
+        for appid in appids.split(","):
+            entry, t = self._appdetails.get((variant, _base_appid(appid)), ({"success": False}, 0.0))
+            payload[appid] = entry
+            elapsed = max(elapsed, t)
+        return _Recorded(200, "application/json", json.dumps(payload).encode("utf-8"), elapsed)
+
+    def _lookup(self, url: str) -> Optional[_Recorded]:
+        key = canonical_url(url)
+        rec = self._next(key)
+        if rec is None and urlsplit(url).path == APPDETAILS_PATH:
+            rec = self._rebatched_appdetails(key)
+        if rec is None:
+            unscaled = self._unscaled_url(key)
+            rec = self._next(unscaled) if unscaled != key else None
+        if rec is None:
+            return None
+
+        parts = urlsplit(url)
+        scaler = SCALERS.get((parts.hostname or "", parts.path))
+        if scaler is not None and self.scale > 1 and rec.status == 200:
+            payload = scaler(json.loads(rec.body), self.scale)
+            rec = _Recorded(rec.status, rec.content_type, json.dumps(payload).encode("utf-8"), rec.elapsed)
+        return rec
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        if request.method != "GET":
+            return _build_response(request, _Recorded(204, "application/json", b"", 0.0))
+        rec = self._lookup(request.url or "")
+        if rec is None:
+            with self._lock:
+                self.misses += 1
+            raise requests.ConnectionError(f"No recorded response for GET {request.url}", request=request)
+        if self.latency_scale:
+            time.sleep(rec.elapsed * self.latency_scale)
+        return _build_response(request, rec)
+
+    def close(self) -> None:
+        return None
+
+
+_WRITER: Optional[ArchiveWriter] = None
+_REPLAY: Optional[ReplayAdapter] = None
+
+
+def configure_transport(
+    record_file: Optional[Path] = None,
+    replay_file: Optional[Path] = None,
+    latency_scale: float = 0.0,
+    scale: int = 1,
+) -> None:
+    """Switch every session from ``build_session`` to recording or replay mode."""
+    global _WRITER, _REPLAY
+    close_transport()
+    if replay_file is not None:
+        if record_file is not None:
+            LOGGER.warning("Both HTTP_REPLAY_FILE and HTTP_RECORD_FILE are set; replaying without recording.")
+        _REPLAY = ReplayAdapter(replay_file, latency_scale=latency_scale, scale=scale)
+    elif record_file is not None:
+        _WRITER = ArchiveWriter(record_file)
+
+
+def close_transport() -> None:
+    global _WRITER, _REPLAY
+    if _WRITER is not None:
+        _WRITER.close()
+        LOGGER.info("Recorded %d HTTP response(s) to %s", _WRITER.count, _WRITER.path)
+    if _REPLAY is not None and _REPLAY.misses:
+        LOGGER.warning("Replay had %d request(s) with no recorded response", _REPLAY.misses)
+    _WRITER = None
+    _REPLAY = None
+
+
+def transport_adapter(**adapter_kwargs: Any) -> BaseAdapter:
+    """The adapter ``build_session`` mounts: live, recording or replaying."""
+    if _REPLAY is not None:
+        return _REPLAY
+    if _WRITER is not None:
+        return RecordingAdapter(_WRITER, **adapter_kwargs)
+    return HTTPAdapter(**adapter_kwargs)
@@ -1,6 +1,164 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
 from pathlib import Path
+import socketserver
 import sys
+import threading
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+
+class _RespStandIn(socketserver.ThreadingTCPServer):
+    """In-process Redis protocol stand-in covering the commands the bot uses."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _RespHandler)
+        self.lock = threading.Lock()
+        self.strings = {}
+        self.sets = {}
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def _read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2].decode("utf-8"))
+        return args
+
+    def _bulk(self, value):
+        if value is None:
+            return b"$-1\r\n"
+        data = value.encode("utf-8")
+        return b"$%d\r\n%s\r\n" % (len(data), data)
+
+    def handle(self):
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            with self.server.lock:
+                self.wfile.write(self._dispatch(args[0].upper(), args[1:]))
+
+    def _dispatch(self, cmd, args):
+        srv = self.server
+        if cmd in {"PING", "AUTH", "SELECT"}:
+            return b"+PONG\r\n" if cmd == "PING" else b"+OK\r\n"
+        if cmd == "GET":
+            return self._bulk(srv.strings.get(args[0]))
+        if cmd == "SET":
+            key, value, flags = args[0], args[1], [a.upper() for a in args[2:]]
+            if "NX" in flags and key in srv.strings:
+                return b"$-1\r\n"
+            srv.strings[key] = value
+            return b"+OK\r\n"
+        if cmd == "DEL":
+            removed = sum(1 for k in args if srv.strings.pop(k, None) is not None)
+            return b":%d\r\n" % removed
+        if cmd == "SADD":
+            members = srv.sets.setdefault(args[0], set())
+            added = len(set(args[1:]) - members)
+            members.update(args[1:])
+            return b":%d\r\n" % added
+        if cmd == "SISMEMBER":
+            return b":1\r\n" if args[1] in srv.sets.get(args[0], set()) else b":0\r\n"
+        if cmd == "SMEMBERS":
+            members = sorted(srv.sets.get(args[0], set()))
+            return b"*%d\r\n" % len(members) + b"".join(self._bulk(m) for m in members)
+        return b"-ERR unknown command '%s'\r\n" % cmd.encode()
+
+
+@pytest.fixture
+def resp_server():
+    server = _RespStandIn()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = dict(parse_qsl(parts.query))
+        self.server.requests.append((parts.path, query))
+        route = self.server.routes.get(parts.path)
+        headers = {}
+        if route is None:
+            status, payload = 404, {"error": "not found"}
+        elif callable(route):
+            status, payload, *extra = route(query)
+            headers = extra[0] if extra else {}
+        else:
+            status, payload = 200, route
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        parts = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        self.server.posted.append((parts.path, json.loads(self.rfile.read(length) or b"null")))
+        body = json.dumps(self.server.routes.get(parts.path, {})).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_PATCH = do_POST
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpStub(ThreadingHTTPServer):
+    """Local JSON stub for upstream APIs.
+
+    ``routes`` maps a path to a payload, or to ``fn(query) -> (status, payload[, headers])``;
+    a ``bytes`` payload is sent as-is.
+    POSTed and PATCHed JSON bodies are recorded in ``posted``.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.routes = {}
+        self.requests = []
+        self.posted = []
+
+    def url(self, path):
+        host, port = self.server_address
+        return f"http://{host}:{port}{path}"
+
+
+@pytest.fixture
+def http_stub():
+    server = HttpStub()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+import requests
+
+from bot.async_http import AsyncHttpClient, gather_limited
+from bot.steam import (
+    fetch_app_metadata_async,
+    fetch_coop_metadata,
+    fetch_coop_metadata_async,
+    fetch_review_summary_async,
+)
+from bot.steam_store import (
+    PRICE_OVERVIEW_BATCH,
+    fetch_price_overview,
+    fetch_price_overview_async,
+    fetch_steam_specials,
+    fetch_steam_specials_async,
+)
+
+
+def _appdetails(query):
+    appid = query["appids"]
+    categories = [{"description": "Online Co-op"}] if int(appid) % 2 == 0 else [{"description": "Single-player"}]
+    return 200, {appid: {"success": True, "data": {"categories": categories}}}
+
+
+def test_async_and_sync_fetchers_share_parsing(http_stub, monkeypatch):
+    http_stub.routes["/api/appdetails"] = _appdetails
+    monkeypatch.setattr("bot.steam.STEAM_APPDETAILS_URL", http_stub.url("/api/appdetails"))
+
+    async def run():
+        async with AsyncHttpClient() as client:
+            return await fetch_coop_metadata_async("620", client=client)
+
+    assert asyncio.run(run()) == fetch_coop_metadata("620") == (True, ["Online Co-op"])
+
+
+def test_fan_out_many_appids_on_one_client(http_stub, monkeypatch):
+    http_stub.routes["/api/appdetails"] = _appdetails
+    monkeypatch.setattr("bot.steam.STEAM_APPDETAILS_URL", http_stub.url("/api/appdetails"))
+    appids = [str(i) for i in range(200)]
+
+    async def run():
+        async with AsyncHttpClient(limit_per_host=16) as client:
+            return await gather_limited(lambda a: fetch_coop_metadata_async(a, client=client), appids, limit=32)
+
+    results = asyncio.run(run())
+    assert [is_coop for is_coop, _ in results] == [int(a) % 2 == 0 for a in appids]
+    assert len(http_stub.requests) == 200
+
+
+def test_async_http_errors_surface_as_requests_exceptions(http_stub, monkeypatch):
+    http_stub.routes["/appreviews/1"] = lambda q: (500, {})
+    monkeypatch.setattr("bot.steam.STEAM_APPREVIEWS_URL", http_stub.url("/appreviews/{appid}"))
+
+    async def run():
+        async with AsyncHttpClient(retries=1, backoff_factor=0) as client:
+            return await fetch_review_summary_async("1", client=client)
+
+    with pytest.raises(requests.HTTPError):
+        asyncio.run(run())
+    assert len(http_stub.requests) == 2
+
+
+def test_async_retries_wait_for_retry_after(http_stub, monkeypatch):
+    responses = iter([(429, {}, {"Retry-After": "7"}), (503, {}, {"Retry-After": "soon"}), (200, {"ok": True})])
+    http_stub.routes["/limited"] = lambda q: next(responses)
+    sleeps = []
+
+    async def _sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr("bot.async_http.asyncio.sleep", _sleep)
+
+    async def run():
+        async with AsyncHttpClient(retries=2, backoff_factor=0.5) as client:
+            return await client.get_json(http_stub.url("/limited"))
+
+    assert asyncio.run(run()) == {"ok": True}
+    # The 429's header wins over backoff; an unparsable header falls back to backoff.
+    assert sleeps == [7.0, 1.0]
+
+
+def test_async_specials_match_sync(http_stub, monkeypatch):
+    http_stub.routes["/api/featuredcategories"] = {
+        "specials": {
+            "items": [
+                {"id": 1, "name": "Cheap", "final_price": 499, "original_price": 1999, "discount_percent": 75},
+                {"id": 2, "name": "Pricey", "final_price": 5999, "original_price": 5999, "discount_percent": 0},
+            ]
+        }
+    }
+    monkeypatch.setattr("bot.steam_store.STEAM_FEATURED_URL", http_stub.url("/api/featuredcategories"))
+
+    async_deals = asyncio.run(fetch_steam_specials_async(10.0))
+    assert async_deals == fetch_steam_specials(10.0)
+    assert [d.deal_id for d in async_deals] == ["steam-special-1"]
+
+
+def test_async_html_body_surfaces_as_requests_exception(http_stub):
+    http_stub.routes["/html"] = b"<html>maintenance</html>"
+
+    async def run():
+        async with AsyncHttpClient(retries=0) as client:
+            return await client.get_json(http_stub.url("/html"))
+
+    with pytest.raises(requests.RequestException):
+        asyncio.run(run())
+
+
+def test_async_price_overview_matches_sync_across_batches(http_stub, monkeypatch):
+    def _prices(query):
+        overview = {"currency": "EUR", "initial": 1999, "final": 499, "discount_percent": 75}
+        return 200, {a: {"success": True, "data": {"price_overview": overview}} for a in query["appids"].split(",")}
+
+    http_stub.routes["/appdetails"] = _prices
+    monkeypatch.setattr("bot.steam_store.STEAM_APPDETAILS_URL", http_stub.url("/appdetails"))
+    appids = [str(i) for i in range(PRICE_OVERVIEW_BATCH + 5)]
+
+    prices = asyncio.run(fetch_price_overview_async(appids, "de"))
+    assert prices == fetch_price_overview(appids, "de")
+    assert len(prices) == len(appids) and len(http_stub.requests) == 4
+
+
+def test_async_app_metadata_skips_appdetails_for_known_categories(http_stub, monkeypatch):
+    http_stub.routes["/appreviews/620"] = {
+        "query_summary": {"review_score_desc": "Very Positive", "review_score": 8, "total_reviews": 900}
+    }
+    monkeypatch.setattr("bot.steam.STEAM_APPREVIEWS_URL", http_stub.url("/appreviews/{appid}"))
+
+    record = asyncio.run(fetch_app_metadata_async("620", known=(True, ["Online Co-op"])))
+    assert record["coop_tags"] == ["Online Co-op"] and record["review_count"] == 900
+    assert [p for p, _ in http_stub.requests] == ["/appreviews/620"]
@@ -0,0 +1,32 @@
+from bot.budget import RunBudget
+from bot.main import _popularity_budget_available
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_stage_budget_is_capped_by_run_deadline_minus_reserve():
+    clock = FakeClock()
+    budget = RunBudget(100, clock=clock)
+    clock.now = 60
+    stage = budget.stage("enrichment", 300, reserve=30)
+
+    assert stage.remaining() == 10
+    assert stage.timeout(20) == 10
+    clock.now = 70
+    assert stage.expired()
+    assert stage.timeout(20) == 1.0
+
+
+def test_popularity_is_dropped_once_half_the_enrichment_budget_is_spent():
+    clock = FakeClock()
+    stage = RunBudget(600, clock=clock).stage("enrichment", 100)
+
+    assert _popularity_budget_available(stage)
+    clock.now = 60
+    assert not _popularity_budget_available(stage)
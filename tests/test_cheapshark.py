@@ -0,0 +1,63 @@
+import json
+import time
+
+import pytest
+import requests
+
+from bot.cheapshark import StoreIndex, _parse_deals, load_store_index
+
+STORES = {
+    "1": {"storeID": "1", "storeName": "Steam", "images": {"icon": "/img/stores/icons/0.png"}},
+    "7": {"storeID": "7", "storeName": "  GOG  ", "images": {"icon": "/img/stores/icons/6.png"}},
+    "25": {"storeID": "25", "storeName": "Epic  Games Store", "images": {}},
+}
+
+
+def test_select_resolves_ids_and_normalized_names():
+    index = StoreIndex(STORES)
+    assert index.select(allowed_names=["steam", "gog"]).ids() == ["1", "7"]
+    assert index.select(allowed_ids=["25"], allowed_names=["GOG"], excluded_names=["gog"]).ids() == ["25"]
+    assert index.select(excluded_ids=["1"], excluded_names=[" EPIC GAMES  store"]).ids() == ["7"]
+    assert index.select(allowed_names=["nope"]).ids() == []
+    # Subsets share the parent's precomputed records.
+    assert index.select(allowed_ids=["7"]).by_id["7"] is index.by_id["7"]
+
+
+def test_parse_deals_decorates_from_index():
+    deals = _parse_deals(
+        [
+            {"dealID": "a", "title": "A", "salePrice": "1.99", "storeID": "7"},
+            {"dealID": "b", "title": "B", "salePrice": "2.99", "storeID": "99"},
+        ],
+        StoreIndex(STORES),
+    )
+    assert [(d.store_name, d.store_icon) for d in deals] == [
+        ("GOG", "https://www.cheapshark.com/img/stores/icons/6.png"),
+        ("Store 99", None),
+    ]
+
+
+def test_load_store_index_reuses_fresh_copy_and_falls_back_when_stale(tmp_path, monkeypatch):
+    path = tmp_path / "stores.json"
+    calls = []
+
+    def _fetch(timeout):
+        calls.append(timeout)
+        return STORES
+
+    monkeypatch.setattr("bot.cheapshark.fetch_stores", _fetch)
+    assert len(load_store_index(path, ttl_seconds=3600)) == 3
+    assert len(load_store_index(path, ttl_seconds=3600)) == 3
+    assert len(calls) == 1
+
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    doc["fetched_at"] = time.time() - 7200
+    path.write_text(json.dumps(doc), encoding="utf-8")
+
+    def _down(timeout):
+        raise requests.ConnectionError("down")
+
+    monkeypatch.setattr("bot.cheapshark.fetch_stores", _down)
+    assert load_store_index(path, ttl_seconds=3600).name("25") == "Epic  Games Store"
+    with pytest.raises(requests.ConnectionError):
+        load_store_index(tmp_path / "missing.json", ttl_seconds=3600)
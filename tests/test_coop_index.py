@@ -0,0 +1,115 @@
+import requests
+
+from bot.budget import RunBudget
+from bot.coop_index import CoopCatalog, update_catalog
+from bot.filters import compile_filters
+from bot.main import EnrichmentContext, _enrich_candidates
+from bot.metrics import RunMetrics
+from bot.models import Deal
+from bot.popularity import PopularityIndex
+from bot.steam import SteamCoopCache
+
+
+def _deal(appid):
+    return Deal(
+        deal_id=f"d{appid}",
+        title=f"Game {appid}",
+        sale_price=4.99,
+        normal_price=19.99,
+        savings_pct=75.0,
+        store_id="1",
+        store_name="Steam",
+        store_icon=None,
+        steam_app_id=appid,
+        thumb=None,
+    )
+
+
+def test_catalog_round_trips_tags_and_pending(tmp_path):
+    path = tmp_path / "coop.bin"
+    catalog = CoopCatalog(path)
+    catalog.record("620", True, ["Co-op", "Online Co-op"])
+    catalog.record("3000000", False, [])
+    catalog.mark_pending("440")
+    catalog.mark_pending("620")
+    catalog.save()
+
+    reloaded = CoopCatalog(path)
+    assert len(reloaded) == 2
+    assert reloaded.lookup("620") == (True, ["Co-op", "Online Co-op"])
+    assert reloaded.lookup("3000000") == (False, [])
+    assert reloaded.lookup("440") is None and reloaded.lookup("not-an-id") is None
+    assert reloaded.pending() == [440]
+    # A second answer for the same app replaces the first, tags included.
+    reloaded.record("620", True, ["LAN Co-op"])
+    assert reloaded.lookup("620") == (True, ["LAN Co-op"])
+    # A bitmap reaching appid 3,000,000 is ~375 KB raw but compresses to almost nothing.
+    assert path.stat().st_size < 2048
+
+
+def test_corrupt_catalog_starts_empty(tmp_path):
+    path = tmp_path / "coop.bin"
+    path.write_bytes(b"garbage")
+    assert len(CoopCatalog(path)) == 0
+
+
+def test_enrichment_rejects_known_single_player_without_lookups(tmp_path, monkeypatch):
+    catalog = CoopCatalog(tmp_path / "coop.bin")
+    catalog.record("100", False, [])
+    catalog.record("200", True, ["Co-op"])
+    fetched = []
+
+    def _coop(appid, timeout):
+        fetched.append(appid)
+        return True, ["Online Co-op"]
+
+    monkeypatch.setattr("bot.steam.fetch_coop_metadata", _coop)
+    monkeypatch.setattr("bot.steam.fetch_review_summary", lambda appid, timeout: ("Very Positive", 90, 500))
+    monkeypatch.setattr("bot.main.fetch_current_players", lambda appid, timeout: None)
+    monkeypatch.setattr("bot.main.fetch_steamspy_stats", lambda appid, timeout: (None, None))
+    s = _settings(monkeypatch, tmp_path)
+    metrics = RunMetrics()
+    ctx = EnrichmentContext(
+        steam_cache=SteamCoopCache(tmp_path / "steam.json"),
+        budget=RunBudget(60).stage("enrichment", 60),
+        metrics=metrics,
+        popularity=None,
+        popularity_index=PopularityIndex(tmp_path / "pop.json", 3600),
+        coop_index=catalog,
+    )
+    enriched = _enrich_candidates([_deal("100"), _deal("200"), _deal("300")], s, compile_filters(s, []), ctx)
+
+    assert [d.steam_app_id for d in enriched] == ["200", "300"]
+    assert metrics.filtered_non_coop == 1
+    # Only the app missing from the index needed appdetails; the run taught the index about it.
+    assert fetched == ["300"]
+    assert enriched[0].coop_tags == ["Co-op"]
+    assert catalog.lookup("300") == (True, ["Online Co-op"])
+
+
+def test_update_catalog_seeds_from_cache_and_stops_on_error(tmp_path, monkeypatch):
+    cache = SteamCoopCache(tmp_path / "steam.json")
+    cache.set("10", {"is_coop": True, "coop_tags": ["Co-op"]})
+    catalog = CoopCatalog(tmp_path / "coop.bin")
+    assert catalog.seed_from_cache(cache) == 1
+
+    def _fetch(appid, timeout):
+        if appid == "30":
+            raise requests.ConnectionError("429")
+        return appid == "20", []
+
+    monkeypatch.setattr("bot.coop_index.fetch_coop_metadata", _fetch)
+    assert update_catalog(catalog, [10, 20, 30, 40], limit=5, sleep=lambda s: None) == 1
+    reloaded = CoopCatalog(tmp_path / "coop.bin")
+    assert reloaded.lookup("10") == (True, ["Co-op"])
+    assert reloaded.lookup("20") == (True, [])
+    assert reloaded.lookup("30") is None
+
+
+def _settings(monkeypatch, tmp_path):
+    from bot.config import load_settings
+
+    monkeypatch.setenv("DISCORD_WEBHOOK_URL", "https://example.invalid/hook")
+    monkeypatch.setenv("MIN_REVIEW_PERCENT", "0")
+    monkeypatch.setenv("MIN_REVIEW_COUNT", "0")
+    return load_settings()
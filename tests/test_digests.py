@@ -0,0 +1,130 @@
+from dataclasses import replace
+
+from bot.config import load_settings
+from bot.digests import DigestHistory, DigestRecord, embed_hash
+from bot.discord_webhook import EmbedRenderer
+from bot.fanout import RetryQueue
+from bot.main import _select_and_post
+from bot.metrics import RunMetrics
+from bot.models import Deal
+from bot.state import FileStateBackend
+
+
+def _deal(deal_id, price, appid):
+    return Deal(
+        deal_id=deal_id,
+        title=f"{deal_id * 3} Quest",
+        sale_price=price,
+        normal_price=20.0,
+        savings_pct=75.0,
+        store_id="1",
+        store_name="Steam",
+        store_icon=None,
+        steam_app_id=appid,
+        thumb=None,
+        coop_tags=["Co-op"],
+    )
+
+
+def test_history_keeps_newest_records_per_profile(tmp_path):
+    history = DigestHistory(tmp_path / "digests.json", keep=2)
+    for i in range(3):
+        record = DigestRecord(region="us", message_ids={"primary": str(i)}, deal_ids=[], prices=[], embeds=[])
+        history.add("default", record)
+    history.add("budget", DigestRecord(region="de", message_ids={"primary": "b"}, deal_ids=[], prices=[], embeds=[]))
+    history.save()
+
+    reloaded = DigestHistory(tmp_path / "digests.json", keep=2)
+    assert [r.message_ids["primary"] for r in reloaded.records("default")] == ["2", "1"]
+    assert reloaded.latest("budget", "de").message_ids == {"primary": "b"}
+    assert reloaded.latest("budget", "us") is None
+
+
+def test_embed_hash_ignores_timestamp():
+    embed = {"title": "A", "timestamp": "2024-01-01T00:00:00+00:00"}
+    assert embed_hash(embed) == embed_hash({**embed, "timestamp": "2025-01-01T00:00:00+00:00"})
+    assert embed_hash(embed) != embed_hash({**embed, "title": "B"})
+
+
+def test_repeated_selection_edits_only_changed_embeds(tmp_path, http_stub, monkeypatch):
+    monkeypatch.setenv("DISCORD_WEBHOOK_URL", http_stub.url("/hook"))
+    http_stub.routes["/hook"] = {"id": "m1"}
+    s = replace(load_settings(), max_posts_per_run=5)
+    history = DigestHistory(tmp_path / "digests.json")
+    queue = RetryQueue(tmp_path / "queue.json")
+    deals = [_deal("a", 4.99, "1"), _deal("b", 2.99, "2")]
+
+    _select_and_post(s, "us", deals, set(), FileStateBackend(tmp_path / "p1.json"), RunMetrics(), history, queue)
+    assert len(http_stub.posted) == 1
+    first = history.latest(s.profile_name, "us")
+    assert (first.message_ids, first.deal_ids) == ({"primary": "m1"}, ["b", "a"])
+
+    # Same selection again (e.g. posted-ID state lost on a manual dispatch), nothing changed: no request.
+    _select_and_post(s, "us", deals, set(), FileStateBackend(tmp_path / "p2.json"), RunMetrics(), history, queue)
+    assert len(http_stub.posted) == 1
+
+    # One price moved: the original message is edited and only that embed is re-rendered.
+    cheaper = [replace(deals[0], sale_price=3.99), deals[1]]
+    unchanged_embed = first.embeds[0]
+    _select_and_post(s, "us", cheaper, set(), FileStateBackend(tmp_path / "p3.json"), RunMetrics(), history, queue)
+    path, body = http_stub.posted[-1]
+    assert path == "/hook/messages/m1"
+    assert body["embeds"][0] == unchanged_embed
+    assert "$3.99" in body["embeds"][1]["description"]
+    assert history.latest(s.profile_name, "us").prices == [2.99, 3.99]
+
+    # Nothing new to select (both already posted), but the digest's deals are still refreshed in place.
+    cheapest = [replace(deals[0], sale_price=0.99), deals[1]]
+    state = FileStateBackend(tmp_path / "p4.json")
+    _select_and_post(s, "us", cheapest, {"a", "b"}, state, RunMetrics(), history, queue)
+    assert len(http_stub.posted) == 3 and http_stub.posted[-1][0] == "/hook/messages/m1"
+    assert history.latest(s.profile_name, "us").prices == [2.99, 0.99]
+
+
+def test_edit_falls_back_to_new_post_when_message_is_too_old(tmp_path, http_stub, monkeypatch):
+    monkeypatch.setenv("DISCORD_WEBHOOK_URL", http_stub.url("/hook"))
+    http_stub.routes["/hook"] = {"id": "m2"}
+    s = replace(load_settings(), digest_edit_max_age_seconds=0.0)
+    history = DigestHistory(tmp_path / "digests.json")
+    queue = RetryQueue(tmp_path / "queue.json")
+    record = DigestRecord(region="us", message_ids={"primary": "m1"}, deal_ids=["a"], prices=[9.99], embeds=[{"t": 1}])
+    history.add(s.profile_name, record)
+
+    state = FileStateBackend(tmp_path / "p.json")
+    _select_and_post(s, "us", [_deal("a", 4.99, "1")], set(), state, RunMetrics(), history, queue)
+    assert [p for p, _ in http_stub.posted] == ["/hook"]
+    assert history.latest(s.profile_name, "us").message_ids == {"primary": "m2"}
+
+
+def test_selection_longer_than_one_message_matches_the_previous_digest(tmp_path, http_stub, monkeypatch):
+    monkeypatch.setenv("DISCORD_WEBHOOK_URL", http_stub.url("/hook"))
+    http_stub.routes["/hook"] = {"id": "m1"}
+    s = replace(load_settings(), max_posts_per_run=12)
+    history = DigestHistory(tmp_path / "digests.json")
+    queue = RetryQueue(tmp_path / "queue.json")
+    deals = [_deal(chr(ord("a") + i), 1.0 + i, str(i)) for i in range(12)]
+
+    _select_and_post(s, "us", deals, set(), FileStateBackend(tmp_path / "p1.json"), RunMetrics(), history, queue)
+    assert len(history.latest(s.profile_name, "us").deal_ids) == 10
+
+    # Only ten deals fit in the message, so the same twelve selected again are not re-posted.
+    _select_and_post(s, "us", deals, set(), FileStateBackend(tmp_path / "p2.json"), RunMetrics(), history, queue)
+    assert len(http_stub.posted) == 1
+
+
+def test_one_renderer_serves_every_regional_digest_of_a_run(tmp_path, http_stub, monkeypatch):
+    monkeypatch.setenv("DISCORD_WEBHOOK_URL", http_stub.url("/hook"))
+    s = load_settings()
+    history = DigestHistory(tmp_path / "digests.json")
+    queue = RetryQueue(tmp_path / "queue.json")
+    state = FileStateBackend(tmp_path / "posted.json")
+    # The same Steam listing at the same price, as the US and Canadian candidates carry it.
+    us = replace(_deal("steam-special-1", 4.99, "1"), buy_url="https://store.steampowered.com/app/1/")
+    ca = replace(us, deal_id="steam-price-ca-1", region="ca")
+    renderer = EmbedRenderer()
+
+    _select_and_post(s, "us", [us], set(), state, RunMetrics(), history, queue, renderer)
+    _select_and_post(s, "ca", [ca], set(), state, RunMetrics(), history, queue, renderer)
+
+    assert len(http_stub.posted) == 2
+    assert (renderer.misses, renderer.hits) == (1, 1)
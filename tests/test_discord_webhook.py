@@ -1,4 +1,4 @@
-from bot.discord_webhook import _compose_content, MAX_DISCORD_CONTENT_CHARS, build_embed
+from bot.discord_webhook import _compose_content, MAX_DISCORD_CONTENT_CHARS, EmbedRenderer, build_embed
 from bot.models import Deal
 
 
@@ -53,3 +53,26 @@ def test_build_embed_includes_steamdb_link_and_stats():
     assert "SteamDB-ish stats" in embed["description"]
     assert "Players now: **12,345**" in embed["description"]
     assert "Owners est.: **1,000,000 .. 2,000,000**" in embed["description"]
+
+
+def test_embed_renderer_reuses_fragments_across_profiles():
+    renderer = EmbedRenderer(timestamp="2026-01-01T00:00:00+00:00")
+    deal = _deal(coop_tags=["Co-op"], review_summary="Very Positive", review_percent=93, review_count=5000)
+
+    first = renderer.render(deal, embed_color=1)
+    second = renderer.render(deal, embed_color=2, footer_text="Mirror • EU")
+
+    assert (renderer.misses, renderer.hits) == (1, 1)
+    assert first["description"] == second["description"]
+    assert (first["color"], second["color"]) == (1, 2)
+    assert second["footer"]["text"] == "Mirror • EU"
+    assert first["timestamp"] == second["timestamp"] == "2026-01-01T00:00:00+00:00"
+
+
+def test_embed_renderer_rerenders_when_deal_content_changes():
+    renderer = EmbedRenderer()
+    renderer.render(_deal(), embed_color=1)
+    embed = renderer.render(_deal(sale_price=3.99), embed_color=1)
+
+    assert renderer.misses == 2
+    assert embed["description"].startswith("**$3.99**")
@@ -0,0 +1,113 @@
+import json
+import time
+
+import pytest
+import requests
+
+from bot.config import WebhookDestination, load_settings
+from bot.digests import DigestHistory, DigestRecord
+from bot.discord_webhook import send_payload
+from bot.fanout import RetryQueue, fan_out
+
+DEAD_URL = "https://dead.invalid/hook"
+
+
+@pytest.fixture(autouse=True)
+def _dead_webhook(monkeypatch):
+    def _send(url, payload, timeout=20):
+        if url == DEAD_URL:
+            raise requests.ConnectionError("webhook down")
+        return send_payload(url, payload, timeout=timeout)
+
+    monkeypatch.setattr("bot.fanout.send_payload", _send)
+
+
+def test_destinations_follow_primary_and_override_per_webhook(monkeypatch):
+    monkeypatch.setenv("DISCORD_WEBHOOK_URL", "https://example.invalid/primary")
+    monkeypatch.setenv("DISCORD_ROLE_ID", "42")
+    monkeypatch.setenv("PING_ROLE_ON_POST", "true")
+    monkeypatch.setenv(
+        "DISCORD_DESTINATIONS",
+        json.dumps(
+            [
+                {"name": "friends", "url": "https://example.invalid/friends", "color": "#FF0000", "role_id": "7"},
+                {"name": "primary", "url": "https://example.invalid/dupe"},
+                {"url": "https://example.invalid/mirror", "username": "Mirror Bot"},
+                {"name": "no-url"},
+            ]
+        ),
+    )
+    s = load_settings()
+    assert [(d.name, d.url.rsplit("/", 1)[-1], d.role_id) for d in s.webhook_destinations] == [
+        ("primary", "primary", "42"),
+        ("friends", "friends", "7"),
+        ("mirror-3", "mirror", ""),
+    ]
+    assert s.webhook_destinations[1].embed_color == 0xFF0000
+    assert s.webhook_destinations[2].username == "Mirror Bot"
+
+
+def test_fan_out_reports_each_destination(http_stub):
+    http_stub.routes["/a"] = {"id": "m-a"}
+    destinations = [
+        WebhookDestination("a", http_stub.url("/a"), "Bot", 0x00FF00),
+        WebhookDestination("b", http_stub.url("/b"), "Other", 0x0000FF, role_id="9"),
+        WebhookDestination("dead", DEAD_URL, "Bot", 0x00FF00),
+    ]
+    deliveries = fan_out(destinations, "**Deals**", [{"title": "A", "color": 0x00FF00}])
+
+    assert [(d.destination.name, d.ok, d.message_id) for d in deliveries] == [
+        ("a", True, "m-a"),
+        ("b", True, None),
+        ("dead", False, None),
+    ]
+    bodies = dict(http_stub.posted)
+    assert bodies["/b"]["username"] == "Other" and bodies["/b"]["content"].startswith("<@&9>")
+    assert bodies["/b"]["embeds"][0]["color"] == 0x0000FF and bodies["/a"]["embeds"][0]["color"] == 0x00FF00
+
+
+def test_retry_queue_drains_next_run_and_drops_expired(tmp_path, http_stub):
+    path = tmp_path / "queue.json"
+    queue = RetryQueue(path, max_age_seconds=3600)
+    queue.push("a", {"content": "old"})
+    queue.push("a", {"content": "fresh"})
+    queue.push("dead", {"content": "stuck"})
+    queue.save()
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    doc["a"][0]["queued_at"] = time.time() - 7200
+    path.write_text(json.dumps(doc), encoding="utf-8")
+
+    queue = RetryQueue(path, max_age_seconds=3600)
+    destinations = [
+        WebhookDestination("a", http_stub.url("/a"), "Bot", 0),
+        WebhookDestination("dead", DEAD_URL, "Bot", 0),
+    ]
+    assert len(queue.drain(destinations)) == 1
+    assert http_stub.posted == [("/a", {"content": "fresh"})]
+    queue.save()
+
+    reloaded = RetryQueue(path)
+    assert reloaded.pending("a") == []
+    assert [e["payload"] for e in reloaded.pending("dead")] == [{"content": "stuck"}]
+
+
+def test_redelivered_message_ids_join_their_digest_and_removed_webhooks_are_pruned(tmp_path, http_stub):
+    http_stub.routes["/a"] = {"id": "m-late"}
+    history = DigestHistory(tmp_path / "digests.json")
+    record = DigestRecord(region="us", message_ids={"b": "m-b"}, deal_ids=["x"], prices=[1.0], embeds=[])
+    history.add("default", record)
+    history.save()
+    queue = RetryQueue(tmp_path / "queue.json")
+    queue.push("a", {"content": "late"}, DigestHistory.ref_for("default", record))
+    queue.push("gone", {"content": "orphan"})
+    queue.save()
+
+    queue = RetryQueue(tmp_path / "queue.json")
+    history = DigestHistory(tmp_path / "digests.json")
+    destinations = [WebhookDestination("a", http_stub.url("/a"), "Bot", 0)]
+    for r in queue.drain(destinations):
+        assert history.attach(r.digest, r.destination, r.message_id)
+    assert history.latest("default", "us").message_ids == {"b": "m-b", "a": "m-late"}
+
+    queue.save(destinations)
+    assert json.loads((tmp_path / "queue.json").read_text(encoding="utf-8")) == {}
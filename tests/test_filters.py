@@ -0,0 +1,112 @@
+import pytest
+
+from bot.config import load_settings
+from bot.filters import POST, PRE, FilterConfigError, compile_filters, load_filter_rules
+from bot.metrics import RunMetrics
+from bot.models import Deal
+
+
+def _deal(**kwargs):
+    base = dict(
+        deal_id="1",
+        title="Deep Rock Galactic",
+        sale_price=4.99,
+        normal_price=29.99,
+        savings_pct=80.0,
+        store_id="1",
+        store_name="Steam",
+        store_icon=None,
+        steam_app_id="548430",
+        thumb=None,
+    )
+    base.update(kwargs)
+    return Deal(**base)
+
+
+META = {
+    "is_coop": True,
+    "coop_tags": ["Co-op", "Online Co-op"],
+    "review_percent": 97,
+    "review_count": 250000,
+    "steamspy_ccu": 12000,
+    "steamspy_owners": "5,000,000 .. 10,000,000",
+}
+
+
+def test_chain_runs_cheap_rules_before_enrichment_rules():
+    chain = compile_filters(
+        load_settings(),
+        [{"type": "min_ccu", "value": 10}, {"type": "price_range", "max": 3}, {"type": "require_tags", "any": ["LAN Co-op"]}],
+    )
+    assert [r.name for r in chain.pre] == ["price", "discount", "missing_appid", "price_range", "keyword"]
+    assert [r.name for r in chain.post] == ["non_coop", "reviews", "tags", "min_ccu"]
+
+
+def test_rejections_are_counted_per_rule():
+    chain = compile_filters(
+        load_settings(),
+        [{"type": "price_range", "max": 3, "name": "under_3"}, {"type": "owners", "min": 20000000}],
+    )
+    metrics = RunMetrics()
+
+    assert not chain.check(PRE, _deal(), None, metrics)
+    assert not chain.check(PRE, _deal(sale_price=50.0), None, metrics)
+    assert chain.check(PRE, _deal(sale_price=2.5), None, metrics)
+    assert not chain.check(POST, _deal(sale_price=2.5), META, metrics)
+    assert not chain.check(POST, _deal(), {**META, "is_coop": False}, metrics)
+
+    assert metrics.filtered_price == 1
+    assert metrics.filtered_non_coop == 1
+    assert metrics.filter_rejections == {"under_3": 1, "owners": 1}
+
+
+def test_profile_rules_override_top_level_rules(tmp_path):
+    path = tmp_path / "filters.toml"
+    path.write_text(
+        """
+rules = [{ type = "min_discount", value = 50 }]
+
+[profiles.budget]
+rules = [
+  { type = "price_range", max = 2 },
+  { type = "require_tags", all = ["Online Co-op"] },
+]
+""",
+        encoding="utf-8",
+    )
+    assert load_filter_rules(path, "default") == [{"type": "min_discount", "value": 50}]
+    assert [r["type"] for r in load_filter_rules(path, "budget")] == ["price_range", "require_tags"]
+
+
+def test_invalid_rules_fail_at_compile_time():
+    with pytest.raises(FilterConfigError, match="unknown filter type"):
+        compile_filters(load_settings(), [{"type": "nope"}])
+    with pytest.raises(FilterConfigError, match="min_ccu"):
+        compile_filters(load_settings(), [{"type": "min_ccu"}])
+
+
+def test_unknown_or_pending_popularity_passes_popularity_rules():
+    chain = compile_filters(load_settings(), [{"type": "min_ccu", "value": 100}, {"type": "owners", "min": 20000}])
+    metrics = RunMetrics()
+    unknown = {**META, "steamspy_ccu": None, "steamspy_owners": None}
+    pending = {**META, "steamspy_ccu": None, "steamspy_owners": None, "popularity_pending": True}
+
+    assert chain.check(POST, _deal(), unknown, metrics)
+    assert chain.check(POST, _deal(), pending, metrics)
+    assert not chain.check(POST, _deal(), {**META, "steamspy_ccu": 5, "current_players": 7}, metrics)
+    assert metrics.filter_rejections == {"min_ccu": 1}
+
+
+def test_declared_rule_named_like_a_builtin_gets_its_own_counter():
+    chain = compile_filters(load_settings(), [{"type": "price_range", "max": 3, "name": "price"}])
+    metrics = RunMetrics()
+    assert not chain.check(PRE, _deal(sale_price=5.0), None, metrics)
+    assert metrics.filtered_price == 0
+    assert metrics.filter_rejections == {"price": 1}
+
+
+def test_non_object_profiles_is_a_config_error(tmp_path):
+    path = tmp_path / "filters.json"
+    path.write_text('{"profiles": ["budget"]}', encoding="utf-8")
+    with pytest.raises(FilterConfigError, match="profiles"):
+        load_filter_rules(path, "budget")
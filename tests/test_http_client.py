@@ -0,0 +1,98 @@
+import json
+
+import pytest
+import requests
+
+from bot.cheapshark import StoreIndex, fetch_deals
+from bot.http_client import iter_json_array, iter_json_items
+from bot.steam_store import fetch_steam_specials
+
+
+def _chunks(data, size):
+    raw = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    return [raw[i : i + size] for i in range(0, len(raw), size)]
+
+
+FEATURED = {
+    "0": {"id": "cat_spotlight", "items": [{"body": "x" * 500}]},
+    "top_sellers": {"items": [{"id": 9, "name": "Ignored"}]},
+    "specials": {
+        "id": "cat_specials",
+        "items": [
+            {"id": 1, "name": "Café Co-op ☕", "final_price": 12345678, "header_image": "https://img/1"},
+            {"id": 2, "name": "Two", "final_price": 7, "discount_percent": 50},
+        ],
+    },
+    "trailing": [1, 2, 3],
+}
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 4096])
+def test_iter_json_array_handles_any_chunk_boundary(size):
+    items = list(iter_json_array(_chunks(FEATURED, size), path=("specials", "items"), fields=("id", "name", "final_price")))
+    assert items == [
+        {"id": 1, "name": "Café Co-op ☕", "final_price": 12345678},
+        {"id": 2, "name": "Two", "final_price": 7},
+    ]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 4, 8, 4096])
+@pytest.mark.parametrize(
+    "raw, path, expected",
+    [
+        (b"[0.1]", (), [0.1]),
+        (b"[1.5,2]", (), [1.5, 2]),
+        (b"[1e5,2]", (), [1e5, 2]),
+        (b"[-2.5E-3,true,null]", (), [-0.0025, True, None]),
+        (b'{"x": 1.5, "y": 12e+3, "items": [3.25, 4]}', ("items",), [3.25, 4]),
+    ],
+)
+def test_iter_json_array_numbers_split_inside_a_fraction_or_exponent(raw, path, expected, size):
+    chunks = [raw[i : i + size] for i in range(0, len(raw), size)]
+    assert list(iter_json_array(chunks, path=path)) == expected
+
+
+def test_iter_json_array_missing_path_yields_nothing():
+    assert list(iter_json_array(_chunks(FEATURED, 5), path=("nope", "items"))) == []
+    assert list(iter_json_array(_chunks({"specials": {}}, 5), path=("specials", "items"))) == []
+
+
+def test_iter_json_array_rejects_truncated_body():
+    raw = json.dumps([{"a": 1}, {"a": 2}]).encode("utf-8")[:-5]
+    with pytest.raises(ValueError):
+        list(iter_json_array([raw]))
+
+
+def test_streaming_fetchers_match_buffered(http_stub, monkeypatch):
+    deals = [
+        {
+            "dealID": f"d{i}",
+            "title": f"Game {i}",
+            "salePrice": "4.99",
+            "normalPrice": "19.99",
+            "savings": "75.0",
+            "storeID": "1",
+            "steamAppID": str(100 + i),
+            "thumb": "https://img",
+            "metacriticLink": "/game/x",
+            "releaseDate": 0,
+        }
+        for i in range(50)
+    ]
+    featured = {"specials": {"items": [{"id": 5, "name": "Five", "final_price": 499, "original_price": 999, "discount_percent": 50}]}}
+    http_stub.routes["/deals"] = deals
+    http_stub.routes["/featured"] = featured
+    monkeypatch.setattr("bot.cheapshark.CHEAPSHARK_DEALS_URL", http_stub.url("/deals"))
+    monkeypatch.setattr("bot.steam_store.STEAM_FEATURED_URL", http_stub.url("/featured"))
+
+    kwargs = dict(upper_price=10.0, steamworks_only=True, allowed_store_ids=["1"], stores=StoreIndex({"1": {"storeName": "Steam"}}))
+    assert fetch_deals(stream=True, **kwargs) == fetch_deals(**kwargs)
+    assert fetch_steam_specials(10.0, stream=True) == fetch_steam_specials(10.0)
+
+
+def test_iter_json_items_raises_request_errors(http_stub):
+    http_stub.routes["/scalar"] = "not an array"
+    assert list(iter_json_items(http_stub.url("/scalar"))) == []
+
+    with pytest.raises(requests.HTTPError):
+        list(iter_json_items(http_stub.url("/missing")))
@@ -0,0 +1,155 @@
+import json
+import os
+import subprocess
+import sys
+from dataclasses import replace
+
+from bot.budget import RunBudget
+from bot.config import load_settings
+from bot.coop_index import CoopCatalog
+from bot.filters import compile_filters
+from bot.incremental import CandidateSnapshot, config_fingerprint
+from bot.main import EnrichmentContext, _diff_candidates, _enrich_candidates, _enrich_one
+from bot.metrics import RunMetrics
+from bot.models import Deal
+from bot.popularity import PopularityIndex
+from bot.steam import SteamCoopCache
+
+
+def _deal(deal_id, appid, price=4.99, savings=75.0):
+    return Deal(
+        deal_id=deal_id,
+        title=f"Game {appid}",
+        sale_price=price,
+        normal_price=19.99,
+        savings_pct=savings,
+        store_id="1",
+        store_name="Steam",
+        store_icon=None,
+        steam_app_id=appid,
+        thumb=None,
+    )
+
+
+def _pass(tmp_path, s, deals, snapshot, monkeypatch):
+    enriched_ids = []
+
+    def _counting(d, *args):
+        enriched_ids.append(d.deal_id)
+        return _enrich_one(d, *args)
+
+    monkeypatch.setattr("bot.main._enrich_one", _counting)
+    metrics = RunMetrics()
+    ctx = EnrichmentContext(
+        steam_cache=SteamCoopCache(tmp_path / "steam.json"),
+        budget=RunBudget(60).stage("enrichment", 60),
+        metrics=metrics,
+        popularity=None,
+        popularity_index=PopularityIndex(tmp_path / "pop.json", 3600),
+        coop_index=CoopCatalog(tmp_path / "coop.bin"),
+        snapshot=snapshot,
+    )
+    _diff_candidates(ctx, deals, "us")
+    enriched = _enrich_candidates(deals, s, compile_filters(s, []), ctx)
+    snapshot.save()
+    return enriched, enriched_ids, metrics
+
+
+def _seed_cache(tmp_path):
+    cache = SteamCoopCache(tmp_path / "steam.json")
+    cache.set("1", {"is_coop": True, "coop_tags": ["Co-op"], "review_percent": 90, "review_count": 500})
+    cache.set("2", {"is_coop": False, "coop_tags": []})
+    cache.set("3", {"is_coop": True, "coop_tags": ["Online Co-op"], "review_percent": 80, "review_count": 200})
+    cache.set("4", {"is_coop": True, "coop_tags": ["LAN Co-op"], "review_percent": 95, "review_count": 900})
+    cache.save()
+
+
+def test_unchanged_deals_reuse_their_verdicts(tmp_path, monkeypatch):
+    monkeypatch.setenv("MAX_PRICE", "20")
+    s = load_settings()
+    _seed_cache(tmp_path)
+    path = tmp_path / "snapshot.json"
+
+    first = [_deal("a", "1"), _deal("b", "2"), _deal("c", "3"), _deal("x", "9", price=25.0)]
+    enriched, evaluated, _ = _pass(tmp_path, s, first, CandidateSnapshot(path, "f1"), monkeypatch)
+    assert [d.deal_id for d in enriched] == ["a", "c"]
+    assert sorted(evaluated) == ["a", "b", "c"]
+
+    # "c" got cheaper, "d" is new, "x" (over the price cap) disappeared.
+    second = [_deal("a", "1"), _deal("b", "2"), _deal("c", "3", price=2.99), _deal("d", "4")]
+    enriched, evaluated, metrics = _pass(tmp_path, s, second, CandidateSnapshot(path, "f1"), monkeypatch)
+    assert sorted(evaluated) == ["c", "d"]
+    assert [d.deal_id for d in enriched] == ["a", "c", "d"]
+    reused = enriched[0]
+    assert (reused.coop_tags, reused.review_percent, reused.reason) == (["Co-op"], 90, first[0].reason)
+    assert (metrics.candidates_new, metrics.candidates_changed, metrics.candidates_removed) == (1, 1, 1)
+    # The reused rejection of "b" still shows up under its rule.
+    assert metrics.candidates_reused == 2 and metrics.filtered_non_coop == 1
+
+    saved = json.loads(path.read_text(encoding="utf-8"))["deals"]
+    assert sorted(saved) == ["a", "b", "c", "d"] and saved["c"]["sale_price"] == 2.99
+
+
+def test_config_change_and_age_force_a_full_evaluation(tmp_path, monkeypatch):
+    s = load_settings()
+    _seed_cache(tmp_path)
+    path = tmp_path / "snapshot.json"
+    deals = [_deal("a", "1"), _deal("b", "2")]
+    _pass(tmp_path, s, [replace(d) for d in deals], CandidateSnapshot(path, "f1"), monkeypatch)
+
+    _, evaluated, _ = _pass(tmp_path, s, [replace(d) for d in deals], CandidateSnapshot(path, "f2"), monkeypatch)
+    assert sorted(evaluated) == ["a", "b"]
+
+    stale = CandidateSnapshot(path, "f2", max_age_seconds=-1)
+    assert str(stale.diff(deals)) == "new=0 changed=0 stale=2 unchanged=0 removed=0"
+
+    assert config_fingerprint(s, []) != config_fingerprint(replace(s, max_price=s.max_price + 1), [])
+    assert config_fingerprint(s, []) != config_fingerprint(s, [{"type": "regex", "pattern": "demo"}])
+
+
+def test_verdicts_reached_with_popularity_pending_are_not_stored(tmp_path, monkeypatch):
+    s = load_settings()
+    cache = SteamCoopCache(tmp_path / "steam.json")
+    cache.set("1", {"is_coop": True, "coop_tags": ["Co-op"], "popularity_pending": True})
+    cache.set("2", {"is_coop": True, "coop_tags": ["Co-op"], "steamspy_ccu": 3, "current_players": 3})
+    cache.save()
+    # No popularity budget left: the per-app fill is skipped and "1" stays pending.
+    monkeypatch.setattr("bot.main._popularity_budget_available", lambda enrichment: False)
+    path = tmp_path / "snapshot.json"
+    chain = compile_filters(s, [{"type": "min_ccu", "value": 100}])
+    deals = [_deal("a", "1"), _deal("b", "2")]
+    snapshot = CandidateSnapshot(path, "f1")
+    ctx = EnrichmentContext(
+        steam_cache=SteamCoopCache(tmp_path / "steam.json"),
+        budget=RunBudget(60).stage("enrichment", 60),
+        metrics=RunMetrics(),
+        popularity=None,
+        popularity_index=PopularityIndex(tmp_path / "pop.json", 3600),
+        coop_index=CoopCatalog(tmp_path / "coop.bin"),
+        snapshot=snapshot,
+    )
+    assert [d.deal_id for d in _enrich_candidates(deals, s, chain, ctx)] == ["a"]
+    snapshot.save()
+
+    saved = json.loads(path.read_text(encoding="utf-8"))["deals"]
+    assert list(saved) == ["b"]
+    assert (saved["b"]["accepted"], saved["b"]["rule"]) == (False, "min_ccu")
+
+
+def test_fingerprint_does_not_depend_on_the_hash_seed(monkeypatch):
+    monkeypatch.setenv("EXCLUDE_KEYWORDS", "demo,soundtrack,dlc,bundle,season pass,artbook,playtest")
+    script = (
+        "from bot.config import load_settings; from bot.incremental import config_fingerprint; "
+        "print(config_fingerprint(load_settings(), []))"
+    )
+    hashes = {
+        subprocess.run(
+            [sys.executable, "-c", script],
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        for seed in ("0", "1", "2", "3")
+    }
+    assert len(hashes) == 1
@@ -1,13 +1,26 @@
+from dataclasses import replace
+
 import requests
+from bot.config import load_settings
+from bot.budget import RunBudget
+from bot.coop_index import CoopCatalog
+from bot.filters import compile_filters
 from bot.main import (
+    EnrichmentContext,
     RunMetrics,
     _build_metrics_summary,
+    _enrich_candidates,
     _fetch_optional_popularity_stats,
     _franchise_key,
     _passes_review_threshold,
     _score_deal,
+    _score_upper_bound,
+    _select_deals,
 )
 from bot.models import Deal
+from bot.popularity import PopularityIndex
+from bot.state import FileStateBackend
+from bot.steam import SteamCoopCache
 
 
 def _deal(**kwargs):
@@ -77,3 +90,86 @@ def test_build_metrics_summary_is_detailed_and_readable():
     assert "Fetched: 42 (CheapShark: 30, Steam Direct: 12)" in summary
     assert "Posted: 10" in summary
     assert "metadata errors".lower() in summary.lower()
+
+
+def test_region_metrics_merge_into_the_run_total():
+    us = RunMetrics(fetched_total=30, posted_count=2, filter_rejections={"min_ccu": 1}, source_counts={"cheapshark": 30})
+    gb = RunMetrics(fetched_total=5, filtered_price=4, filter_rejections={"min_ccu": 2}, exhausted_stages=["enrichment"])
+    gb.record_source("steam_direct:gb", 5, 0.1)
+    total = RunMetrics()
+    for region in (us, gb):
+        total.merge(region)
+
+    assert (total.fetched_total, total.posted_count, total.filtered_price) == (35, 2, 4)
+    assert total.filter_rejections == {"min_ccu": 3} and total.exhausted_stages == ["enrichment"]
+    assert total.source_counts == {"cheapshark": 30, "steam_direct:gb": 5}
+    assert "Fetched: 5 (Steam Direct (GB): 5)" in _build_metrics_summary(gb)
+
+
+def test_select_deals_dedupes_by_appid_and_franchise(tmp_path):
+    s = replace(load_settings(), max_posts_per_run=3, franchise_dedupe_enabled=True, franchise_dedupe_words=2)
+    deals = [
+        _deal(deal_id="a", steam_app_id="1", title="Deep Rock Galactic", savings_pct=90.0),
+        _deal(deal_id="b", steam_app_id="1", title="Deep Rock Galactic", savings_pct=85.0, store_id="7"),
+        _deal(deal_id="c", steam_app_id="2", title="Deep Rock Galactic: Survivor", savings_pct=80.0),
+        _deal(deal_id="d", steam_app_id="3", title="Portal 2", savings_pct=88.0),
+        _deal(deal_id="e", steam_app_id="4", title="It Takes Two", savings_pct=60.0),
+        _deal(deal_id="f", steam_app_id="5", title="Overcooked", savings_pct=50.0),
+    ]
+    metrics = RunMetrics()
+
+    selected = _select_deals(s, deals, {"d"}, FileStateBackend(tmp_path / "posted.json"), metrics)
+
+    assert [d.deal_id for d in selected] == ["a", "e", "f"]
+    assert (metrics.filtered_duplicate_appid, metrics.filtered_duplicate_franchise) == (1, 1)
+    assert metrics.filtered_already_posted == 1
+
+
+def test_upper_bound_never_underestimates_the_enriched_score():
+    d = _deal(sale_price=3.0, review_percent=None, coop_tags=[])
+    enriched = replace(d, review_percent=97, coop_tags=["Co-op", "Online Co-op"])
+    assert _score_upper_bound(d, 5.0, False) >= _score_deal(enriched, 5.0, False)
+    assert _score_upper_bound(d, 5.0, False, known_tags=["Co-op", "Online Co-op"]) == _score_deal(
+        replace(enriched, review_percent=100), 5.0, False
+    )
+
+
+def test_enrichment_stops_once_top_k_beats_every_remaining_bound(tmp_path, monkeypatch):
+    monkeypatch.setenv("MIN_REVIEW_PERCENT", "0")
+    monkeypatch.setenv("MIN_REVIEW_COUNT", "0")
+    s = replace(load_settings(), max_price=50.0, max_posts_per_run=2, franchise_dedupe_enabled=False)
+    cache = SteamCoopCache(tmp_path / "steam.json")
+    deals = []
+    for i, savings in enumerate([30.0, 90.0, 20.0, 85.0]):
+        appid = str(10 + i)
+        cache.set(appid, {"is_coop": True, "coop_tags": ["Co-op", "Online Co-op"], "review_percent": 90})
+        deals.append(
+            _deal(deal_id=f"d{i}", steam_app_id=appid, title=f"Game {i}", sale_price=10.0, savings_pct=savings)
+        )
+
+    def _run(limit):
+        metrics = RunMetrics()
+        ctx = EnrichmentContext(
+            steam_cache=cache,
+            budget=RunBudget(60).stage("enrichment", 60),
+            metrics=metrics,
+            popularity=None,
+            popularity_index=PopularityIndex(tmp_path / "pop.json", 3600),
+            coop_index=CoopCatalog(tmp_path / "coop.bin"),
+        )
+        enriched = _enrich_candidates([replace(d) for d in deals], s, compile_filters(s, []), ctx, select_limit=limit)
+        return enriched, metrics
+
+    pruned, metrics = _run(2)
+    full, _ = _run(None)
+
+    # 90% and 85% score 120/115 once enriched; the best bound left is 30 + 44.
+    assert [d.deal_id for d in pruned] == ["d1", "d3"]
+    assert metrics.skipped_bound == 2
+    assert len(full) == 4
+
+    def _pick(enriched):
+        state = FileStateBackend(tmp_path / f"posted-{len(enriched)}.json")
+        return [d.deal_id for d in _select_deals(s, enriched, set(), state, RunMetrics())]
+
+    assert _pick(pruned) == _pick(full)
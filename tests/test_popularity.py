@@ -0,0 +1,101 @@
+import json
+
+import pytest
+import requests
+
+from bot import steam
+from bot.main import _fetch_optional_popularity_stats
+from bot.popularity import PopularityIndex, refresh_index
+
+
+def test_index_round_trips_and_expires_by_page(tmp_path, monkeypatch):
+    path = tmp_path / "pop.json"
+    index = PopularityIndex(path, max_age_seconds=3600)
+    index.update_page(0, {"620": (5000, "10,000,000 .. 20,000,000")})
+    index.update_page(1, {"730": (900000, "50,000,000 .. 100,000,000")})
+    index.save()
+
+    reloaded = PopularityIndex(path, max_age_seconds=3600)
+    assert len(reloaded) == 2
+    assert reloaded.get("620") == (5000, "10,000,000 .. 20,000,000")
+    assert reloaded.get("999") is None
+
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    raw["pages"]["1"] -= 7200
+    path.write_text(json.dumps(raw), encoding="utf-8")
+    stale = PopularityIndex(path, max_age_seconds=3600)
+    assert stale.get("730") is None and stale.get("620") is not None
+    assert stale.age_seconds() >= 7200
+
+
+def test_update_page_drops_apps_that_left_the_page(tmp_path):
+    index = PopularityIndex(tmp_path / "pop.json", max_age_seconds=3600)
+    index.update_page(0, {"1": (1, "a"), "2": (2, "b")})
+    index.update_page(0, {"2": (3, "c")})
+    assert index.get("1") is None and index.get("2") == (3, "c")
+
+
+def test_refresh_index_stops_at_empty_page(tmp_path, http_stub, monkeypatch):
+    pages = {
+        "0": {"620": {"appid": 620, "ccu": 5, "owners": "1 .. 2"}},
+        "1": {"730": {"appid": 730, "ccu": 7, "owners": "3 .. 4"}},
+    }
+    http_stub.routes["/steamspy"] = lambda q: (200, pages.get(q["page"], {}))
+    monkeypatch.setattr(steam, "STEAMSPY_APPDETAILS_URL", http_stub.url("/steamspy"))
+    sleeps = []
+
+    index = PopularityIndex(tmp_path / "pop.json", max_age_seconds=3600)
+    assert refresh_index(index, pages=10, delay_seconds=60, sleep=sleeps.append) == 2
+    assert sleeps == [60, 60]
+    assert PopularityIndex(tmp_path / "pop.json", 3600).get("730") == (7, "3 .. 4")
+
+
+def test_popularity_lookup_prefers_snapshot_and_falls_back_per_app(tmp_path, monkeypatch):
+    index = PopularityIndex(tmp_path / "pop.json", max_age_seconds=3600)
+    index.update_page(0, {"620": (5000, "10,000,000 .. 20,000,000")})
+
+    def _no_network(*args, **kwargs):
+        raise AssertionError("no network call expected")
+
+    monkeypatch.setattr("bot.main.fetch_current_players", _no_network)
+    monkeypatch.setattr("bot.main.fetch_steamspy_stats", _no_network)
+    # Without network budget a snapshot hit still answers, just without the live player count.
+    stats = _fetch_optional_popularity_stats("620", index=index, allow_network=False)
+    assert stats == (None, 5000, "10,000,000 .. 20,000,000")
+    assert _fetch_optional_popularity_stats("730", index=index, allow_network=False) is None
+
+    # With budget left, a snapshot hit only adds the live player count; SteamSpy is not asked.
+    monkeypatch.setattr("bot.main.fetch_current_players", lambda appid, timeout: 42)
+    assert _fetch_optional_popularity_stats("620", index=index) == (42, 5000, "10,000,000 .. 20,000,000")
+
+    monkeypatch.setattr("bot.main.fetch_steamspy_stats", lambda appid, timeout: (40, "0 .. 20,000"))
+    assert _fetch_optional_popularity_stats("730", index=index) == (42, 40, "0 .. 20,000")
+
+
+def test_refresh_index_keeps_pages_stored_before_a_failure(tmp_path, monkeypatch):
+    def _fetch(page, timeout):
+        if page:
+            raise requests.ConnectionError("rate limited")
+        return {"620": (5, "1 .. 2")}
+
+    monkeypatch.setattr("bot.popularity.fetch_steamspy_all_page", _fetch)
+    index = PopularityIndex(tmp_path / "pop.json", max_age_seconds=3600)
+    assert refresh_index(index, pages=3, sleep=lambda s: None) == 1
+    assert PopularityIndex(tmp_path / "pop.json", 3600).get("620") == (5, "1 .. 2")
+    # The pages the failed refresh never reached make the index stale for the next --if-older-than check.
+    assert index.age_seconds(1) < 60 and index.age_seconds(3) == float("inf")
+
+
+@pytest.mark.parametrize("age, expected", [(0.0, 1), (10**9, 0)])
+def test_cli_skips_refresh_while_fresh(tmp_path, monkeypatch, age, expected):
+    from bot import popularity
+
+    monkeypatch.setenv("POPULARITY_INDEX_FILE", str(tmp_path / "pop.json"))
+    index = PopularityIndex(tmp_path / "pop.json", 3600)
+    index.update_page(0, {"1": (1, "a")})
+    index.save()
+    calls = []
+    monkeypatch.setattr(popularity, "refresh_index", lambda *a, **k: calls.append(a) or 0)
+
+    popularity.main(["--pages", "1", "--if-older-than", str(age)])
+    assert len(calls) == expected
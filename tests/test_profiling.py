@@ -0,0 +1,41 @@
+import pstats
+import tracemalloc
+
+from bot.profiling import profiled_run, stage_snapshot
+
+
+def _build_titles(n):
+    return [f"Co-op Game {i}" * 4 for i in range(n)]
+
+
+def test_profiled_run_writes_pstats_stage_snapshots_and_summary(tmp_path):
+    kept = []
+    with profiled_run(tmp_path / "profile", top=10):
+        kept.append(_build_titles(2000))
+        stage_snapshot("ingestion")
+        kept.append(sorted(kept[0], reverse=True))
+        stage_snapshot("ranking-us")
+
+    out = tmp_path / "profile"
+    assert sorted(p.name for p in out.iterdir()) == [
+        "memory-01-ingestion.tracemalloc",
+        "memory-02-ranking-us.tracemalloc",
+        "profile.pstats",
+        "summary.txt",
+    ]
+    assert any(fn[2] == "_build_titles" for fn in pstats.Stats(str(out / "profile.pstats")).stats)
+    assert tracemalloc.Snapshot.load(str(out / "memory-01-ingestion.tracemalloc")).traces
+    summary = (out / "summary.txt").read_text(encoding="utf-8")
+    assert "functions by cumulative time" in summary and "_build_titles" in summary
+    assert "-- ingestion" in summary and "-- ranking-us" in summary and "test_profiling.py" in summary
+    # The profiler started tracemalloc, so it stops it again.
+    assert not tracemalloc.is_tracing()
+
+
+def test_fast_runs_and_unconfigured_runs_write_nothing(tmp_path):
+    stage_snapshot("ingestion")
+    with profiled_run(None):
+        stage_snapshot("ingestion")
+    with profiled_run(tmp_path / "profile", min_run_seconds=3600):
+        stage_snapshot("ingestion")
+    assert not (tmp_path / "profile").exists()
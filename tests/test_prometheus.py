@@ -0,0 +1,83 @@
+import requests
+
+from bot.config import load_settings
+from bot.http_client import get_json
+from bot.main import _run
+from bot.metrics import RunMetrics
+from bot.prometheus import REGISTRY, MetricsRegistry, record_run, start_metrics_server, write_textfile
+
+
+def _sample(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_render_uses_prometheus_text_format():
+    reg = MetricsRegistry()
+    reg.inc("coop_deals_runs_total", help_text="Completed runs.")
+    reg.inc("coop_deals_runs_total", 2)
+    reg.set("coop_deals_cache_entries", 12, cache='steam "coop"')
+    for v in (0.003, 0.2, 40.0):
+        reg.observe("coop_deals_http_request_duration_seconds", v, buckets=(0.01, 1.0), host="steam")
+
+    assert reg.render().splitlines() == [
+        "# TYPE coop_deals_cache_entries gauge",
+        'coop_deals_cache_entries{cache="steam \\"coop\\""} 12',
+        "# TYPE coop_deals_http_request_duration_seconds histogram",
+        'coop_deals_http_request_duration_seconds_bucket{host="steam",le="0.01"} 1',
+        'coop_deals_http_request_duration_seconds_bucket{host="steam",le="1"} 2',
+        'coop_deals_http_request_duration_seconds_bucket{host="steam",le="+Inf"} 3',
+        'coop_deals_http_request_duration_seconds_sum{host="steam"} 40.203',
+        'coop_deals_http_request_duration_seconds_count{host="steam"} 3',
+        "# HELP coop_deals_runs_total Completed runs.",
+        "# TYPE coop_deals_runs_total counter",
+        "coop_deals_runs_total 3",
+    ]
+
+
+def test_record_run_accumulates_run_metrics_counters():
+    before = REGISTRY.render()
+    metrics = RunMetrics(posted_count=3, fetched_total=7, filtered_non_coop=5, filter_rejections={"min_ccu": 2})
+    metrics.record_source("cheapshark", 40, 0.25)
+    record_run(metrics, 12.5)
+    after = REGISTRY.render()
+
+    assert _sample(after, "coop_deals_posted_count_total") - _sample(before, "coop_deals_posted_count_total") == 3
+    assert _sample(after, "coop_deals_filtered_non_coop_total") - _sample(before, "coop_deals_filtered_non_coop_total") == 5
+    assert _sample(after, "coop_deals_fetched_total") - _sample(before, "coop_deals_fetched_total") == 7
+    assert "coop_deals_fetched_total_total" not in after
+    assert _sample(after, 'coop_deals_filter_rejections_total{rule="min_ccu"}') >= 2
+    assert _sample(after, 'coop_deals_source_deals{source="cheapshark"}') == 40
+    assert _sample(after, "coop_deals_last_run_duration_seconds") == 12.5
+
+
+def test_textfile_and_endpoint_expose_http_latency(tmp_path, http_stub):
+    http_stub.routes["/ok"] = {"ok": True}
+    assert get_json(http_stub.url("/ok")) == {"ok": True}
+
+    path = tmp_path / "textfile" / "coop_deals.prom"
+    write_textfile(path)
+    text = path.read_text(encoding="utf-8")
+    assert 'coop_deals_http_request_duration_seconds_count{host="127.0.0.1",status="200"}' in text
+    assert not list(path.parent.glob("*.tmp"))
+
+    server = start_metrics_server(0, addr="127.0.0.1")
+    try:
+        r = requests.get(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5)
+        assert r.status_code == 200
+        assert r.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE coop_deals_http_request_duration_seconds histogram" in r.text
+        assert requests.get(f"http://127.0.0.1:{server.server_address[1]}/", timeout=5).status_code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_runs_that_stop_early_are_still_recorded(monkeypatch):
+    monkeypatch.setenv("DISCORD_WEBHOOK_URL", "")
+    monkeypatch.setenv("DISCORD_DESTINATIONS", "")
+    before = _sample(REGISTRY.render(), "coop_deals_runs_total")
+    _run(load_settings())
+    assert _sample(REGISTRY.render(), "coop_deals_runs_total") == before + 1
@@ -0,0 +1,94 @@
+import json
+from bot.config import load_settings
+from bot.main import _digest_title
+from bot.models import Deal
+from bot.regions import RegionPriceCache, region_settings, regional_candidates
+
+
+def _deal(appid, **kwargs):
+    base = dict(
+        deal_id=f"cs-{appid}",
+        title=f"Game {appid}",
+        sale_price=4.99,
+        normal_price=19.99,
+        savings_pct=75.0,
+        store_id="1",
+        store_name="Steam",
+        store_icon=None,
+        steam_app_id=appid,
+        thumb=None,
+        coop_tags=["Co-op"],
+    )
+    base.update(kwargs)
+    return Deal(**base)
+
+
+def _price_overview(query):
+    assert query["filters"] == "price_overview"
+    payload = {}
+    for appid in query["appids"].split(","):
+        if appid == "3":
+            payload[appid] = {"success": True, "data": []}
+        else:
+            overview = {"currency": "GBP", "initial": 1599, "final": 399, "discount_percent": 75}
+            payload[appid] = {"success": True, "data": {"price_overview": overview}}
+    return 200, payload
+
+
+def test_regional_candidates_fetch_only_prices_and_cache_them(http_stub, monkeypatch, tmp_path):
+    http_stub.routes["/featured"] = {
+        "specials": {
+            "items": [
+                {"id": 1, "name": "Game 1", "final_price": 299, "original_price": 999, "discount_percent": 70, "currency": "GBP"}
+            ]
+        }
+    }
+    http_stub.routes["/appdetails"] = _price_overview
+    monkeypatch.setattr("bot.steam_store.STEAM_FEATURED_URL", http_stub.url("/featured"))
+    monkeypatch.setattr("bot.steam_store.STEAM_APPDETAILS_URL", http_stub.url("/appdetails"))
+    monkeypatch.setenv("REGIONS", "us,gb")
+    monkeypatch.setenv("REGION_MAX_PRICES", "gb=8")
+    s = load_settings()
+    cache = RegionPriceCache(tmp_path / "prices.json", ttl_seconds=3600)
+    base = [_deal("1"), _deal("2"), _deal("3")]
+
+    deals = regional_candidates("gb", s, base, cache)
+
+    assert [(d.deal_id, d.sale_price, d.currency) for d in deals] == [
+        ("steam-special-gb-1", 2.99, "GBP"),
+        ("steam-price-gb-2", 3.99, "GBP"),
+    ]
+    assert [p for p, _ in http_stub.requests] == ["/featured", "/appdetails"]
+    assert http_stub.requests[1][1]["appids"] == "2,3"
+
+    cache.save()
+    regional_candidates("gb", s, base, RegionPriceCache(tmp_path / "prices.json", ttl_seconds=3600))
+    assert [p for p, _ in http_stub.requests] == ["/featured", "/appdetails", "/featured"]
+
+
+def test_region_settings_scale_price_limits(monkeypatch):
+    monkeypatch.setenv("MAX_PRICE", "10")
+    monkeypatch.setenv("PRICE_SWEET_SPOT", "5")
+    monkeypatch.setenv("REGIONS", "US, gb, xx1, gb")
+    monkeypatch.setenv("REGION_MAX_PRICES", "gb=8,bogus")
+    s = load_settings()
+
+    assert s.regions == ["us", "gb"]
+    gb = region_settings(s, "gb")
+    assert (gb.max_price, gb.price_sweet_spot) == (8.0, 4.0)
+    assert region_settings(s, "us") is s
+
+
+def test_digest_title_uses_region_currency():
+    assert _digest_title("daily", 8, "default", currency="GBP", region="gb") == "[GB] 🎮 **Tonight's Co-op Deals (Under £8)**"
+    assert _digest_title("daily", 10, "default") == "🎮 **Tonight's Co-op Deals (Under $10)**"
+
+
+def test_malformed_price_cache_entries_read_as_expired(tmp_path):
+    path = tmp_path / "prices.json"
+    path.write_text(json.dumps({"gb:1": {"price": None}, "gb:2": {"fetched_at": "soon"}, "gb:3": [1]}), encoding="utf-8")
+    cache = RegionPriceCache(path, ttl_seconds=3600)
+
+    assert [cache.get("gb", appid) for appid in ("1", "2", "3")] == [(False, None)] * 3
+    cache.save()
+    assert json.loads(path.read_text(encoding="utf-8")) == {}
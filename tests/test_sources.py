@@ -0,0 +1,83 @@
+import subprocess
+import sys
+import time
+
+import requests
+
+from bot.cheapshark import StoreIndex
+from bot.config import load_settings
+from bot.metrics import RunMetrics
+from bot.sources import DealSource, fetch_all_sources
+from bot.models import Deal
+
+
+def _deal(deal_id):
+    return Deal(
+        deal_id=deal_id,
+        title=f"Game {deal_id}",
+        sale_price=4.99,
+        normal_price=19.99,
+        savings_pct=75.0,
+        store_id="1",
+        store_name="Steam",
+        store_icon=None,
+        steam_app_id=deal_id,
+        thumb=None,
+    )
+
+
+def test_fetch_all_sources_records_counts_latency_and_errors():
+    def ok(s, stores, timeout):
+        return [_deal("1"), _deal("2")]
+
+    def boom(s, stores, timeout):
+        raise requests.RequestException("upstream down")
+
+    metrics = RunMetrics()
+    sources = [
+        DealSource(name="ok", label="OK", fetch=ok, timeout=1),
+        DealSource(name="boom", label="Boom", fetch=boom, timeout=1),
+    ]
+    deals = fetch_all_sources(sources, load_settings(), StoreIndex({}), metrics)
+
+    assert [d.deal_id for d in deals] == ["1", "2"]
+    assert metrics.source_counts == {"ok": 2, "boom": 0}
+    assert set(metrics.source_latency_ms) == {"ok", "boom"}
+    assert metrics.source_errors == {"boom": "upstream down"}
+
+
+def test_fetch_all_sources_enforces_per_source_deadline():
+    def slow(s, stores, timeout):
+        time.sleep(1.0)
+        return [_deal("slow")]
+
+    def fast(s, stores, timeout):
+        return [_deal("fast")]
+
+    metrics = RunMetrics()
+    sources = [
+        DealSource(name="slow", label="Slow", fetch=slow, timeout=0.1),
+        DealSource(name="fast", label="Fast", fetch=fast, timeout=1),
+    ]
+    started = time.monotonic()
+    deals = fetch_all_sources(sources, load_settings(), StoreIndex({}), metrics)
+
+    assert time.monotonic() - started < 0.9
+    assert [d.deal_id for d in deals] == ["fast"]
+    assert metrics.source_counts["slow"] == 0
+    assert "deadline" in metrics.source_errors["slow"]
+
+
+def test_a_hung_source_does_not_block_interpreter_exit():
+    script = """
+import time
+from bot.cheapshark import StoreIndex
+from bot.config import load_settings
+from bot.metrics import RunMetrics
+from bot.sources import DealSource, fetch_all_sources
+
+hung = DealSource(name="hung", label="Hung", fetch=lambda s, stores, timeout: time.sleep(60), timeout=0.1)
+fetch_all_sources([hung], load_settings(), StoreIndex({}), RunMetrics())
+"""
+    # With a pool worker the child would wait out the 60s sleep before exiting.
+    subprocess.run([sys.executable, "-c", script], check=True, timeout=30)
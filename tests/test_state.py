@@ -0,0 +1,80 @@
+from dataclasses import replace
+
+import pytest
+
+from bot.budget import RunBudget
+from bot.cheapshark import StoreIndex
+from bot.config import load_settings
+from bot.main import _run_pipeline
+from bot.metrics import RunMetrics
+from bot.state import FileStateBackend, RedisStateBackend, RespClient, StateBackendError, build_state_backend
+from bot.steam import SteamCoopCache
+
+
+def _backend(server, runner_id):
+    host, port = server.server_address
+    client = RespClient.from_url(f"redis://{host}:{port}/0")
+    return RedisStateBackend(client, namespace="test", runner_id=runner_id)
+
+
+def test_claim_is_exclusive_across_runners(resp_server):
+    a = _backend(resp_server, "runner-a")
+    b = _backend(resp_server, "runner-b")
+
+    assert a.claim_deal("deal-1")
+    assert not b.claim_deal("deal-1")
+
+    a.release_deal("deal-1")
+    assert b.claim_deal("deal-1")
+
+
+def test_posted_deals_cannot_be_claimed_again(resp_server):
+    a = _backend(resp_server, "runner-a")
+    b = _backend(resp_server, "runner-b")
+
+    assert a.claim_deal("deal-1")
+    a.mark_posted(["deal-1"])
+
+    assert b.posted_ids() == {"deal-1"}
+    assert not b.claim_deal("deal-1")
+
+
+def test_metadata_is_shared_through_steam_cache(resp_server, tmp_path):
+    writer = SteamCoopCache(tmp_path / "a.json", shared=_backend(resp_server, "runner-a"))
+    writer.set("570", {"is_coop": True, "coop_tags": ["Co-op"]})
+
+    reader = SteamCoopCache(tmp_path / "b.json", shared=_backend(resp_server, "runner-b"))
+    assert reader.get("570") == {"is_coop": True, "coop_tags": ["Co-op"]}
+
+
+def test_file_backend_persists_posted_ids(tmp_path):
+    path = tmp_path / "posted.json"
+    backend = FileStateBackend(path)
+    assert backend.claim_deal("deal-1")
+    assert not backend.claim_deal("deal-1")
+    backend.mark_posted(["deal-1"])
+
+    assert FileStateBackend(path).posted_ids() == {"deal-1"}
+
+
+def test_unreachable_shared_backend_fails_instead_of_falling_back(tmp_path):
+    s = replace(load_settings(), state_backend_url="redis://127.0.0.1:1/0", posted_cache_file=tmp_path / "p.json")
+    with pytest.raises(StateBackendError):
+        build_state_backend(s)
+
+
+class _FailingReads(FileStateBackend):
+    def posted_ids(self):
+        raise StateBackendError("SMEMBERS timed out")
+
+
+def test_state_read_failure_after_connect_skips_the_run(tmp_path, monkeypatch, caplog):
+    def _no_sources(*args, **kwargs):
+        raise AssertionError("run should stop before fetching deals")
+
+    monkeypatch.setattr("bot.main.fetch_all_sources", _no_sources)
+    s = load_settings()
+    budget = RunBudget(60)
+    state = _FailingReads(tmp_path / "posted.json")
+    _run_pipeline(s, {"us": RunMetrics()}, budget, budget.stage("ingestion", 30), StoreIndex({}), state, {})
+    assert "avoid double-posting" in caplog.text
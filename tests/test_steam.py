@@ -0,0 +1,71 @@
+import asyncio
+
+from bot import steam
+from bot.budget import RunBudget
+from bot.main import _fetch_optional_popularity_stats
+
+
+def _appdetails(query):
+    categories = [{"description": "Online Co-op"}] if query["appids"] == "620" else []
+    return 200, {query["appids"]: {"success": True, "data": {"categories": categories}}}
+
+
+def _stub_steam(http_stub, monkeypatch):
+    http_stub.routes["/appdetails"] = _appdetails
+    http_stub.routes["/appreviews/620"] = {
+        "query_summary": {"review_score_desc": "Very Positive", "review_score": 8, "total_reviews": 900}
+    }
+    http_stub.routes["/steamspy"] = lambda q: (
+        (200, {"620": {"appid": 620, "ccu": 5000, "owners": "10,000,000 .. 20,000,000"}})
+        if q == {"request": "tag", "tag": "Co-op"}
+        else (404, {})
+    )
+    monkeypatch.setattr(steam, "STEAM_APPDETAILS_URL", http_stub.url("/appdetails"))
+    monkeypatch.setattr(steam, "STEAM_APPREVIEWS_URL", http_stub.url("/appreviews/{appid}"))
+    monkeypatch.setattr(steam, "STEAMSPY_APPDETAILS_URL", http_stub.url("/steamspy"))
+
+
+def test_fetch_app_metadata_builds_one_record_and_skips_reviews_for_non_coop(http_stub, monkeypatch):
+    _stub_steam(http_stub, monkeypatch)
+
+    assert steam.fetch_app_metadata("620") == {
+        "is_coop": True,
+        "coop_tags": ["Online Co-op"],
+        "review_summary": "Very Positive",
+        "review_percent": 8,
+        "review_count": 900,
+        "current_players": None,
+        "steamspy_ccu": None,
+        "steamspy_owners": None,
+        "popularity_pending": True,
+    }
+    solo = steam.fetch_app_metadata("70")
+    assert solo["is_coop"] is False and solo["popularity_pending"] is False
+    assert [path for path, _ in http_stub.requests] == ["/appdetails", "/appreviews/620", "/appdetails"]
+
+    async def _run():
+        return await steam.fetch_app_metadata_async("620")
+
+    assert asyncio.run(_run())["review_count"] == 900
+
+
+def test_steamspy_bulk_loads_tag_listings_once_and_survives_failures(http_stub, monkeypatch):
+    _stub_steam(http_stub, monkeypatch)
+    bulk = steam.SteamSpyBulk(tags=("Co-op", "Broken"), timeout=5)
+
+    assert bulk.get("620") == (5000, "10,000,000 .. 20,000,000")
+    assert bulk.get("999") is None
+    tag_calls = [q["tag"] for path, q in http_stub.requests if path == "/steamspy"]
+    assert tag_calls == ["Co-op", "Broken"]
+
+
+def test_steamspy_bulk_stays_within_the_enrichment_budget(http_stub, monkeypatch):
+    _stub_steam(http_stub, monkeypatch)
+    bulk = steam.SteamSpyBulk(budget=RunBudget(60).stage("enrichment", 0))
+
+    # Without popularity budget the listings are not downloaded at all.
+    assert _fetch_optional_popularity_stats("620", bulk=bulk, allow_network=False) is None
+    assert not bulk.loaded
+    # An exhausted stage skips every listing instead of waiting on them.
+    assert bulk.get("620") is None
+    assert http_stub.requests == []
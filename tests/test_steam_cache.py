@@ -0,0 +1,111 @@
+import json
+import os
+import stat
+
+from bot.steam import SteamCoopCache
+
+
+def test_set_is_journaled_and_recovered_without_save(tmp_path):
+    path = tmp_path / "steam_cache.json"
+    cache = SteamCoopCache(path, compact_every=100)
+    cache.set("570", {"is_coop": True})
+    cache.set("620", {"is_coop": False})
+
+    # Simulate a crash: no save(), the process just goes away.
+    recovered = SteamCoopCache(path)
+    assert recovered.get("570") == {"is_coop": True}
+    assert recovered.get("620") == {"is_coop": False}
+
+
+def test_torn_journal_tail_is_ignored(tmp_path):
+    path = tmp_path / "steam_cache.json"
+    cache = SteamCoopCache(path, compact_every=100)
+    cache.set("570", {"is_coop": True})
+    with cache.journal_path.open("a", encoding="utf-8") as fh:
+        fh.write('{"k": "620", "v": {"is_co')
+
+    recovered = SteamCoopCache(path)
+    assert recovered.get("570") == {"is_coop": True}
+    assert recovered.get("620") is None
+
+
+def test_writes_after_a_torn_tail_survive_a_second_crash(tmp_path):
+    path = tmp_path / "steam_cache.json"
+    cache = SteamCoopCache(path, compact_every=100)
+    cache.set("1", {"is_coop": True})
+    with cache.journal_path.open("a", encoding="utf-8") as fh:
+        fh.write('{"k": "2", "v": {"is_co')
+
+    reopened = SteamCoopCache(path, compact_every=100)
+    reopened.set("3", {"is_coop": True})
+    reopened.set("4", {"is_coop": False})
+
+    # Second crash before any compaction.
+    recovered = SteamCoopCache(path)
+    assert len(recovered) == 3
+    assert recovered.get("3") == {"is_coop": True}
+    assert recovered.get("4") == {"is_coop": False}
+
+
+def test_compaction_writes_store_and_clears_journal(tmp_path):
+    path = tmp_path / "steam_cache.json"
+    cache = SteamCoopCache(path, compact_every=2)
+    cache.set("570", {"is_coop": True})
+    assert cache.journal_path.exists()
+    cache.set("620", {"is_coop": False})
+
+    assert not cache.journal_path.exists()
+    assert json.loads(path.read_text(encoding="utf-8")) == {
+        "570": {"is_coop": True},
+        "620": {"is_coop": False},
+    }
+    assert not path.with_suffix(".json.tmp").exists()
+
+
+def test_compaction_is_durable_before_the_journal_is_dropped(tmp_path, monkeypatch):
+    path = tmp_path / "steam_cache.json"
+    cache = SteamCoopCache(path, compact_every=100)
+    cache.set("570", {"is_coop": True})
+    synced = []
+    real_fsync = os.fsync
+
+    def _fsync(fd):
+        kind = "dir" if stat.S_ISDIR(os.fstat(fd).st_mode) else "file"
+        synced.append((kind, path.exists(), cache.journal_path.exists()))
+        real_fsync(fd)
+
+    monkeypatch.setattr("bot.steam.os.fsync", _fsync)
+    cache.compact()
+
+    # The new store is synced before it replaces the old one, and the directory before the journal goes.
+    assert synced == [("file", False, True), ("dir", True, True)]
+    assert not cache.journal_path.exists()
+
+
+def test_hot_tier_evicts_least_recently_used_by_entries_and_bytes(tmp_path):
+    cache = SteamCoopCache(tmp_path / "steam_cache.json", compact_every=100, max_entries=2)
+    for appid in ("1", "2", "3"):
+        cache.set(appid, {"is_coop": True, "appid": appid})
+    assert cache.hot.evictions == 1 and len(cache.hot) == 2
+
+    # Evicted records are still served from the serialized store, and become hot again.
+    assert cache.get("1") == {"is_coop": True, "appid": "1"}
+    assert cache.get("1") is not None
+    assert (cache.hot.hits, cache.hot.misses) == (1, 1)
+    assert len(cache) == 3
+
+    small = SteamCoopCache(tmp_path / "steam_cache.json", max_bytes=60)
+    for appid in ("1", "2", "3"):
+        small.get(appid)
+    assert small.hot.bytes <= 60 and len(small.hot) == 2
+
+
+def test_compaction_keeps_records_evicted_from_hot_tier(tmp_path):
+    path = tmp_path / "steam_cache.json"
+    cache = SteamCoopCache(path, max_entries=1)
+    cache.set("570", {"is_coop": True})
+    cache.set("620", {"is_coop": False})
+    cache.save()
+
+    assert json.loads(path.read_text(encoding="utf-8")) == {"570": {"is_coop": True}, "620": {"is_coop": False}}
+    assert SteamCoopCache(path).get("570") == {"is_coop": True}
@@ -0,0 +1,105 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bot import tracing
+from bot.http_client import build_session, get_json, iter_json_items
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracing.configure_tracing(trace_file=path)
+    try:
+        yield path
+    finally:
+        tracing.configure_tracing()
+
+
+def _spans(path):
+    tracing.get_tracer().flush()
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def _attrs(sp):
+    # OTLP/JSON encodes int64 attribute values as strings.
+    return {a["key"]: next(iter(a["value"].values())) for a in sp["attributes"]}
+
+
+def test_span_is_noop_when_tracing_disabled():
+    with tracing.span("run", appid="1") as sp:
+        sp.set_attribute("cache.hit", True)
+    assert not tracing.get_tracer().enabled
+
+
+def test_nested_spans_export_as_otlp_json(trace_file):
+    with tracing.span("run", profile="default"):
+        with tracing.span("enrichment.deal", appid="620") as sp:
+            sp.set_attribute("cache.hit", True)
+        with pytest.raises(ValueError):
+            with tracing.span("enrichment.deal", appid="730"):
+                raise ValueError("boom")
+
+    child_ok, child_err, root = _spans(trace_file)
+    assert root["name"] == "run" and "parentSpanId" not in root
+    assert {child_ok["traceId"], child_err["traceId"]} == {root["traceId"]}
+    assert child_ok["parentSpanId"] == root["spanId"]
+    assert _attrs(child_ok) == {"appid": "620", "cache.hit": True}
+    assert child_err["status"] == {"code": tracing.STATUS_ERROR, "message": "ValueError: boom"}
+    assert int(root["endTimeUnixNano"]) >= int(child_err["endTimeUnixNano"])
+
+
+def test_bind_context_parents_worker_thread_spans(trace_file):
+    def work(n):
+        with tracing.span("source.fetch", n=n):
+            return n
+
+    with tracing.span("ingestion.sources"):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            assert list(executor.map(tracing.bind_context(work), [1, 2])) == [1, 2]
+
+    spans = _spans(trace_file)
+    parent = next(sp for sp in spans if sp["name"] == "ingestion.sources")
+    workers = [sp for sp in spans if sp["name"] == "source.fetch"]
+    assert len(workers) == 2
+    assert all(sp["parentSpanId"] == parent["spanId"] for sp in workers)
+
+
+def test_http_spans_carry_host_status_and_retries(trace_file, http_stub):
+    calls = []
+
+    def flaky(query):
+        calls.append(query)
+        return (503, {}) if len(calls) == 1 else (200, {"items": [1, 2]})
+
+    http_stub.routes["/flaky"] = flaky
+    assert get_json(http_stub.url("/flaky"), session=build_session(backoff_factor=0)) == {"items": [1, 2]}
+    assert list(iter_json_items(http_stub.url("/flaky"), path=("items",))) == [1, 2]
+
+    plain, streamed = _spans(trace_file)
+    assert _attrs(plain) == {
+        "http.request.method": "GET",
+        "server.address": "127.0.0.1",
+        "url.path": "/flaky",
+        "http.response.status_code": "200",
+        "http.retry_count": "1",
+    }
+    assert _attrs(streamed)["stream"] is True
+    assert _attrs(streamed)["http.retry_count"] == "0"
+
+
+def test_otlp_exporter_posts_resource_spans(http_stub):
+    tracing.configure_tracing(otlp_endpoint=http_stub.url(""))
+    try:
+        with tracing.span("run"):
+            pass
+        tracing.get_tracer().shutdown()
+    finally:
+        tracing.configure_tracing()
+
+    [(path, body)] = http_stub.posted
+    assert path == "/v1/traces"
+    [resource] = body["resourceSpans"]
+    assert resource["resource"]["attributes"][0]["value"] == {"stringValue": "coop-deals-bot"}
+    assert [sp["name"] for sp in resource["scopeSpans"][0]["spans"]] == ["run"]
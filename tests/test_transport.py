@@ -0,0 +1,97 @@
+import time
+
+import pytest
+import requests
+
+from bot import transport
+from bot.cheapshark import StoreIndex, fetch_deals
+from bot.http_client import build_session, get_json, iter_json_items
+from bot.steam import fetch_coop_metadata
+from bot.steam_store import fetch_price_overview
+
+
+@pytest.fixture(autouse=True)
+def _live_transport():
+    yield
+    transport.configure_transport()
+
+
+PRICE = {"currency": "EUR", "final": 499, "initial": 999, "discount_percent": 50}
+
+
+def _appdetails(query):
+    data = {"categories": [{"description": "Online Co-op"}], "price_overview": PRICE}
+    return 200, {a: {"success": True, "data": data} for a in query["appids"].split(",")}
+
+
+def test_replay_serves_recorded_responses_offline(tmp_path, http_stub):
+    archive = tmp_path / "run.jsonl.gz"
+    http_stub.routes["/items"] = {"data": {"items": [{"id": 1}, {"id": 2}]}}
+    url = http_stub.url("/items")
+
+    transport.configure_transport(record_file=archive)
+    live = get_json(url, params={"b": "2", "a": "1"})
+    streamed = list(iter_json_items(url, path=("data", "items"), params={"page": "0"}))
+    transport.close_transport()
+
+    http_stub.shutdown()
+    http_stub.server_close()
+
+    transport.configure_transport(replay_file=archive)
+    assert get_json(url, params={"a": "1", "b": "2"}) == live
+    assert list(iter_json_items(url, path=("data", "items"), params={"page": "0"})) == streamed
+    assert build_session().post("https://discord.com/api/webhooks/x/y", json={}).status_code == 204
+    with pytest.raises(requests.ConnectionError):
+        get_json(url, params={"a": "other"})
+
+
+def test_replay_injects_recorded_latency(tmp_path, http_stub):
+    archive = tmp_path / "slow.jsonl.gz"
+    http_stub.routes["/slow"] = {"ok": True}
+    transport.configure_transport(record_file=archive)
+    get_json(http_stub.url("/slow"))
+    transport.close_transport()
+
+    replay = transport.ReplayAdapter(archive, latency_scale=1.0)
+    [rec] = replay._entries.values()
+    rec[0].elapsed = 0.2
+    transport._REPLAY = replay
+    started = time.monotonic()
+    assert get_json(http_stub.url("/slow")) == {"ok": True}
+    assert time.monotonic() - started >= 0.2
+
+
+def test_replay_scale_synthesizes_candidates_with_resolvable_appids(tmp_path, http_stub, monkeypatch):
+    archive = tmp_path / "scaled.jsonl.gz"
+    http_stub.routes["/api/1.0/deals"] = [
+        {
+            "dealID": "d1",
+            "title": "Portal 2",
+            "salePrice": "1.99",
+            "normalPrice": "9.99",
+            "savings": "80",
+            "storeID": "1",
+            "steamAppID": "620",
+        },
+    ]
+    http_stub.routes["/api/appdetails"] = _appdetails
+    monkeypatch.setattr("bot.cheapshark.CHEAPSHARK_DEALS_URL", http_stub.url("/api/1.0/deals"))
+    monkeypatch.setattr("bot.steam.STEAM_APPDETAILS_URL", http_stub.url("/api/appdetails"))
+    monkeypatch.setattr("bot.steam_store.STEAM_APPDETAILS_URL", http_stub.url("/api/appdetails"))
+    monkeypatch.setitem(transport.SCALERS, ("127.0.0.1", "/api/1.0/deals"), transport._scale_cheapshark_deals)
+
+    transport.configure_transport(record_file=archive)
+    fetch_deals(20, True, None, StoreIndex({}))
+    fetch_coop_metadata("620")
+    fetch_price_overview(["620"], "de")
+    transport.close_transport()
+
+    transport.configure_transport(replay_file=archive, scale=3)
+    deals = fetch_deals(20, True, None, StoreIndex({}))
+    assert [d.steam_app_id for d in deals] == ["620", "100000620", "200000620"]
+    assert len({d.deal_id for d in deals}) == 3
+    assert fetch_coop_metadata("200000620") == (True, ["Online Co-op"])
+
+    prices = fetch_price_overview(["100000620", "620", "999"], "de")
+    assert prices["100000620"] == prices["620"] == PRICE
+    assert prices["999"] is None